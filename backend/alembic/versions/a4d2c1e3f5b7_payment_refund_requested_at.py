@@ -0,0 +1,27 @@
+"""payment refund_requested_at
+
+Revision ID: a4d2c1e3f5b7
+Revises: f2b0c9d1e3a4
+Create Date: 2026-10-17 20:14:09.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d2c1e3f5b7'
+down_revision = 'f2b0c9d1e3a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'payments',
+        sa.Column('refund_requested_at', sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('payments', 'refund_requested_at')
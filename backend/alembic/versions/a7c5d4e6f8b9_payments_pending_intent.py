@@ -0,0 +1,26 @@
+"""payments pending intent
+
+Revision ID: a7c5d4e6f8b9
+Revises: f6b4c3d5e7a8
+Create Date: 2026-10-17 13:05:14.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c5d4e6f8b9'
+down_revision = 'f6b4c3d5e7a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # PENDING payments are recorded before the provider order exists
+    op.alter_column('payments', 'provider_order_id', existing_type=sa.String(length=255), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM payments WHERE provider_order_id IS NULL")
+    op.alter_column('payments', 'provider_order_id', existing_type=sa.String(length=255), nullable=False)
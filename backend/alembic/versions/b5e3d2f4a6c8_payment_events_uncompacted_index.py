@@ -0,0 +1,31 @@
+"""payment_events uncompacted index
+
+Revision ID: b5e3d2f4a6c8
+Revises: a4d2c1e3f5b7
+Create Date: 2026-10-17 22:41:37.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e3d2f4a6c8'
+down_revision = 'a4d2c1e3f5b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keyset for compact_payment_events (app/services/payment_event_storage.py)
+    op.create_index(
+        'ix_payment_events_uncompacted',
+        'payment_events',
+        ['created_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text('compacted_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payment_events_uncompacted', table_name='payment_events')
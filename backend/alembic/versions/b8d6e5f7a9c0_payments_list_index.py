@@ -0,0 +1,28 @@
+"""payments list index
+
+Revision ID: b8d6e5f7a9c0
+Revises: a7c5d4e6f8b9
+Create Date: 2026-10-17 14:22:40.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d6e5f7a9c0'
+down_revision = 'a7c5d4e6f8b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_payments_tenant_branch_created',
+        'payments',
+        ['tenant_id', 'branch_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_tenant_branch_created', table_name='payments')
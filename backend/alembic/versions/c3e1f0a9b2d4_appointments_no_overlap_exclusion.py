@@ -0,0 +1,39 @@
+"""appointments: no-overlap exclusion constraint per staff
+
+Revision ID: c3e1f0a9b2d4
+Revises: 7b1892983079
+Create Date: 2026-10-17 09:12:40.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e1f0a9b2d4'
+down_revision = '7b1892983079'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # btree_gist provides the "=" operator class for uuid columns in GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    # Fails if overlapping non-cancelled appointments already exist;
+    # resolve those by hand before upgrading.
+    op.execute("""
+        ALTER TABLE appointments
+        ADD CONSTRAINT ex_appt_staff_no_overlap
+        EXCLUDE USING gist (
+            tenant_id WITH =,
+            branch_id WITH =,
+            staff_user_id WITH =,
+            tstzrange(start_at, end_at, '[)') WITH &&
+        )
+        WHERE (status <> 'CANCELLED')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_appt_staff_no_overlap', 'appointments')
@@ -0,0 +1,31 @@
+"""payments pending index
+
+Revision ID: c6f4e3a5b7d9
+Revises: b5e3d2f4a6c8
+Create Date: 2026-10-17 23:18:04.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f4e3a5b7d9'
+down_revision = 'b5e3d2f4a6c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stale-intent sweep of expire_pending_payments (app/services/payment_service.py)
+    op.create_index(
+        'ix_payments_pending_created',
+        'payments',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_pending_created', table_name='payments')
@@ -0,0 +1,25 @@
+"""payments provider id unique indexes
+
+Revision ID: c9e7f6a8b0d1
+Revises: b8d6e5f7a9c0
+Create Date: 2026-10-17 14:51:03.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e7f6a8b0d1'
+down_revision = 'b8d6e5f7a9c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_payments_provider_order_id', 'payments', ['provider_order_id'], unique=True)
+    op.create_index('ix_payments_provider_payment_id', 'payments', ['provider_payment_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_provider_payment_id', table_name='payments')
+    op.drop_index('ix_payments_provider_order_id', table_name='payments')
@@ -0,0 +1,124 @@
+"""partition payment_events by month
+
+Revision ID: d0f8a7b9c1e2
+Revises: c9e7f6a8b0d1
+Create Date: 2026-10-17 15:36:18.000000
+
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0f8a7b9c1e2'
+down_revision = 'c9e7f6a8b0d1'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def upgrade() -> None:
+    # Dedupe keys move to their own table: a unique constraint on a
+    # partitioned table would have to include created_at
+    op.create_table(
+        'payment_event_keys',
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('provider_event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'provider', 'provider_event_id', 'event_type'),
+    )
+    op.execute("""
+        INSERT INTO payment_event_keys (tenant_id, provider, provider_event_id, event_type, created_at)
+        SELECT tenant_id, provider, provider_event_id, event_type, min(created_at)
+        FROM payment_events
+        WHERE provider_event_id IS NOT NULL
+        GROUP BY tenant_id, provider, provider_event_id, event_type
+    """)
+
+    op.execute("ALTER TABLE payment_events RENAME TO payment_events_legacy")
+    op.execute("ALTER INDEX ix_payment_events_tenant_order RENAME TO ix_payment_events_legacy_tenant_order")
+    op.execute("""
+        CREATE TABLE payment_events (
+            id UUID NOT NULL,
+            tenant_id UUID NOT NULL,
+            provider VARCHAR(50) NOT NULL,
+            event_type VARCHAR(100) NOT NULL,
+            provider_event_id VARCHAR(255),
+            provider_order_id VARCHAR(255),
+            provider_payment_id VARCHAR(255),
+            payload JSONB NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            compacted_at TIMESTAMP WITH TIME ZONE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.create_index('ix_payment_events_tenant_order', 'payment_events', ['tenant_id', 'provider_order_id'], unique=False)
+
+    bind = op.get_bind()
+    oldest = bind.scalar(sa.text("SELECT min(created_at) FROM payment_events_legacy"))
+    today = datetime.now(timezone.utc).date()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE payment_events_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF payment_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    # Catches rows outside the monthly partitions; the maintenance job
+    # moves them into their month (app/services/payment_event_storage.py)
+    op.execute("CREATE TABLE payment_events_default PARTITION OF payment_events DEFAULT")
+
+    op.execute("""
+        INSERT INTO payment_events (
+            id, tenant_id, provider, event_type, provider_event_id,
+            provider_order_id, provider_payment_id, payload, created_at
+        )
+        SELECT id, tenant_id, provider, event_type, provider_event_id,
+               provider_order_id, provider_payment_id, payload, created_at
+        FROM payment_events_legacy
+    """)
+    op.drop_table('payment_events_legacy')
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE payment_events RENAME TO payment_events_partitioned")
+    op.execute("ALTER INDEX ix_payment_events_tenant_order RENAME TO ix_payment_events_partitioned_tenant_order")
+    op.execute("""
+        CREATE TABLE payment_events (
+            id UUID NOT NULL PRIMARY KEY,
+            tenant_id UUID NOT NULL,
+            provider VARCHAR(50) NOT NULL,
+            event_type VARCHAR(100) NOT NULL,
+            provider_event_id VARCHAR(255),
+            provider_order_id VARCHAR(255),
+            provider_payment_id VARCHAR(255),
+            payload JSONB NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+        )
+    """)
+    op.execute("""
+        INSERT INTO payment_events
+        SELECT id, tenant_id, provider, event_type, provider_event_id,
+               provider_order_id, provider_payment_id, payload, created_at
+        FROM payment_events_partitioned
+    """)
+    op.execute("DROP TABLE payment_events_partitioned CASCADE")
+    op.create_index('ix_payment_events_tenant_order', 'payment_events', ['tenant_id', 'provider_order_id'], unique=False)
+    op.create_unique_constraint(
+        'uq_payment_events_tenant_provider_event',
+        'payment_events',
+        ['tenant_id', 'provider', 'provider_event_id', 'event_type'],
+    )
+    op.drop_table('payment_event_keys')
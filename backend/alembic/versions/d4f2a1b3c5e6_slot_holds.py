@@ -0,0 +1,51 @@
+"""slot holds table
+
+Revision ID: d4f2a1b3c5e6
+Revises: c3e1f0a9b2d4
+Create Date: 2026-10-17 10:02:11.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f2a1b3c5e6'
+down_revision = 'c3e1f0a9b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'slot_holds',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('branch_id', sa.UUID(), nullable=False),
+        sa.Column('staff_user_id', sa.UUID(), nullable=False),
+        sa.Column('customer_id', sa.UUID(), nullable=True),
+        sa.Column('start_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_slot_holds_tenant_branch_staff_start', 'slot_holds', ['tenant_id', 'branch_id', 'staff_user_id', 'start_at'], unique=False)
+    op.create_index('ix_slot_holds_expires_at', 'slot_holds', ['expires_at'], unique=False)
+    op.execute("""
+        ALTER TABLE slot_holds
+        ADD CONSTRAINT ex_slot_holds_no_overlap
+        EXCLUDE USING gist (
+            tenant_id WITH =,
+            branch_id WITH =,
+            staff_user_id WITH =,
+            tstzrange(start_at, end_at, '[)') WITH &&
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('ex_slot_holds_no_overlap', 'slot_holds')
+    op.drop_index('ix_slot_holds_expires_at', table_name='slot_holds')
+    op.drop_index('ix_slot_holds_tenant_branch_staff_start', table_name='slot_holds')
+    op.drop_table('slot_holds')
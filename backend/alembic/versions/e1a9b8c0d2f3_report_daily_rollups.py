@@ -0,0 +1,87 @@
+"""report daily rollups
+
+Revision ID: e1a9b8c0d2f3
+Revises: d0f8a7b9c1e2
+Create Date: 2026-10-17 16:48:09.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a9b8c0d2f3'
+down_revision = 'd0f8a7b9c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_daily_branch',
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('branch_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('appointments', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('confirmed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('cancelled', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'branch_id', 'day'),
+    )
+    op.create_table(
+        'report_daily_service',
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('branch_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('service_id', sa.UUID(), nullable=False),
+        sa.Column('bookings', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'branch_id', 'day', 'service_id'),
+    )
+    op.create_table(
+        'report_daily_staff',
+        sa.Column('tenant_id', sa.UUID(), nullable=False),
+        sa.Column('branch_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('staff_user_id', sa.UUID(), nullable=False),
+        sa.Column('appointments', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'branch_id', 'day', 'staff_user_id'),
+    )
+
+    # Backfill (same as `python -m app.services.report_rollups`)
+    op.execute("""
+        INSERT INTO report_daily_branch (tenant_id, branch_id, day, appointments, confirmed, cancelled, revenue)
+        SELECT a.tenant_id, a.branch_id, (a.start_at AT TIME ZONE 'UTC')::date,
+               count(*),
+               count(*) FILTER (WHERE a.status = 'CONFIRMED'),
+               count(*) FILTER (WHERE a.status = 'CANCELLED'),
+               coalesce(sum(CASE WHEN a.status = 'CONFIRMED' THEN r.revenue ELSE 0 END), 0)
+        FROM appointments a
+        LEFT JOIN (
+            SELECT appointment_id, sum(price_snapshot) AS revenue
+            FROM appointment_services GROUP BY appointment_id
+        ) r ON r.appointment_id = a.id
+        GROUP BY 1, 2, 3
+    """)
+    op.execute("""
+        INSERT INTO report_daily_service (tenant_id, branch_id, day, service_id, bookings, revenue)
+        SELECT a.tenant_id, a.branch_id, (a.start_at AT TIME ZONE 'UTC')::date, s.service_id,
+               count(*), sum(s.price_snapshot)
+        FROM appointments a
+        JOIN appointment_services s ON s.appointment_id = a.id
+        WHERE a.status = 'CONFIRMED'
+        GROUP BY 1, 2, 3, 4
+    """)
+    op.execute("""
+        INSERT INTO report_daily_staff (tenant_id, branch_id, day, staff_user_id, appointments)
+        SELECT a.tenant_id, a.branch_id, (a.start_at AT TIME ZONE 'UTC')::date, a.staff_user_id, count(*)
+        FROM appointments a
+        WHERE a.status = 'CONFIRMED'
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('report_daily_staff')
+    op.drop_table('report_daily_service')
+    op.drop_table('report_daily_branch')
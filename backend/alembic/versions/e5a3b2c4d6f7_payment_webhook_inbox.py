@@ -0,0 +1,45 @@
+"""payment webhook inbox
+
+Revision ID: e5a3b2c4d6f7
+Revises: d4f2a1b3c5e6
+Create Date: 2026-10-17 11:40:27.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a3b2c4d6f7'
+down_revision = 'd4f2a1b3c5e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_webhook_inbox',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('provider_order_id', sa.String(length=255), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.String(length=1000), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_payment_webhook_inbox_pending',
+        'payment_webhook_inbox',
+        ['provider_order_id', 'received_at'],
+        unique=False,
+        postgresql_where=sa.text('processed_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payment_webhook_inbox_pending', table_name='payment_webhook_inbox')
+    op.drop_table('payment_webhook_inbox')
@@ -0,0 +1,45 @@
+"""report daily staff revenue
+
+Revision ID: f2b0c9d1e3a4
+Revises: e1a9b8c0d2f3
+Create Date: 2026-10-17 18:02:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b0c9d1e3a4'
+down_revision = 'e1a9b8c0d2f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'report_daily_staff',
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    )
+
+    # Backfill (same as `python -m app.services.report_rollups`)
+    op.execute("""
+        UPDATE report_daily_staff d
+        SET revenue = x.revenue
+        FROM (
+            SELECT a.tenant_id, a.branch_id, (a.start_at AT TIME ZONE 'UTC')::date AS day,
+                   a.staff_user_id, sum(s.price_snapshot) AS revenue
+            FROM appointments a
+            JOIN appointment_services s ON s.appointment_id = a.id
+            WHERE a.status = 'CONFIRMED'
+            GROUP BY 1, 2, 3, 4
+        ) x
+        WHERE d.tenant_id = x.tenant_id
+          AND d.branch_id = x.branch_id
+          AND d.day = x.day
+          AND d.staff_user_id = x.staff_user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('report_daily_staff', 'revenue')
@@ -0,0 +1,39 @@
+"""payment events unique provider event
+
+Revision ID: f6b4c3d5e7a8
+Revises: e5a3b2c4d6f7
+Create Date: 2026-10-17 12:18:52.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b4c3d5e7a8'
+down_revision = 'e5a3b2c4d6f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the earliest copy of every duplicated provider event
+    op.execute("""
+        DELETE FROM payment_events a
+        USING payment_events b
+        WHERE a.tenant_id = b.tenant_id
+          AND a.provider = b.provider
+          AND a.provider_event_id = b.provider_event_id
+          AND a.event_type = b.event_type
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+    """)
+    op.drop_index('ix_payment_events_tenant_event', table_name='payment_events')
+    op.create_unique_constraint(
+        'uq_payment_events_tenant_provider_event',
+        'payment_events',
+        ['tenant_id', 'provider', 'provider_event_id', 'event_type'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_payment_events_tenant_provider_event', 'payment_events', type_='unique')
+    op.create_index('ix_payment_events_tenant_event', 'payment_events', ['tenant_id', 'provider_event_id'], unique=False)
@@ -1,23 +1,55 @@
-"""Appointment management routes: availability, create, patch, list."""
+"""Appointment management routes: availability, holds, create, patch, list, calendar."""
 
 import uuid
-from datetime import datetime, timedelta, time, timezone
+from datetime import date, datetime, timedelta, time, timezone
+from typing import Iterable
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import delete, insert, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
 
-from app.core.deps import get_db, get_token_payload, get_branch_id
-from app.models.appointment import Appointment, AppointmentStatus
+from app.core.config import settings
+from app.core.deps import get_db, get_token_payload, get_branch_id, require_roles
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.appointment import (
+    APPT_NO_OVERLAP_CONSTRAINT,
+    Appointment,
+    AppointmentStatus,
+)
 from app.models.appointment_service import AppointmentService
 from app.models.customer import Customer
 from app.models.service import Service
+from app.models.slot_hold import SLOT_HOLD_NO_OVERLAP_CONSTRAINT, SlotHold
 from app.models.staff import Staff
-from app.schemas.appointment import AppointmentCreateIn, AppointmentPatchIn
+from app.models.user import UserRole
+from app.schemas.appointment import (
+    AppointmentCreateIn,
+    AppointmentListItemOut,
+    AppointmentListOut,
+    AppointmentPatchIn,
+    AppointmentRecurringIn,
+    SlotHoldIn,
+)
+from app.services.availability_cache import availability_cache
+from app.services.report_cache import report_cache
+from app.services.availability_service import (
+    busy_by_staff_day,
+    compute_slots,
+    conflicting,
+    drop_held,
+    wall_clock,
+    work_window,
+)
+from app.services.report_rollups import RollupDelta, appointment_lines, rollup_day
 from app.workers.tasks import send_booking_email
 
 router = APIRouter()  # prefix set by parent router
 
+MAX_BATCH_DAYS = 14
+MAX_BATCH_STAFF = 50
+MAX_SEARCH_HORIZON_DAYS = 31
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -26,6 +58,238 @@ def _calc_total_duration_min(services: list[Service]) -> int:
     return sum(int(s.duration_min) for s in services)
 
 
+def _load_services(
+    db: Session, tenant_id: uuid.UUID, service_ids: list[str],
+) -> list[Service]:
+    svc_uuids = [uuid.UUID(s) for s in service_ids]
+    services = db.scalars(
+        select(Service).where(
+            Service.tenant_id == tenant_id,
+            Service.id.in_(svc_uuids),
+            Service.is_active.is_(True),
+        )
+    ).all()
+    if len(services) != len(svc_uuids):
+        raise HTTPException(status_code=400, detail="One or more services not found")
+    return list(services)
+
+
+def _load_services_and_customer(
+    db: Session,
+    tenant_id: uuid.UUID,
+    service_ids: list[str],
+    customer_id: uuid.UUID,
+) -> tuple[list[Service], str | None]:
+    """
+    Validate the customer and resolve the services in one round trip.
+
+    The customer row is outer-joined to the requested services, so it comes
+    back (with a NULL service) even when ``service_ids`` is empty or none of
+    them match.
+    """
+    svc_uuids = [uuid.UUID(s) for s in service_ids]
+    rows = db.execute(
+        select(Customer.email, Service)
+        .select_from(Customer)
+        .outerjoin(
+            Service,
+            (Service.tenant_id == tenant_id)
+            & Service.id.in_(svc_uuids)
+            & Service.is_active.is_(True),
+        )
+        .where(Customer.tenant_id == tenant_id, Customer.id == customer_id)
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    services = [r.Service for r in rows if r.Service is not None]
+    if len(services) != len(svc_uuids):
+        raise HTTPException(status_code=400, detail="One or more services not found")
+    return services, rows[0].email
+
+
+def _slots_for_staff_days(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID,
+    staff_rows: list[Staff],
+    days: list[date],
+    duration_min: int,
+    step_min: int,
+) -> dict[tuple, list[str]]:
+    """
+    Slot lists for every (staff, day) pair, ordered staff-major.
+
+    Cached staff-days are served from ``availability_cache``; the rest are
+    computed from a single range query over the requested days.  Live slot
+    holds are never cached and are subtracted afterwards.
+    """
+    staff_days = [
+        (tenant_id, branch_id, member.id, day_date)
+        for member in staff_rows
+        for day_date in days
+    ]
+    cached, versions = availability_cache.get_many(
+        staff_days, duration_min=duration_min, step_min=step_min,
+    )
+
+    missing_staff = {sd[2] for sd in staff_days if sd not in cached}
+    if missing_staff:
+        rows = db.execute(
+            select(
+                Appointment.staff_user_id, Appointment.start_at, Appointment.end_at,
+            ).where(
+                Appointment.tenant_id == tenant_id,
+                Appointment.branch_id == branch_id,
+                Appointment.staff_user_id.in_(missing_staff),
+                Appointment.status != AppointmentStatus.CANCELLED,
+                Appointment.start_at >= datetime.combine(days[0], time.min),
+                Appointment.start_at <= datetime.combine(days[-1], time(23, 59, 59)),
+            )
+        ).all()
+        busy = busy_by_staff_day(rows)
+
+        computed: dict = {}
+        for member in staff_rows:
+            if member.id not in missing_staff:
+                continue
+            for day_date in days:
+                staff_day = (tenant_id, branch_id, member.id, day_date)
+                if staff_day in cached:
+                    continue
+                start_work, end_work = work_window(member, day_date)
+                computed[staff_day] = [
+                    s.isoformat()
+                    for s in compute_slots(
+                        start_work,
+                        end_work,
+                        busy.get((member.id, day_date), ()),
+                        duration_min=duration_min,
+                        step_min=step_min,
+                    )
+                ]
+        availability_cache.set_many(
+            computed, versions, duration_min=duration_min, step_min=step_min,
+        )
+        cached.update(computed)
+
+    holds = _active_holds(
+        db,
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_ids=[member.id for member in staff_rows],
+        first_day=days[0],
+        last_day=days[-1],
+    )
+    return {
+        sd: drop_held(cached[sd], holds.get(sd[2:], ()), duration_min=duration_min)
+        for sd in staff_days
+    }
+
+
+def _active_holds(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID,
+    staff_ids: Iterable[uuid.UUID],
+    first_day: date,
+    last_day: date,
+) -> dict[tuple[uuid.UUID, date], list[tuple[datetime, datetime]]]:
+    """Unexpired slot holds in the day range, grouped by staff and day."""
+    rows = db.execute(
+        select(SlotHold.staff_user_id, SlotHold.start_at, SlotHold.end_at).where(
+            SlotHold.tenant_id == tenant_id,
+            SlotHold.branch_id == branch_id,
+            SlotHold.staff_user_id.in_(list(staff_ids)),
+            SlotHold.start_at >= datetime.combine(first_day, time.min),
+            SlotHold.start_at <= datetime.combine(last_day, time(23, 59, 59)),
+            SlotHold.expires_at > datetime.now(timezone.utc),
+        )
+    ).all()
+    return busy_by_staff_day(rows)
+
+
+def _held_by_others(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID,
+    staff_user_id: uuid.UUID,
+    start_at: datetime,
+    end_at: datetime,
+    hold_id: uuid.UUID | None = None,
+) -> bool:
+    stmt = select(SlotHold.id).where(
+        SlotHold.tenant_id == tenant_id,
+        SlotHold.branch_id == branch_id,
+        SlotHold.staff_user_id == staff_user_id,
+        SlotHold.expires_at > datetime.now(timezone.utc),
+        SlotHold.start_at < end_at,
+        SlotHold.end_at > start_at,
+    )
+    if hold_id:
+        stmt = stmt.where(SlotHold.id != hold_id)
+    return db.scalar(stmt) is not None
+
+
+def _claim_hold(
+    db: Session,
+    hold_id: uuid.UUID,
+    *,
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID,
+    staff_user_id: uuid.UUID,
+    customer_id: uuid.UUID,
+    start_at: datetime,
+    end_at: datetime,
+) -> SlotHold:
+    """
+    Lock the hold being converted into a booking and check it was taken for
+    this branch, staff member, customer and ``[start_at, end_at)``.
+    """
+    hold = db.scalar(
+        select(SlotHold)
+        .where(SlotHold.tenant_id == tenant_id, SlotHold.id == hold_id)
+        .with_for_update()
+    )
+    if not hold or wall_clock(hold.expires_at) <= wall_clock(datetime.now(timezone.utc)):
+        raise HTTPException(status_code=400, detail="Slot hold not found or expired")
+    if (
+        hold.branch_id != branch_id
+        or hold.staff_user_id != staff_user_id
+        or (hold.customer_id is not None and hold.customer_id != customer_id)
+        or wall_clock(hold.start_at) > wall_clock(start_at)
+        or wall_clock(hold.end_at) < wall_clock(end_at)
+    ):
+        raise HTTPException(status_code=400, detail="Slot hold does not match this booking")
+    return hold
+
+
+def _invalidate_availability(
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID,
+    staff_user_id: uuid.UUID,
+    *moments: datetime,
+) -> None:
+    """Drop cached availability for the staff-days touched by *moments*."""
+    availability_cache.invalidate(
+        (tenant_id, branch_id, staff_user_id, wall_clock(m).date()) for m in moments
+    )
+
+
+def _overlap_enforced_by_db(db: Session) -> bool:
+    """Postgres rejects overlaps itself via the exclusion constraint."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _is_overlap_violation(exc: IntegrityError) -> bool:
+    return (
+        getattr(exc.orig, "sqlstate", None) == "23P01"
+        or APPT_NO_OVERLAP_CONSTRAINT in str(exc.orig)
+    )
+
+
 def _overlap_exists(
     db: Session,
     *,
@@ -74,60 +338,332 @@ def availability(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid day format. Use YYYY-MM-DD")
 
-    svc_uuids = [uuid.UUID(s) for s in service_ids]
-    services = db.scalars(
-        select(Service).where(
-            Service.tenant_id == tenant_id,
-            Service.id.in_(svc_uuids),
-            Service.is_active.is_(True),
+    services = _load_services(db, tenant_id, service_ids)
+    duration_min = _calc_total_duration_min(services)
+
+    staff_day = (tenant_id, branch_id, staff_uuid, day_date)
+    slots, versions = availability_cache.get(
+        staff_day, duration_min=duration_min, step_min=slot_step_min,
+    )
+    if slots is None:
+        staff = db.scalar(
+            select(Staff).where(
+                Staff.tenant_id == tenant_id,
+                Staff.id == staff_uuid,
+            )
         )
-    ).all()
-    if len(services) != len(svc_uuids):
-        raise HTTPException(status_code=400, detail="One or more services not found")
+        if not staff:
+            raise HTTPException(status_code=404, detail="Staff not found")
 
-    duration_min = _calc_total_duration_min(services)
+        start_work, end_work = work_window(staff, day_date)
+
+        day_start = datetime.combine(day_date, time.min)
+        day_end = datetime.combine(day_date, time(23, 59, 59))
+
+        existing = db.execute(
+            select(Appointment.start_at, Appointment.end_at).where(
+                Appointment.tenant_id == tenant_id,
+                Appointment.branch_id == branch_id,
+                Appointment.staff_user_id == staff_uuid,
+                Appointment.status != AppointmentStatus.CANCELLED,
+                Appointment.start_at >= day_start,
+                Appointment.start_at <= day_end,
+            )
+        ).all()
 
-    staff = db.scalar(
-        select(Staff).where(
-            Staff.tenant_id == tenant_id,
-            Staff.id == staff_uuid,
+        slots = [
+            s.isoformat()
+            for s in compute_slots(
+                start_work,
+                end_work,
+                [(wall_clock(r.start_at), wall_clock(r.end_at)) for r in existing],
+                duration_min=duration_min,
+                step_min=slot_step_min,
+            )
+        ]
+        availability_cache.set(
+            staff_day, slots, versions, duration_min=duration_min, step_min=slot_step_min,
         )
+
+    holds = _active_holds(
+        db,
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_ids=[staff_uuid],
+        first_day=day_date,
+        last_day=day_date,
+    )
+    slots = drop_held(slots, holds.get((staff_uuid, day_date), ()), duration_min=duration_min)
+
+    return {"success": True, "data": {"duration_min": duration_min, "slots": slots}}
+
+
+@router.get("/availability/batch")
+def availability_batch(
+    service_ids: list[str] = Query(...),
+    from_day: str = Query(..., description="YYYY-MM-DD"),
+    to_day: str = Query(..., description="YYYY-MM-DD (inclusive)"),
+    staff_user_ids: list[str] | None = Query(
+        None, description="Omit for all active staff",
+    ),
+    slot_step_min: int = Query(15, ge=5, le=60),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    Available start times for many staff members over a date range.
+
+    Appointments for the whole range are loaded with one query on
+    ``ix_appt_tenant_branch_staff_start``; slots are then computed per
+    staff-day in memory.  At most ``MAX_BATCH_DAYS`` days and
+    ``MAX_BATCH_STAFF`` staff members are returned per call.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+
+    try:
+        first_day = datetime.fromisoformat(from_day).date()
+        last_day = datetime.fromisoformat(to_day).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid day format. Use YYYY-MM-DD")
+
+    n_days = (last_day - first_day).days + 1
+    if n_days < 1:
+        raise HTTPException(status_code=400, detail="to_day must not be before from_day")
+    if n_days > MAX_BATCH_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range exceeds {MAX_BATCH_DAYS} days",
+        )
+
+    services = _load_services(db, tenant_id, service_ids)
+    duration_min = _calc_total_duration_min(services)
+
+    staff_q = select(Staff).where(
+        Staff.tenant_id == tenant_id,
+        Staff.is_active.is_(True),
+    )
+    if staff_user_ids:
+        staff_uuids = {uuid.UUID(s) for s in staff_user_ids}
+        if len(staff_uuids) > MAX_BATCH_STAFF:
+            raise HTTPException(
+                status_code=400, detail=f"At most {MAX_BATCH_STAFF} staff per request",
+            )
+        staff_q = staff_q.where(Staff.id.in_(staff_uuids))
+    staff_rows = db.scalars(staff_q.order_by(Staff.full_name).limit(MAX_BATCH_STAFF)).all()
+    if staff_user_ids and len(staff_rows) != len(staff_uuids):
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    days = [first_day + timedelta(days=offset) for offset in range(n_days)]
+    slots_by_staff_day = _slots_for_staff_days(
+        db,
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_rows=staff_rows,
+        days=days,
+        duration_min=duration_min,
+        step_min=slot_step_min,
+    )
+
+    items = [
+        {
+            "staff_user_id": str(staff_id),
+            "day": day_date.isoformat(),
+            "slots": slots,
+        }
+        for (_, _, staff_id, day_date), slots in slots_by_staff_day.items()
+    ]
+
+    return {"success": True, "data": {"duration_min": duration_min, "items": items}}
+
+
+@router.get("/availability/next")
+def next_available(
+    service_ids: list[str] = Query(...),
+    staff_user_id: str | None = Query(None, description="Omit to search all active staff"),
+    after: datetime | None = Query(None, description="Defaults to now; naive values are UTC"),
+    count: int = Query(5, ge=1, le=50),
+    horizon_days: int = Query(14, ge=1, le=MAX_SEARCH_HORIZON_DAYS),
+    slot_step_min: int = Query(15, ge=5, le=60),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    First ``count`` free start times at or after ``after``.
+
+    Days are scanned in order, one range query per day across all candidate
+    staff, and the scan stops at the first day that fills the request or
+    after ``horizon_days`` days.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+
+    services = _load_services(db, tenant_id, service_ids)
+    duration_min = _calc_total_duration_min(services)
+
+    staff_q = select(Staff).where(
+        Staff.tenant_id == tenant_id,
+        Staff.is_active.is_(True),
     )
-    if not staff:
+    if staff_user_id:
+        staff_q = staff_q.where(Staff.id == uuid.UUID(staff_user_id))
+    staff_rows = db.scalars(staff_q.order_by(Staff.full_name).limit(MAX_BATCH_STAFF)).all()
+    if not staff_rows:
         raise HTTPException(status_code=404, detail="Staff not found")
 
-    start_hour, start_min = map(int, staff.work_start_time.split(":"))
-    end_hour, end_min = map(int, staff.work_end_time.split(":"))
+    # Slots are naive wall-clock (UTC) times, like the staff working hours
+    after = wall_clock(after) if after is not None else wall_clock(datetime.now(timezone.utc))
+
+    found: list[dict] = []
+    day_date = after.date()
+    for _ in range(horizon_days):
+        slots_by_staff_day = _slots_for_staff_days(
+            db,
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            staff_rows=staff_rows,
+            days=[day_date],
+            duration_min=duration_min,
+            step_min=slot_step_min,
+        )
+        day_slots = sorted(
+            (start, str(staff_id))
+            for (_, _, staff_id, _), slots in slots_by_staff_day.items()
+            for start in slots
+            if datetime.fromisoformat(start) >= after
+        )
+        found.extend(
+            {"start_at": start, "staff_user_id": staff_id}
+            for start, staff_id in day_slots[: count - len(found)]
+        )
+        if len(found) >= count:
+            break
+        day_date += timedelta(days=1)
+
+    return {"success": True, "data": {"duration_min": duration_min, "slots": found}}
 
-    start_work = datetime.combine(day_date, time(start_hour, start_min))
-    end_work = datetime.combine(day_date, time(end_hour, end_min))
 
-    day_start = datetime.combine(day_date, time.min)
-    day_end = datetime.combine(day_date, time(23, 59, 59))
+@router.get("/calendar")
+def branch_calendar(
+    from_day: str = Query(..., description="YYYY-MM-DD"),
+    to_day: str = Query(..., description="YYYY-MM-DD (inclusive)"),
+    include_cancelled: bool = Query(False),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    Day / week calendar for the branch: appointments grouped by staff, each
+    with its service names and durations, plus every staff member's working
+    hours.  Appointments and their line items come from one joined query.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
 
-    existing = db.scalars(
-        select(Appointment).where(
+    try:
+        first_day = datetime.fromisoformat(from_day).date()
+        last_day = datetime.fromisoformat(to_day).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid day format. Use YYYY-MM-DD")
+
+    n_days = (last_day - first_day).days + 1
+    if n_days < 1:
+        raise HTTPException(status_code=400, detail="to_day must not be before from_day")
+    if n_days > MAX_BATCH_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range exceeds {MAX_BATCH_DAYS} days",
+        )
+
+    q = (
+        select(
+            Appointment.id,
+            Appointment.staff_user_id,
+            Appointment.customer_id,
+            Appointment.start_at,
+            Appointment.end_at,
+            Appointment.status,
+            Appointment.payment_status,
+            AppointmentService.service_id,
+            AppointmentService.duration_snapshot_min,
+            AppointmentService.price_snapshot,
+            Service.name.label("service_name"),
+        )
+        .outerjoin(
+            AppointmentService,
+            AppointmentService.appointment_id == Appointment.id,
+        )
+        .outerjoin(Service, Service.id == AppointmentService.service_id)
+        .where(
             Appointment.tenant_id == tenant_id,
             Appointment.branch_id == branch_id,
-            Appointment.staff_user_id == staff_uuid,
-            Appointment.status != AppointmentStatus.CANCELLED,
-            Appointment.start_at >= day_start,
-            Appointment.start_at <= day_end,
+            Appointment.start_at >= datetime.combine(first_day, time.min),
+            Appointment.start_at <= datetime.combine(last_day, time(23, 59, 59)),
         )
+        .order_by(Appointment.start_at, Appointment.id)
+    )
+    if not include_cancelled:
+        q = q.where(Appointment.status != AppointmentStatus.CANCELLED)
+
+    appts_by_staff: dict[uuid.UUID, list[dict]] = {}
+    appts_by_id: dict[uuid.UUID, dict] = {}
+    for r in db.execute(q):
+        appt = appts_by_id.get(r.id)
+        if appt is None:
+            appt = {
+                "id": str(r.id),
+                "customer_id": str(r.customer_id),
+                "start_at": r.start_at,
+                "end_at": r.end_at,
+                "status": r.status,
+                "payment_status": r.payment_status,
+                "services": [],
+            }
+            appts_by_id[r.id] = appt
+            appts_by_staff.setdefault(r.staff_user_id, []).append(appt)
+        if r.service_id is not None:
+            appt["services"].append({
+                "service_id": str(r.service_id),
+                "name": r.service_name or "",
+                "duration_min": int(r.duration_snapshot_min),
+                "price": float(r.price_snapshot),
+            })
+
+    # Active staff, plus inactive staff who still have bookings in the window
+    staff_filter = Staff.is_active.is_(True)
+    if appts_by_staff:
+        staff_filter = or_(staff_filter, Staff.id.in_(appts_by_staff.keys()))
+    staff_rows = db.scalars(
+        select(Staff)
+        .where(Staff.tenant_id == tenant_id, staff_filter)
+        .order_by(Staff.full_name)
     ).all()
 
-    busy = [(a.start_at, a.end_at) for a in existing]
+    return {
+        "success": True,
+        "data": {
+            "from": first_day.isoformat(),
+            "to": last_day.isoformat(),
+            "staff": [
+                {
+                    "id": str(member.id),
+                    "full_name": member.full_name,
+                    "role": member.role,
+                    "is_active": member.is_active,
+                    "work_start_time": member.work_start_time,
+                    "work_end_time": member.work_end_time,
+                    "appointments": appts_by_staff.get(member.id, []),
+                }
+                for member in staff_rows
+            ],
+        },
+    }
 
-    slots: list[str] = []
-    cursor = start_work
-    while cursor + timedelta(minutes=duration_min) <= end_work:
-        cand_end = cursor + timedelta(minutes=duration_min)
-        conflict = any(bs < cand_end and be > cursor for bs, be in busy)
-        if not conflict:
-            slots.append(cursor.isoformat())
-        cursor += timedelta(minutes=slot_step_min)
 
-    return {"success": True, "data": {"duration_min": duration_min, "slots": slots}}
+@router.get(
+    "/availability/cache-stats",
+    dependencies=[Depends(require_roles(UserRole.OWNER, UserRole.MANAGER))],
+)
+def availability_cache_stats():
+    """Hit / miss counters of this worker's availability cache."""
+    return {"success": True, "data": availability_cache.stats()}
 
 
 @router.post("")
@@ -137,25 +673,25 @@ def create_appointment(
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Book one appointment.
+
+    The write path is one SELECT for services and customer, the hold check,
+    one INSERT ... RETURNING, one executemany for the line items and the
+    COMMIT; notifications are built from data already in memory.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
     staff_uuid = uuid.UUID(body.staff_user_id)
     customer_uuid = uuid.UUID(body.customer_id)
+    hold_uuid = uuid.UUID(body.hold_id) if body.hold_id else None
 
-    svc_uuids = [uuid.UUID(s) for s in body.service_ids]
-    services = db.scalars(
-        select(Service).where(
-            Service.tenant_id == tenant_id,
-            Service.id.in_(svc_uuids),
-            Service.is_active.is_(True),
-        )
-    ).all()
-    if len(services) != len(svc_uuids):
-        raise HTTPException(status_code=400, detail="One or more services not found")
-
+    services, customer_email = _load_services_and_customer(
+        db, tenant_id, body.service_ids, customer_uuid,
+    )
     duration_min = _calc_total_duration_min(services)
     end_time = body.start_at + timedelta(minutes=duration_min)
 
-    if _overlap_exists(
+    if not _overlap_enforced_by_db(db) and _overlap_exists(
         db,
         tenant_id=tenant_id,
         branch_id=branch_id,
@@ -165,40 +701,99 @@ def create_appointment(
     ):
         raise HTTPException(status_code=400, detail="Time slot already booked")
 
-    appt = Appointment(
+    if hold_uuid:
+        _claim_hold(
+            db,
+            hold_uuid,
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            staff_user_id=staff_uuid,
+            customer_id=customer_uuid,
+            start_at=body.start_at,
+            end_at=end_time,
+        )
+
+    if _held_by_others(
+        db,
         tenant_id=tenant_id,
         branch_id=branch_id,
-        customer_id=customer_uuid,
         staff_user_id=staff_uuid,
         start_at=body.start_at,
         end_at=end_time,
-        status=AppointmentStatus.CONFIRMED,
-        notes=body.notes,
-    )
-    db.add(appt)
-    db.flush()
+        hold_id=hold_uuid,
+    ):
+        raise HTTPException(status_code=400, detail="Time slot is on hold")
 
-    for svc in services:
-        db.add(
-            AppointmentService(
+    appt_id = uuid.uuid4()
+    try:
+        appt = db.execute(
+            insert(Appointment)
+            .values(
+                id=appt_id,
                 tenant_id=tenant_id,
-                appointment_id=appt.id,
-                service_id=svc.id,
-                price_snapshot=float(svc.price),
-                duration_snapshot_min=int(svc.duration_min),
+                branch_id=branch_id,
+                customer_id=customer_uuid,
+                staff_user_id=staff_uuid,
+                start_at=body.start_at,
+                end_at=end_time,
+                status=AppointmentStatus.CONFIRMED,
+                notes=body.notes,
             )
-        )
+            .returning(
+                Appointment.id,
+                Appointment.start_at,
+                Appointment.end_at,
+                Appointment.status,
+            )
+        ).one()
 
-    db.commit()
-    db.refresh(appt)
+        if services:
+            db.execute(
+                insert(AppointmentService),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "tenant_id": tenant_id,
+                        "appointment_id": appt_id,
+                        "service_id": svc.id,
+                        "price_snapshot": float(svc.price),
+                        "duration_snapshot_min": int(svc.duration_min),
+                    }
+                    for svc in services
+                ],
+            )
 
-    # Async emails (after commit so data is persisted)
-    customer = db.scalar(
-        select(Customer).where(
-            Customer.tenant_id == tenant_id, Customer.id == customer_uuid,
+        if hold_uuid:
+            db.execute(
+                delete(SlotHold).where(
+                    SlotHold.tenant_id == tenant_id, SlotHold.id == hold_uuid,
+                )
+            )
+
+        rollup = RollupDelta()
+        rollup.add_appointment(
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            staff_user_id=staff_uuid,
+            start_at=appt.start_at,
+            status=appt.status,
+            lines=[(svc.id, svc.price) for svc in services],
         )
+        rollup.apply(db)
+
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if _is_overlap_violation(exc):
+            raise HTTPException(status_code=400, detail="Time slot already booked")
+        raise
+    _invalidate_availability(
+        tenant_id, branch_id, staff_uuid, body.start_at, appt.start_at,
     )
-    if customer and customer.email:
+    report_cache.bump([tenant_id])
+
+    # Async emails (after commit so data is persisted)
+    if customer_email:
         subject = "Booking Confirmed ✅"
         email_body = (
             "Your appointment is confirmed.\n"
@@ -206,13 +801,13 @@ def create_appointment(
             f"End: {appt.end_at}\n"
             f"Status: {appt.status}"
         )
-        send_booking_email.delay(customer.email, subject, email_body)
+        send_booking_email.delay(customer_email, subject, email_body)
 
         # 24h reminder (only if in the future)
-        reminder_time = appt.start_at - timedelta(hours=24)
+        reminder_time = wall_clock(appt.start_at).replace(tzinfo=timezone.utc) - timedelta(hours=24)
         if reminder_time > datetime.now(timezone.utc):
             send_booking_email.apply_async(
-                args=[customer.email, "Appointment Reminder ⏰", email_body],
+                args=[customer_email, "Appointment Reminder ⏰", email_body],
                 eta=reminder_time,
             )
 
@@ -227,6 +822,273 @@ def create_appointment(
     }
 
 
+@router.post("/recurring")
+def create_recurring_appointments(
+    body: AppointmentRecurringIn,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    Book ``occurrences`` appointments every ``interval_days`` days.
+
+    Services and the customer are resolved once, every occurrence is checked
+    against one range query of the staff member's bookings (and live slot
+    holds), and the free
+    occurrences are inserted in two executemany statements.  Occurrences
+    that clash are reported under ``conflicts`` and not booked.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+    staff_uuid = uuid.UUID(body.staff_user_id)
+    customer_uuid = uuid.UUID(body.customer_id)
+
+    services = _load_services(db, tenant_id, body.service_ids)
+    duration = timedelta(minutes=_calc_total_duration_min(services))
+
+    customer = db.scalar(
+        select(Customer).where(
+            Customer.tenant_id == tenant_id, Customer.id == customer_uuid,
+        )
+    )
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    first_start = wall_clock(body.start_at)
+    candidates = [
+        (first_start + timedelta(days=body.interval_days * i),
+         first_start + timedelta(days=body.interval_days * i) + duration)
+        for i in range(body.occurrences)
+    ]
+
+    existing = db.execute(
+        select(Appointment.start_at, Appointment.end_at).where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.branch_id == branch_id,
+            Appointment.staff_user_id == staff_uuid,
+            Appointment.status != AppointmentStatus.CANCELLED,
+            Appointment.start_at < candidates[-1][1],
+            Appointment.end_at > candidates[0][0],
+        )
+    ).all()
+    holds = db.execute(
+        select(SlotHold.start_at, SlotHold.end_at).where(
+            SlotHold.tenant_id == tenant_id,
+            SlotHold.branch_id == branch_id,
+            SlotHold.staff_user_id == staff_uuid,
+            SlotHold.expires_at > datetime.now(timezone.utc),
+            SlotHold.start_at < candidates[-1][1],
+            SlotHold.end_at > candidates[0][0],
+        )
+    ).all()
+    clashes = conflicting(
+        [(wall_clock(r.start_at), wall_clock(r.end_at)) for r in [*existing, *holds]],
+        candidates,
+    )
+
+    appt_rows: list[dict] = []
+    line_rows: list[dict] = []
+    conflicts: list[dict] = []
+    for (start_at, end_at), clash in zip(candidates, clashes):
+        if clash:
+            conflicts.append({
+                "start_at": start_at,
+                "end_at": end_at,
+                "detail": "Time slot already booked",
+            })
+            continue
+        appt_id = uuid.uuid4()
+        appt_rows.append({
+            "id": appt_id,
+            "tenant_id": tenant_id,
+            "branch_id": branch_id,
+            "customer_id": customer_uuid,
+            "staff_user_id": staff_uuid,
+            "start_at": start_at,
+            "end_at": end_at,
+            "status": AppointmentStatus.CONFIRMED,
+            "notes": body.notes,
+        })
+        line_rows.extend(
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": tenant_id,
+                "appointment_id": appt_id,
+                "service_id": svc.id,
+                "price_snapshot": float(svc.price),
+                "duration_snapshot_min": int(svc.duration_min),
+            }
+            for svc in services
+        )
+
+    if appt_rows:
+        try:
+            db.execute(insert(Appointment), appt_rows)
+            if line_rows:
+                db.execute(insert(AppointmentService), line_rows)
+
+            rollup = RollupDelta()
+            lines = [(svc.id, svc.price) for svc in services]
+            for r in appt_rows:
+                rollup.add_appointment(
+                    tenant_id=tenant_id,
+                    branch_id=branch_id,
+                    staff_user_id=staff_uuid,
+                    start_at=r["start_at"],
+                    status=r["status"],
+                    lines=lines,
+                )
+            rollup.apply(db)
+
+            db.commit()
+        except IntegrityError as exc:
+            db.rollback()
+            if _is_overlap_violation(exc):
+                raise HTTPException(status_code=400, detail="Time slot already booked")
+            raise
+
+        _invalidate_availability(
+            tenant_id, branch_id, staff_uuid, *(r["start_at"] for r in appt_rows),
+        )
+        report_cache.bump([tenant_id])
+
+        if customer.email:
+            email_body = "Your recurring appointments are confirmed:\n" + "\n".join(
+                f"- {r['start_at']} to {r['end_at']}" for r in appt_rows
+            )
+            send_booking_email.delay(customer.email, "Booking Confirmed ✅", email_body)
+
+            now = datetime.now(timezone.utc)
+            for r in appt_rows:
+                reminder_time = wall_clock(r["start_at"]).replace(tzinfo=timezone.utc) - timedelta(hours=24)
+                if reminder_time > now:
+                    send_booking_email.apply_async(
+                        args=[
+                            customer.email,
+                            "Appointment Reminder ⏰",
+                            f"Reminder: your appointment starts at {r['start_at']}.",
+                        ],
+                        eta=reminder_time,
+                    )
+
+    return {
+        "success": True,
+        "data": {
+            "created": [
+                {
+                    "id": str(r["id"]),
+                    "start_at": r["start_at"],
+                    "end_at": r["end_at"],
+                    "status": r["status"],
+                }
+                for r in appt_rows
+            ],
+            "conflicts": conflicts,
+        },
+    }
+
+
+@router.post("/holds")
+def create_slot_hold(
+    body: SlotHoldIn,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    Reserve a staff interval for ``ttl_sec`` seconds while the customer
+    checks out.  Held intervals are excluded from availability and from
+    other bookings; pass the returned ``id`` as ``hold_id`` when creating
+    the appointment to convert the hold.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+    staff_uuid = uuid.UUID(body.staff_user_id)
+
+    services = _load_services(db, tenant_id, body.service_ids)
+    duration_min = _calc_total_duration_min(services)
+    end_time = body.start_at + timedelta(minutes=duration_min)
+
+    if _overlap_exists(
+        db,
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_user_id=staff_uuid,
+        start_at=body.start_at,
+        end_at=end_time,
+    ):
+        raise HTTPException(status_code=400, detail="Time slot already booked")
+
+    now = datetime.now(timezone.utc)
+    # Expired holds in the way are removed so they cannot trip the constraint
+    db.execute(
+        delete(SlotHold).where(
+            SlotHold.tenant_id == tenant_id,
+            SlotHold.branch_id == branch_id,
+            SlotHold.staff_user_id == staff_uuid,
+            SlotHold.expires_at <= now,
+            SlotHold.start_at < end_time,
+            SlotHold.end_at > body.start_at,
+        )
+    )
+    if not _overlap_enforced_by_db(db) and _held_by_others(
+        db,
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_user_id=staff_uuid,
+        start_at=body.start_at,
+        end_at=end_time,
+    ):
+        raise HTTPException(status_code=400, detail="Time slot is on hold")
+
+    hold = SlotHold(
+        tenant_id=tenant_id,
+        branch_id=branch_id,
+        staff_user_id=staff_uuid,
+        customer_id=uuid.UUID(body.customer_id) if body.customer_id else None,
+        start_at=body.start_at,
+        end_at=end_time,
+        expires_at=now + timedelta(seconds=body.ttl_sec or settings.SLOT_HOLD_TTL_SEC),
+    )
+    db.add(hold)
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if SLOT_HOLD_NO_OVERLAP_CONSTRAINT in str(exc.orig):
+            raise HTTPException(status_code=400, detail="Time slot is on hold")
+        raise
+
+    return {
+        "success": True,
+        "data": {
+            "id": str(hold.id),
+            "start_at": hold.start_at,
+            "end_at": hold.end_at,
+            "expires_at": hold.expires_at,
+        },
+    }
+
+
+@router.delete("/holds/{hold_id}")
+def release_slot_hold(
+    hold_id: str,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    tenant_id = uuid.UUID(payload["tenant_id"])
+    result = db.execute(
+        delete(SlotHold).where(
+            SlotHold.tenant_id == tenant_id,
+            SlotHold.branch_id == branch_id,
+            SlotHold.id == uuid.UUID(hold_id),
+        )
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    db.commit()
+    return {"success": True}
+
+
 @router.patch("/{appointment_id}")
 def patch_appointment(
     appointment_id: str,
@@ -238,16 +1100,23 @@ def patch_appointment(
     tenant_id = uuid.UUID(payload["tenant_id"])
     appt_id = uuid.UUID(appointment_id)
 
+    # Locked so a concurrent patch cannot change the status between this
+    # read and the commit: the rollup delta below is computed from old_status
     appt = db.scalar(
-        select(Appointment).where(
+        select(Appointment)
+        .where(
             Appointment.tenant_id == tenant_id,
             Appointment.branch_id == branch_id,
             Appointment.id == appt_id,
         )
+        .with_for_update()
     )
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
+    old_start = appt.start_at
+    old_status = appt.status
+
     if body.status == AppointmentStatus.CANCELLED:
         appt.status = AppointmentStatus.CANCELLED
 
@@ -256,7 +1125,7 @@ def patch_appointment(
         duration = int((appt.end_at - appt.start_at).total_seconds() // 60)
         new_end = new_start + timedelta(minutes=duration)
 
-        if _overlap_exists(
+        if not _overlap_enforced_by_db(db) and _overlap_exists(
             db,
             tenant_id=tenant_id,
             branch_id=branch_id,
@@ -267,14 +1136,44 @@ def patch_appointment(
         ):
             raise HTTPException(status_code=400, detail="Time slot already booked")
 
+        if _held_by_others(
+            db,
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            staff_user_id=appt.staff_user_id,
+            start_at=new_start,
+            end_at=new_end,
+        ):
+            raise HTTPException(status_code=400, detail="Time slot is on hold")
+
         appt.start_at = new_start
         appt.end_at = new_end
 
     if body.notes is not None:
         appt.notes = body.notes
 
-    db.commit()
+    if (old_status, rollup_day(old_start)) != (appt.status, rollup_day(appt.start_at)):
+        lines = appointment_lines(db, appt.id)
+        rollup = RollupDelta()
+        common = dict(
+            tenant_id=tenant_id, branch_id=branch_id, staff_user_id=appt.staff_user_id, lines=lines,
+        )
+        rollup.add_appointment(start_at=old_start, status=old_status, sign=-1, **common)
+        rollup.add_appointment(start_at=appt.start_at, status=appt.status, **common)
+        rollup.apply(db)
+
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if _is_overlap_violation(exc):
+            raise HTTPException(status_code=400, detail="Time slot already booked")
+        raise
     db.refresh(appt)
+    _invalidate_availability(
+        tenant_id, branch_id, appt.staff_user_id, old_start, appt.start_at,
+    )
+    report_cache.bump([tenant_id])
 
     return {
         "success": True,
@@ -287,19 +1186,68 @@ def patch_appointment(
     }
 
 
-@router.get("")
+@router.get("", response_model=AppointmentListOut)
 def list_appointments(
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    from_at: datetime | None = Query(None, description="start_at >= from_at"),
+    to_at: datetime | None = Query(None, description="start_at < to_at"),
+    status: str | None = Query(None),
+    staff_user_id: uuid.UUID | None = Query(None),
+    customer_id: uuid.UUID | None = Query(None),
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Branch appointments, newest ``start_at`` first, keyset-paginated on
+    ``(start_at, id)``.  Pass ``next_cursor`` back as ``cursor`` for the
+    next page; it is ``null`` on the last page.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
-    q = (
-        select(Appointment)
-        .where(
-            Appointment.tenant_id == tenant_id,
-            Appointment.branch_id == branch_id,
-        )
-        .order_by(Appointment.start_at.desc())
+
+    q = select(
+        Appointment.id,
+        Appointment.customer_id,
+        Appointment.staff_user_id,
+        Appointment.start_at,
+        Appointment.end_at,
+        Appointment.status,
+        Appointment.payment_status,
+        Appointment.amount_due,
+        Appointment.currency,
+        Appointment.notes,
+    ).where(
+        Appointment.tenant_id == tenant_id,
+        Appointment.branch_id == branch_id,
     )
-    return db.scalars(q).all()
+    if staff_user_id is not None:
+        q = q.where(Appointment.staff_user_id == staff_user_id)
+    if customer_id is not None:
+        q = q.where(Appointment.customer_id == customer_id)
+    if status is not None:
+        q = q.where(Appointment.status == status)
+    if from_at is not None:
+        q = q.where(Appointment.start_at >= from_at)
+    if to_at is not None:
+        q = q.where(Appointment.start_at < to_at)
+    if cursor is not None:
+        last_start, last_id = decode_cursor(cursor)
+        q = q.where(tuple_(Appointment.start_at, Appointment.id) < (last_start, last_id))
+
+    rows = db.execute(
+        q.order_by(Appointment.start_at.desc(), Appointment.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_at, rows[-1].id)
+
+    return {
+        "success": True,
+        "data": {
+            "items": [AppointmentListItemOut(**r._mapping) for r in rows],
+            "next_cursor": next_cursor,
+        },
+    }
@@ -0,0 +1,69 @@
+"""Data export routes: appointments, appointment line items and payments as CSV / NDJSON / Parquet."""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.deps import get_optional_branch_id, get_token_payload, require_roles
+from app.db.session import SessionLocal
+from app.models.user import UserRole
+from app.services.export_service import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+
+router = APIRouter()  # prefix set by parent router
+
+MAX_EXPORT_DAYS = 366
+
+
+def _stream(dataset: str, fmt: str, **query):
+    # The request's session is closed once the route returns, so the
+    # server-side cursor gets a session of its own for the whole stream
+    with SessionLocal() as db:
+        yield from iter_export(db, dataset, fmt, **query)
+
+
+@router.get(
+    "/{dataset}",
+    dependencies=[Depends(require_roles(UserRole.OWNER, UserRole.MANAGER))],
+)
+def export_dataset(
+    dataset: str,
+    from_date: date = Query(...),
+    to_date: date = Query(..., description="inclusive"),
+    format: str = Query("csv", description="csv | ndjson | parquet"),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID | None = Depends(get_optional_branch_id),
+):
+    """
+    Stream *dataset* (``appointments``, ``appointment_services`` or
+    ``payments``) for the days ``from_date`` .. ``to_date``.  Appointments
+    and their line items are selected by ``start_at``, payments by
+    ``created_at``.  Limited to the ``X-Branch-Id`` branch when the header
+    is sent, tenant-wide otherwise.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be one of csv, ndjson, parquet")
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must be on or after from_date")
+    if (to_date - from_date).days >= MAX_EXPORT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range exceeds {MAX_EXPORT_DAYS} days")
+
+    range_start = datetime.combine(from_date, datetime.min.time())
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{dataset}_{from_date.isoformat()}_{to_date.isoformat()}.{extension}"
+    return StreamingResponse(
+        _stream(
+            dataset,
+            format,
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            range_start=range_start,
+            range_end=range_start + timedelta(days=(to_date - from_date).days + 1),
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,73 +1,53 @@
 """Payment routes: Razorpay order, webhook, verify, refund, list."""
 
+import json
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, or_, select, tuple_, update
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.deps import get_branch_id, get_db, get_token_payload, require_roles
+from app.core.pagination import decode_cursor, encode_cursor
 from app.integration.razorpay import (
     verify_razorpay_checkout_signature,
     verify_razorpay_webhook_signature,
 )
-from app.integration.razorpay_client import client
+from app.integration.razorpay_client import client, provider_stats
 from app.models.appointment import Appointment, ApptPayStatus
 from app.models.customer import Customer
 from app.models.payment import Payment, PaymentProvider, PaymentStatus
-from app.models.payment_event import PaymentEvent
+from app.models.payment_webhook_inbox import PaymentWebhookInbox
 from app.models.user import UserRole
 from app.schemas.payment import (
     CreateRazorpayOrderIn,
     CreateRazorpayOrderOut,
+    PaymentListItemOut,
+    PaymentListOut,
     RazorpayVerifyIn,
     RazorpayVerifyOut,
     RefundIn,
     RefundOut,
 )
+from app.services.payment_service import (
+    REFUND_REQUESTED,
+    STATUS_MAP,
+    record_payment_event,
+    sync_appointment_payment_status,
+    webhook_order_id,
+)
+from app.services.receipt_service import export_pool, iter_receipts_zip
+from app.services.report_cache import report_cache
+from app.workers.tasks import process_razorpay_webhooks, send_payment_receipt
 
 router = APIRouter()  # prefix set by parent router
 
-
-# ---------------------------------------------------------------------------
-# Helpers
-# ---------------------------------------------------------------------------
-_STATUS_MAP = {
-    "authorized": PaymentStatus.AUTHORIZED,
-    "captured": PaymentStatus.CAPTURED,
-    "failed": PaymentStatus.FAILED,
-    "refunded": PaymentStatus.REFUNDED,
-}
-
-_APPT_STATUS_MAP = {
-    PaymentStatus.CAPTURED: ApptPayStatus.PAID,
-    PaymentStatus.FAILED: ApptPayStatus.FAILED,
-    PaymentStatus.REFUNDED: ApptPayStatus.REFUNDED,
-}
-
-
-def _sync_appointment_payment_status(
-    db: Session,
-    tenant_id: uuid.UUID,
-    appointment_id: uuid.UUID,
-    pay_status: str,
-    *,
-    branch_id: uuid.UUID | None = None,
-) -> None:
-    """Update the appointment's payment_status to match the payment."""
-    filters = [
-        Appointment.tenant_id == tenant_id,
-        Appointment.id == appointment_id,
-    ]
-    if branch_id is not None:
-        filters.append(Appointment.branch_id == branch_id)
-
-    appt = db.scalar(select(Appointment).where(*filters))
-    if appt and pay_status in _APPT_STATUS_MAP:
-        appt.payment_status = _APPT_STATUS_MAP[pay_status]
+MAX_RECEIPT_EXPORT_DAYS = 31
+MAX_RECEIPT_EXPORT_ROWS = 20000
 
 
 # ---------------------------------------------------------------------------
@@ -80,85 +60,110 @@ def create_razorpay_order(
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Runs as two short transactions around the provider call so no pooled
+    connection is held while Razorpay responds: record a PENDING payment
+    intent, create the order, then finalize the intent with a
+    compare-and-set on its status.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
     appt_id = body.appointment_id
 
-    appt = db.scalar(
-        select(Appointment).where(
+    row = db.execute(
+        select(Appointment, Customer.full_name, Customer.email, Customer.phone)
+        .outerjoin(
+            Customer,
+            (Customer.tenant_id == Appointment.tenant_id)
+            & (Customer.id == Appointment.customer_id),
+        )
+        .where(
             Appointment.tenant_id == tenant_id,
             Appointment.branch_id == branch_id,
             Appointment.id == appt_id,
         )
-    )
-    if not appt:
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Appointment not found for this branch")
+    appt, customer_name, customer_email, customer_phone = row
 
     appt.amount_due = body.amount
     appt.currency = body.currency
     appt.payment_status = ApptPayStatus.UNPAID
 
-    order = client.order.create(
-        {
-            "amount": int(round(float(body.amount) * 100)),
-            "currency": body.currency,
-            "receipt": f"appt_{appt_id}",
-            "notes": {
-                "tenant_id": str(tenant_id),
-                "branch_id": str(branch_id),
-                "appointment_id": str(appt_id),
-            },
-        }
+    pay_id = uuid.uuid4()
+    db.add(
+        Payment(
+            id=pay_id,
+            tenant_id=tenant_id,
+            branch_id=branch_id,
+            appointment_id=appt_id,
+            customer_id=appt.customer_id,
+            status=PaymentStatus.PENDING,
+            amount=body.amount,
+            currency=body.currency,
+            provider=PaymentProvider.RAZORPAY,
+        )
     )
-    provider_order_id = order["id"]
+    db.commit()
 
-    customer = db.scalar(
-        select(Customer).where(
-            Customer.tenant_id == tenant_id, Customer.id == appt.customer_id,
+    try:
+        order = client.order.create(
+            {
+                "amount": int(round(float(body.amount) * 100)),
+                "currency": body.currency,
+                "receipt": f"appt_{appt_id}",
+                "notes": {
+                    "tenant_id": str(tenant_id),
+                    "branch_id": str(branch_id),
+                    "appointment_id": str(appt_id),
+                    "payment_id": str(pay_id),
+                },
+            }
         )
+    except Exception:
+        db.execute(
+            update(Payment)
+            .where(Payment.id == pay_id, Payment.status == PaymentStatus.PENDING)
+            .values(status=PaymentStatus.FAILED)
+        )
+        db.commit()
+        raise HTTPException(status_code=502, detail="Payment provider unavailable")
+    provider_order_id = order["id"]
+
+    finalized = db.execute(
+        update(Payment)
+        .where(Payment.id == pay_id, Payment.status == PaymentStatus.PENDING)
+        .values(provider_order_id=provider_order_id, status=PaymentStatus.CREATED)
     )
+    if finalized.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Payment was modified concurrently")
 
-    pay = Payment(
+    record_payment_event(
+        db,
         tenant_id=tenant_id,
-        branch_id=branch_id,
-        appointment_id=appt.id,
-        customer_id=appt.customer_id,
-        status=PaymentStatus.CREATED,
-        amount=body.amount,
-        currency=body.currency,
-        provider=PaymentProvider.RAZORPAY,
+        event_type="order.created",
+        provider_event_id=provider_order_id,
         provider_order_id=provider_order_id,
+        provider_payment_id=None,
+        payload=order,
     )
-    db.add(pay)
-    db.flush()
-
-    db.add(
-        PaymentEvent(
-            tenant_id=tenant_id,
-            provider=PaymentProvider.RAZORPAY,
-            event_type="order.created",
-            provider_event_id=provider_order_id,
-            provider_payment_id=None,
-            provider_order_id=provider_order_id,
-            payload=order,
-        )
-    )
-
     db.commit()
-    db.refresh(pay)
+    report_cache.bump([tenant_id])
 
     return {
         "success": True,
         "data": {
-            "payment_id": str(pay.id),
-            "provider": pay.provider,
-            "provider_order_id": pay.provider_order_id,
-            "amount": float(pay.amount),
-            "currency": pay.currency,
+            "payment_id": str(pay_id),
+            "provider": PaymentProvider.RAZORPAY,
+            "provider_order_id": provider_order_id,
+            "amount": float(body.amount),
+            "currency": body.currency,
             "razorpay_key_id": settings.RAZORPAY_KEY_ID,
             "customer": {
-                "name": customer.full_name if customer else "",
-                "email": customer.email if customer else "",
-                "phone": customer.phone if customer else "",
+                "name": customer_name or "",
+                "email": customer_email or "",
+                "phone": customer_phone or "",
             },
         },
     }
@@ -167,13 +172,25 @@ def create_razorpay_order(
 # ---------------------------------------------------------------------------
 # Razorpay: Webhook
 # ---------------------------------------------------------------------------
+async def _raw_body(request: Request) -> bytes:
+    return await request.body()
+
+
 @router.post("/razorpay/webhook")
-async def razorpay_webhook(request: Request, db: Session = Depends(get_db)):
+def razorpay_webhook(
+    request: Request,
+    raw: bytes = Depends(_raw_body),
+    db: Session = Depends(get_db),
+):
     """
-    Unauthenticated webhook receiver — verifies signature, stores the event
-    idempotently, and updates payment / appointment status.
+    Unauthenticated webhook receiver — verifies the signature and durably
+    stores the raw event with a single INSERT, then hands the order to the
+    ``process_razorpay_webhooks`` worker, which applies status changes in
+    arrival order per ``provider_order_id``.
+
+    A plain ``def`` so the commit and the broker publish run in the
+    threadpool; only the body is read on the event loop.
     """
-    raw = await request.body()
     sig = request.headers.get("X-Razorpay-Signature", "")
     if not sig:
         raise HTTPException(status_code=400, detail="Missing signature")
@@ -181,89 +198,30 @@ async def razorpay_webhook(request: Request, db: Session = Depends(get_db)):
     if not verify_razorpay_webhook_signature(raw, sig, settings.RAZORPAY_WEBHOOK_SECRET):
         raise HTTPException(status_code=400, detail="Invalid webhook signature")
 
-    payload_json = await request.json()
-    event_type = payload_json.get("event", "")
-
-    nested = payload_json.get("payload") or {}
-    payment_entity = (nested.get("payment") or {}).get("entity") or {}
-    order_entity = (nested.get("order") or {}).get("entity") or {}
-    refund_entity = (nested.get("refund") or {}).get("entity") or {}
-
-    event_id = (
-        payment_entity.get("id")
-        or order_entity.get("id")
-        or refund_entity.get("id")
-    )
-    provider_order_id = (
-        payment_entity.get("order_id")
-        or order_entity.get("id")
-        or refund_entity.get("order_id")
-        or ""
-    )
-    provider_payment_id = payment_entity.get("id") or refund_entity.get("payment_id") or ""
-    status = (
-        payment_entity.get("status")
-        or order_entity.get("status")
-        or refund_entity.get("status")
-        or ""
-    )
-
-    notes = payment_entity.get("notes") or order_entity.get("notes") or {}
-    tenant_id_str = notes.get("tenant_id")
-
-    # Resolve payment row (tenant-scoped first, fallback to global)
-    pay = None
-    if tenant_id_str and provider_order_id:
-        try:
-            pay = db.scalar(
-                select(Payment).where(
-                    Payment.tenant_id == uuid.UUID(tenant_id_str),
-                    Payment.provider_order_id == provider_order_id,
-                )
-            )
-        except Exception:
-            pass
-
-    if not pay and provider_order_id:
-        pay = db.scalar(
-            select(Payment).where(Payment.provider_order_id == provider_order_id)
-        )
-
-    if not pay:
-        return {"success": True}
-
-    # Idempotency
-    if event_id:
-        existing = db.scalar(
-            select(PaymentEvent).where(
-                PaymentEvent.tenant_id == pay.tenant_id,
-                PaymentEvent.provider_event_id == event_id,
-            )
-        )
-        if existing:
-            return {"success": True}
+    try:
+        payload_json = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
 
-    db.add(
-        PaymentEvent(
-            tenant_id=pay.tenant_id,
+    provider_order_id = webhook_order_id(payload_json)
+    db.execute(
+        insert(PaymentWebhookInbox).values(
+            id=uuid.uuid4(),
             provider=PaymentProvider.RAZORPAY,
-            event_type=event_type or "unknown",
-            provider_event_id=event_id,
-            provider_order_id=provider_order_id or None,
-            provider_payment_id=provider_payment_id or None,
+            event_type=payload_json.get("event") or "unknown",
+            provider_order_id=provider_order_id,
             payload=payload_json,
         )
     )
+    db.commit()
 
-    if status in _STATUS_MAP:
-        pay.status = _STATUS_MAP[status]
-
-    if provider_payment_id:
-        pay.provider_payment_id = provider_payment_id
-
-    _sync_appointment_payment_status(db, pay.tenant_id, pay.appointment_id, pay.status)
+    # The event is already durable; if the broker is down the periodic
+    # sweep_razorpay_webhooks task picks it up.
+    try:
+        process_razorpay_webhooks.delay(provider_order_id)
+    except Exception:
+        pass
 
-    db.commit()
     return {"success": True}
 
 
@@ -277,6 +235,11 @@ def razorpay_verify(
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Reads the payment, releases the connection for the provider fetch, then
+    applies the result only if the status is still the one observed before
+    the call (a webhook may have moved it in the meantime).
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
 
     pay = db.scalar(
@@ -303,72 +266,69 @@ def razorpay_verify(
     ):
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    rp_payment = client.payment.fetch(body.razorpay_payment_id)
+    pay_id = pay.id
+    observed_status = pay.status
+    appointment_id = pay.appointment_id
+    expected_paisa = int(Decimal(str(pay.amount)) * 100)
+    expected_currency = pay.currency
+    db.rollback()  # end the read transaction before calling the provider
+
+    try:
+        rp_payment = client.payment.fetch(body.razorpay_payment_id)
+    except Exception:
+        raise HTTPException(status_code=502, detail="Payment provider unavailable")
     rp_status = rp_payment.get("status", "")
     rp_amount_paisa = int(rp_payment.get("amount", 0))
     rp_currency = rp_payment.get("currency", "")
 
-    expected_paisa = int(Decimal(str(pay.amount)) * 100)
-    if rp_currency != pay.currency:
+    if rp_currency != expected_currency:
         raise HTTPException(status_code=400, detail="Currency mismatch")
     if rp_amount_paisa != expected_paisa:
         raise HTTPException(status_code=400, detail="Amount mismatch")
 
-    pay.provider_payment_id = body.razorpay_payment_id
-    pay.status = _STATUS_MAP.get(rp_status, PaymentStatus.FAILED)
-
-    _sync_appointment_payment_status(
-        db, tenant_id, pay.appointment_id, pay.status, branch_id=branch_id,
+    new_status = STATUS_MAP.get(rp_status, PaymentStatus.FAILED)
+    applied = db.execute(
+        update(Payment)
+        .where(Payment.id == pay_id, Payment.status == observed_status)
+        .values(provider_payment_id=body.razorpay_payment_id, status=new_status)
     )
-
-    db.add(
-        PaymentEvent(
-            tenant_id=tenant_id,
-            provider=PaymentProvider.RAZORPAY,
-            event_type="checkout.verified",
-            provider_event_id=body.razorpay_payment_id,
-            provider_order_id=body.razorpay_order_id,
-            provider_payment_id=body.razorpay_payment_id,
-            payload={"razorpay_payment": rp_payment},
-        )
+    if applied.rowcount != 1:
+        # Someone else (usually the webhook worker) got there first
+        current = db.scalar(select(Payment.status).where(Payment.id == pay_id))
+        db.rollback()
+        return {"success": True, "payment_status": current}
+
+    sync_appointment_payment_status(
+        db, tenant_id, appointment_id, new_status, branch_id=branch_id,
+    )
+    record_payment_event(
+        db,
+        tenant_id=tenant_id,
+        event_type="checkout.verified",
+        provider_event_id=body.razorpay_payment_id,
+        provider_order_id=body.razorpay_order_id,
+        provider_payment_id=body.razorpay_payment_id,
+        payload={"razorpay_payment": rp_payment},
     )
 
-    # Receipt + email (idempotent)
-    if pay.status == PaymentStatus.CAPTURED and pay.receipt_sent_at is None:
-        appt = db.scalar(
-            select(Appointment).where(
-                Appointment.tenant_id == tenant_id,
-                Appointment.id == pay.appointment_id,
-            )
-        )
-        customer = None
-        if appt:
-            customer = db.scalar(
-                select(Customer).where(
-                    Customer.tenant_id == tenant_id, Customer.id == appt.customer_id,
-                )
-            )
-
-        from app.services.receipt_service import generate_receipt_pdf
-        from app.workers.tasks import send_email
-
-        pdf_bytes = generate_receipt_pdf(
-            receipt_no=str(pay.id),
-            customer_name=customer.full_name if customer else "Customer",
-            amount=float(pay.amount),
-            currency=pay.currency,
+    # Receipt + email (idempotent): claim receipt_sent_at in this transaction,
+    # the worker renders and mails the PDF
+    send_receipt = False
+    if new_status == PaymentStatus.CAPTURED:
+        claimed = db.execute(
+            update(Payment)
+            .where(Payment.id == pay_id, Payment.receipt_sent_at.is_(None))
+            .values(receipt_sent_at=datetime.now(timezone.utc))
         )
-        send_email.delay(
-            to_email=(customer.email if customer and customer.email else "fallback@email.com"),
-            subject="Payment Receipt",
-            body="Your payment was successful. Receipt attached.",
-            attachment_bytes=pdf_bytes,
-            attachment_name=f"receipt_{pay.id}.pdf",
-        )
-        pay.receipt_sent_at = datetime.now(timezone.utc)
+        send_receipt = claimed.rowcount == 1
 
     db.commit()
-    return {"success": True, "payment_status": pay.status}
+    report_cache.bump([tenant_id])
+
+    if send_receipt:
+        send_payment_receipt.delay(str(pay_id))
+
+    return {"success": True, "payment_status": new_status}
 
 
 # ---------------------------------------------------------------------------
@@ -385,6 +345,13 @@ def razorpay_refund(
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Claims the payment with a ``requested`` refund intent, calls Razorpay
+    without holding a connection, then finalizes the intent with a
+    compare-and-set.  A failed provider call releases the claim; a claim
+    left behind by a dead process can be retaken once it is older than
+    ``RAZORPAY_REFUND_CLAIM_TIMEOUT_SEC``.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
 
     pay = db.scalar(
@@ -411,51 +378,257 @@ def razorpay_refund(
             raise HTTPException(status_code=400, detail="Refund amount must be > 0")
         refund_payload["amount"] = int(round(float(body.amount) * 100))
 
-    refund = client.payment.refund(pay.provider_payment_id, refund_payload)
+    pay_id = pay.id
+    appointment_id = pay.appointment_id
+    provider_order_id = pay.provider_order_id
+    provider_payment_id = pay.provider_payment_id
+    previous_refund_status = pay.refund_status
+
+    if previous_refund_status == REFUND_REQUESTED:
+        previous_refund_status = None
+
+    claimed_at = datetime.now(timezone.utc)
+    stale_before = claimed_at - timedelta(seconds=settings.RAZORPAY_REFUND_CLAIM_TIMEOUT_SEC)
+    claimed = db.execute(
+        update(Payment)
+        .where(
+            Payment.id == pay_id,
+            Payment.status == PaymentStatus.CAPTURED,
+            or_(
+                Payment.refund_status.is_distinct_from(REFUND_REQUESTED),
+                Payment.refund_requested_at.is_(None),
+                Payment.refund_requested_at < stale_before,
+            ),
+        )
+        .values(refund_status=REFUND_REQUESTED, refund_requested_at=claimed_at)
+    )
+    if claimed.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Refund already in progress")
+    db.commit()
 
-    pay.refund_id = refund.get("id")
-    pay.refund_status = refund.get("status")
+    # Only the holder of this claim may finalize or release it
+    our_claim = (
+        Payment.id == pay_id,
+        Payment.refund_status == REFUND_REQUESTED,
+        Payment.refund_requested_at == claimed_at,
+    )
 
-    if pay.refund_status == "processed":
-        pay.status = PaymentStatus.REFUNDED
-        _sync_appointment_payment_status(
-            db, tenant_id, pay.appointment_id, pay.status, branch_id=branch_id,
+    try:
+        refund = client.payment.refund(provider_payment_id, refund_payload)
+    except Exception:
+        db.execute(
+            update(Payment)
+            .where(*our_claim)
+            .values(refund_status=previous_refund_status, refund_requested_at=None)
         )
-
-    db.add(
-        PaymentEvent(
+        db.commit()
+        raise HTTPException(status_code=502, detail="Payment provider unavailable")
+
+    refund_status = refund.get("status")
+    values = {
+        "refund_id": refund.get("id"),
+        "refund_status": refund_status,
+        "refund_requested_at": None,
+    }
+    if refund_status == "processed":
+        values["status"] = PaymentStatus.REFUNDED
+
+    finalized = db.execute(update(Payment).where(*our_claim).values(**values))
+    if finalized.rowcount != 1:
+        # Our claim went stale and another request retook it.  The refund
+        # still happened at Razorpay, so keep its id and event, but leave
+        # the payment and appointment to the current claim holder.
+        db.execute(
+            update(Payment)
+            .where(Payment.id == pay_id, Payment.refund_id.is_(None))
+            .values(refund_id=refund.get("id"))
+        )
+        record_payment_event(
+            db,
             tenant_id=tenant_id,
-            provider=PaymentProvider.RAZORPAY,
             event_type="refund.created",
             provider_event_id=refund.get("id"),
-            provider_order_id=pay.provider_order_id,
-            provider_payment_id=pay.provider_payment_id,
+            provider_order_id=provider_order_id,
+            provider_payment_id=provider_payment_id,
             payload=refund,
         )
-    )
+        db.commit()
+        raise HTTPException(
+            status_code=409,
+            detail="Refund claim was taken over by another request; "
+            f"provider refund {refund.get('id')} was recorded",
+        )
 
+    pay_status = db.scalar(select(Payment.status).where(Payment.id == pay_id))
+    sync_appointment_payment_status(
+        db, tenant_id, appointment_id, pay_status, branch_id=branch_id,
+    )
+    record_payment_event(
+        db,
+        tenant_id=tenant_id,
+        event_type="refund.created",
+        provider_event_id=refund.get("id"),
+        provider_order_id=provider_order_id,
+        provider_payment_id=provider_payment_id,
+        payload=refund,
+    )
     db.commit()
+    report_cache.bump([tenant_id])
+
     return {
         "success": True,
         "refund": refund,
-        "payment_status": pay.status,
-        "refund_status": pay.refund_status,
+        "payment_status": pay_status,
+        "refund_status": refund_status,
     }
 
 
 # ---------------------------------------------------------------------------
 # List payments
 # ---------------------------------------------------------------------------
-@router.get("")
+@router.get("", response_model=PaymentListOut)
 def list_payments(
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    from_at: datetime | None = Query(None, description="created_at >= from_at"),
+    to_at: datetime | None = Query(None, description="created_at < to_at"),
+    status: str | None = Query(None),
+    customer_id: uuid.UUID | None = Query(None),
+    appointment_id: uuid.UUID | None = Query(None),
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
     branch_id: uuid.UUID = Depends(get_branch_id),
 ):
+    """
+    Branch payments, newest first, keyset-paginated on ``(created_at, id)``
+    using ``ix_payments_tenant_branch_created``.  Pass ``next_cursor`` back
+    as ``cursor`` for the next page; it is ``null`` on the last page.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
-    q = (
-        select(Payment)
-        .where(Payment.tenant_id == tenant_id, Payment.branch_id == branch_id)
-        .order_by(Payment.created_at.desc())
+
+    q = select(
+        Payment.id,
+        Payment.appointment_id,
+        Payment.customer_id,
+        Payment.amount,
+        Payment.currency,
+        Payment.status,
+        Payment.refund_status,
+        Payment.created_at,
+    ).where(
+        Payment.tenant_id == tenant_id,
+        Payment.branch_id == branch_id,
     )
-    return db.scalars(q).all()
+    if status is not None:
+        q = q.where(Payment.status == status)
+    if customer_id is not None:
+        q = q.where(Payment.customer_id == customer_id)
+    if appointment_id is not None:
+        q = q.where(Payment.appointment_id == appointment_id)
+    if from_at is not None:
+        q = q.where(Payment.created_at >= from_at)
+    if to_at is not None:
+        q = q.where(Payment.created_at < to_at)
+    if cursor is not None:
+        last_created, last_id = decode_cursor(cursor)
+        q = q.where(tuple_(Payment.created_at, Payment.id) < (last_created, last_id))
+
+    rows = db.execute(
+        q.order_by(Payment.created_at.desc(), Payment.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "success": True,
+        "data": {
+            "items": [PaymentListItemOut(**r._mapping) for r in rows],
+            "next_cursor": next_cursor,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Bulk receipt export
+# ---------------------------------------------------------------------------
+@router.get(
+    "/receipts/export",
+    dependencies=[Depends(require_roles(UserRole.OWNER, UserRole.MANAGER))],
+)
+def export_receipts(
+    from_day: str = Query(..., description="YYYY-MM-DD"),
+    to_day: str = Query(..., description="YYYY-MM-DD (inclusive)"),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID = Depends(get_branch_id),
+):
+    """
+    ZIP of the PDF receipts of every captured (or since refunded) payment
+    created in the branch between *from_day* and *to_day*.  Receipts are
+    rendered in a process pool and streamed as the archive is built.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+
+    try:
+        first_day = datetime.fromisoformat(from_day).date()
+        last_day = datetime.fromisoformat(to_day).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid day format. Use YYYY-MM-DD")
+
+    n_days = (last_day - first_day).days + 1
+    if n_days < 1:
+        raise HTTPException(status_code=400, detail="to_day must not be before from_day")
+    if n_days > MAX_RECEIPT_EXPORT_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range exceeds {MAX_RECEIPT_EXPORT_DAYS} days",
+        )
+
+    range_start = datetime.combine(first_day, datetime.min.time())
+    rows = db.execute(
+        select(Payment.id, Customer.full_name, Payment.amount, Payment.currency)
+        .outerjoin(
+            Customer,
+            (Customer.tenant_id == Payment.tenant_id) & (Customer.id == Payment.customer_id),
+        )
+        .where(
+            Payment.tenant_id == tenant_id,
+            Payment.branch_id == branch_id,
+            Payment.status.in_([PaymentStatus.CAPTURED, PaymentStatus.REFUNDED]),
+            Payment.created_at >= range_start,
+            Payment.created_at < range_start + timedelta(days=n_days),
+        )
+        .order_by(Payment.created_at)
+        .limit(MAX_RECEIPT_EXPORT_ROWS + 1)
+    ).all()
+    if len(rows) > MAX_RECEIPT_EXPORT_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {MAX_RECEIPT_EXPORT_ROWS} receipts; narrow the date range",
+        )
+
+    receipts = [
+        (str(pay_id), name or "Customer", float(amount), currency)
+        for pay_id, name, amount, currency in rows
+    ]
+    filename = f"receipts_{first_day.isoformat()}_{last_day.isoformat()}.zip"
+    return StreamingResponse(
+        iter_receipts_zip(receipts, executor=export_pool()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Provider client stats
+# ---------------------------------------------------------------------------
+@router.get(
+    "/provider-stats",
+    dependencies=[Depends(require_roles(UserRole.OWNER, UserRole.MANAGER))],
+)
+def payment_provider_stats():
+    """Circuit state plus per-endpoint latency / error counters of this process."""
+    return {"success": True, "data": provider_stats()}
@@ -1,135 +1,442 @@
-"""Reporting routes: revenue, top services, staff performance, cancellation rate."""
+"""
+Reporting routes: revenue, revenue series, top services, staff performance,
+cancellation rate, and a dashboard summary combining them.
 
+All reports read the daily rollup tables (``app.models.report_rollup``), so
+their cost depends on the number of days / services / staff, not on the
+size of the appointment history.
+
+Responses are cached per tenant and query (``app.services.report_cache``)
+and carry an ETag; a matching ``If-None-Match`` gets ``304 Not Modified``.
+"""
+
+import json
 import uuid
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Callable
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import Date, cast, literal, null, select, func, type_coerce, union_all
 
-from app.core.deps import get_db, get_token_payload
-from app.models.appointment import Appointment, AppointmentStatus
-from app.models.appointment_service import AppointmentService
+from app.core.deps import get_db, get_optional_branch_id, get_token_payload, require_roles
+from app.models.report_rollup import ReportDailyBranch, ReportDailyService, ReportDailyStaff
+from app.models.user import UserRole
+from app.services.report_cache import report_cache
+from app.services.report_rollups import rollup_day
 
 router = APIRouter()  # prefix set by parent router
 
+SERIES_BUCKETS = ("day", "week", "month")
+# group_by -> (rollup table, breakdown column)
+SERIES_GROUPS = {
+    "branch": (ReportDailyBranch, ReportDailyBranch.branch_id),
+    "staff": (ReportDailyStaff, ReportDailyStaff.staff_user_id),
+    "service": (ReportDailyService, ReportDailyService.service_id),
+}
+MAX_SERIES_BUCKETS = 400
+MAX_SUMMARY_DAYS = 366
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _cached_report(
+    request: Request,
+    tenant_id: uuid.UUID,
+    name: str,
+    params: dict,
+    compute: Callable[[], dict],
+) -> Response:
+    """Serve a report from the cache, running *compute* only on a miss."""
+    def render() -> bytes:
+        return json.dumps(compute(), separators=(",", ":")).encode()
+
+    key = report_cache.key(tenant_id, name, params)
+    if key is None:
+        return Response(render(), media_type="application/json")
+
+    etag = report_cache.etag(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        report_cache.get_or_compute(key, render), media_type="application/json", headers=headers,
+    )
+
 
 @router.get("/revenue")
 def revenue_report(
+    request: Request,
     from_date: str = Query(...),
     to_date: str = Query(...),
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
 ):
+    """Confirmed revenue for the (inclusive) days from ``from_date`` to ``to_date``."""
     tenant_id = uuid.UUID(payload["tenant_id"])
-    start = datetime.fromisoformat(from_date)
-    end = datetime.fromisoformat(to_date)
-
-    total = db.scalar(
-        select(func.sum(AppointmentService.price_snapshot))
-        .join(Appointment, Appointment.id == AppointmentService.appointment_id)
-        .where(
-            Appointment.tenant_id == tenant_id,
-            Appointment.status == AppointmentStatus.CONFIRMED,
-            Appointment.start_at >= start,
-            Appointment.start_at <= end,
-        )
-    ) or 0
+    first_day = rollup_day(datetime.fromisoformat(from_date))
+    last_day = rollup_day(datetime.fromisoformat(to_date))
+
+    def compute() -> dict:
+        total = db.scalar(
+            select(func.sum(ReportDailyBranch.revenue)).where(
+                ReportDailyBranch.tenant_id == tenant_id,
+                ReportDailyBranch.day >= first_day,
+                ReportDailyBranch.day <= last_day,
+            )
+        ) or 0
+
+        return {
+            "success": True,
+            "data": {
+                "from": from_date,
+                "to": to_date,
+                "total_revenue": float(total),
+            },
+        }
+
+    # The echoed from/to strings are part of the body, so they are part of the key
+    return _cached_report(
+        request, tenant_id, "revenue", {"from": from_date, "to": to_date}, compute,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Revenue series
+# ---------------------------------------------------------------------------
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _bucket_expr(db: Session, day, bucket: str):
+    """First day of the (Monday-based) week / month containing *day*."""
+    if bucket == "day":
+        return day
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc(bucket, day), Date)
+    # SQLite (local dev)
+    if bucket == "week":
+        return func.date(day, "-6 days", "weekday 1", type_=Date)
+    return func.date(day, "start of month", type_=Date)
+
+
+@router.get("/revenue/series")
+def revenue_series(
+    request: Request,
+    from_date: date = Query(...),
+    to_date: date = Query(...),
+    bucket: str = Query("day", description="day | week | month"),
+    group_by: str | None = Query(None, description="branch | staff | service"),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+):
+    """
+    Confirmed revenue of the (inclusive) days ``from_date`` .. ``to_date``
+    in day / week / month buckets, optionally broken down by branch, staff
+    member or service, from one GROUP BY over the daily rollups.  Every
+    bucket is present (zero-filled); the first and last buckets only cover
+    the part inside the range.
+    """
+    tenant_id = uuid.UUID(payload["tenant_id"])
+    if bucket not in SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail="bucket must be one of day, week, month")
+    if group_by is not None and group_by not in SERIES_GROUPS:
+        raise HTTPException(status_code=400, detail="group_by must be one of branch, staff, service")
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must be on or after from_date")
+
+    buckets = []
+    start = _bucket_start(from_date, bucket)
+    while start <= to_date:
+        buckets.append(start)
+        start = _next_bucket(start, bucket)
+    if len(buckets) > MAX_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_BUCKETS} buckets per series")
+
+    def compute() -> dict:
+        model, key_col = SERIES_GROUPS.get(group_by, (ReportDailyBranch, None))
+        bucket_col = _bucket_expr(db, model.day, bucket).label("bucket")
+        group_cols = [bucket_col] if key_col is None else [bucket_col, key_col]
+
+        rows = db.execute(
+            select(*group_cols, func.sum(model.revenue).label("revenue"))
+            .where(
+                model.tenant_id == tenant_id,
+                model.day >= from_date,
+                model.day <= to_date,
+            )
+            .group_by(*group_cols)
+        ).all()
+
+        index = {b: i for i, b in enumerate(buckets)}
+        series: dict = {} if key_col is not None else {None: [0.0] * len(buckets)}
+        for row in rows:
+            key = row[1] if key_col is not None else None
+            values = series.setdefault(key, [0.0] * len(buckets))
+            values[index[row.bucket]] += float(row.revenue or 0)
 
-    return {
-        "success": True,
-        "data": {
-            "from": from_date,
-            "to": to_date,
-            "total_revenue": float(total),
-        },
-    }
+        items = [
+            {
+                "key": str(key) if key is not None else None,
+                "total": round(sum(values), 2),
+                "values": [round(v, 2) for v in values],
+            }
+            for key, values in series.items()
+        ]
+        items.sort(key=lambda item: item["total"], reverse=True)
+
+        return {
+            "success": True,
+            "data": {
+                "from": from_date.isoformat(),
+                "to": to_date.isoformat(),
+                "bucket": bucket,
+                "group_by": group_by,
+                "buckets": [b.isoformat() for b in buckets],
+                "series": items,
+            },
+        }
+
+    return _cached_report(
+        request,
+        tenant_id,
+        "revenue_series",
+        {"from": from_date, "to": to_date, "bucket": bucket, "group_by": group_by},
+        compute,
+    )
 
 
 @router.get("/services/top")
 def top_services(
+    request: Request,
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
 ):
     tenant_id = uuid.UUID(payload["tenant_id"])
 
-    rows = db.execute(
-        select(
-            AppointmentService.service_id,
-            func.count(AppointmentService.id).label("count"),
-        )
-        .join(Appointment, Appointment.id == AppointmentService.appointment_id)
-        .where(
-            Appointment.tenant_id == tenant_id,
-            Appointment.status == AppointmentStatus.CONFIRMED,
-        )
-        .group_by(AppointmentService.service_id)
-        .order_by(func.count(AppointmentService.id).desc())
-    ).all()
+    def compute() -> dict:
+        bookings = func.sum(ReportDailyService.bookings)
+        rows = db.execute(
+            select(ReportDailyService.service_id, bookings.label("count"))
+            .where(ReportDailyService.tenant_id == tenant_id)
+            .group_by(ReportDailyService.service_id)
+            .having(bookings > 0)
+            .order_by(bookings.desc())
+        ).all()
 
-    return {
-        "success": True,
-        "data": [
-            {"service_id": str(r.service_id), "bookings": r.count}
-            for r in rows
-        ],
-    }
+        return {
+            "success": True,
+            "data": [
+                {"service_id": str(r.service_id), "bookings": int(r.count)}
+                for r in rows
+            ],
+        }
+
+    return _cached_report(request, tenant_id, "services_top", {}, compute)
 
 
 @router.get("/staff/performance")
 def staff_performance(
+    request: Request,
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
 ):
     tenant_id = uuid.UUID(payload["tenant_id"])
 
-    rows = db.execute(
-        select(
-            Appointment.staff_user_id,
-            func.count(Appointment.id).label("appointments"),
-        )
-        .where(
-            Appointment.tenant_id == tenant_id,
-            Appointment.status == AppointmentStatus.CONFIRMED,
-        )
-        .group_by(Appointment.staff_user_id)
-        .order_by(func.count(Appointment.id).desc())
-    ).all()
+    def compute() -> dict:
+        appointments = func.sum(ReportDailyStaff.appointments)
+        rows = db.execute(
+            select(ReportDailyStaff.staff_user_id, appointments.label("appointments"))
+            .where(ReportDailyStaff.tenant_id == tenant_id)
+            .group_by(ReportDailyStaff.staff_user_id)
+            .having(appointments > 0)
+            .order_by(appointments.desc())
+        ).all()
 
-    return {
-        "success": True,
-        "data": [
-            {"staff_user_id": str(r.staff_user_id), "appointments": r.appointments}
-            for r in rows
-        ],
-    }
+        return {
+            "success": True,
+            "data": [
+                {"staff_user_id": str(r.staff_user_id), "appointments": int(r.appointments)}
+                for r in rows
+            ],
+        }
+
+    return _cached_report(request, tenant_id, "staff_performance", {}, compute)
 
 
 @router.get("/cancellation-rate")
 def cancellation_rate(
+    request: Request,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+):
+    tenant_id = uuid.UUID(payload["tenant_id"])
+
+    def compute() -> dict:
+        row = db.execute(
+            select(
+                func.coalesce(func.sum(ReportDailyBranch.appointments), 0).label("total"),
+                func.coalesce(func.sum(ReportDailyBranch.cancelled), 0).label("cancelled"),
+            ).where(ReportDailyBranch.tenant_id == tenant_id)
+        ).one()
+        total, cancelled = int(row.total), int(row.cancelled)
+
+        rate = (cancelled / total * 100) if total > 0 else 0.0
+
+        return {
+            "success": True,
+            "data": {
+                "total": total,
+                "cancelled": cancelled,
+                "cancellation_rate_percent": round(rate, 2),
+            },
+        }
+
+    return _cached_report(request, tenant_id, "cancellation_rate", {}, compute)
+
+
+# ---------------------------------------------------------------------------
+# Dashboard summary
+# ---------------------------------------------------------------------------
+@router.get("/summary")
+def dashboard_summary(
+    request: Request,
+    from_date: date = Query(...),
+    to_date: date = Query(...),
+    top: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
     payload: dict = Depends(get_token_payload),
+    branch_id: uuid.UUID | None = Depends(get_optional_branch_id),
 ):
+    """
+    Revenue, appointment / cancellation counts, top services and staff
+    performance of the (inclusive) days ``from_date`` .. ``to_date`` in one
+    round trip: a UNION ALL of one aggregate per rollup table.  Limited to
+    the ``X-Branch-Id`` branch when the header is sent, tenant-wide otherwise.
+    """
     tenant_id = uuid.UUID(payload["tenant_id"])
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="to_date must be on or after from_date")
+    if (to_date - from_date).days >= MAX_SUMMARY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {MAX_SUMMARY_DAYS} days")
 
-    total = db.scalar(
-        select(func.count(Appointment.id)).where(Appointment.tenant_id == tenant_id)
-    ) or 0
+    def window(model):
+        conds = [model.tenant_id == tenant_id, model.day >= from_date, model.day <= to_date]
+        if branch_id is not None:
+            conds.append(model.branch_id == branch_id)
+        return conds
+
+    def compute() -> dict:
+        # Every leg yields (kind, key, n1, n2, n3, revenue)
+        totals = select(
+            literal("total").label("kind"),
+            type_coerce(null(), ReportDailyService.service_id.type).label("key"),
+            func.coalesce(func.sum(ReportDailyBranch.appointments), 0).label("n1"),
+            func.coalesce(func.sum(ReportDailyBranch.confirmed), 0).label("n2"),
+            func.coalesce(func.sum(ReportDailyBranch.cancelled), 0).label("n3"),
+            func.coalesce(func.sum(ReportDailyBranch.revenue), 0).label("revenue"),
+        ).where(*window(ReportDailyBranch))
+
+        bookings = func.sum(ReportDailyService.bookings)
+        services = (
+            select(
+                literal("service").label("kind"),
+                ReportDailyService.service_id.label("key"),
+                bookings.label("n1"),
+                literal(0).label("n2"),
+                literal(0).label("n3"),
+                func.sum(ReportDailyService.revenue).label("revenue"),
+            )
+            .where(*window(ReportDailyService))
+            .group_by(ReportDailyService.service_id)
+            .having(bookings > 0)
+            .order_by(bookings.desc())
+            .limit(top)
+            .subquery()
+        )
 
-    cancelled = db.scalar(
-        select(func.count(Appointment.id)).where(
-            Appointment.tenant_id == tenant_id,
-            Appointment.status == AppointmentStatus.CANCELLED,
+        appointments = func.sum(ReportDailyStaff.appointments)
+        staff = (
+            select(
+                literal("staff").label("kind"),
+                ReportDailyStaff.staff_user_id.label("key"),
+                appointments.label("n1"),
+                literal(0).label("n2"),
+                literal(0).label("n3"),
+                func.sum(ReportDailyStaff.revenue).label("revenue"),
+            )
+            .where(*window(ReportDailyStaff))
+            .group_by(ReportDailyStaff.staff_user_id)
+            .having(appointments > 0)
+            .order_by(appointments.desc())
+            .limit(top)
+            .subquery()
         )
-    ) or 0
-
-    rate = (cancelled / total * 100) if total > 0 else 0.0
-
-    return {
-        "success": True,
-        "data": {
-            "total": total,
-            "cancelled": cancelled,
-            "cancellation_rate_percent": round(rate, 2),
-        },
-    }
+
+        rows = db.execute(
+            union_all(totals, select(services), select(staff))
+        ).all()
+
+        total = next(r for r in rows if r.kind == "total")
+        appointments_n, confirmed_n, cancelled_n = int(total.n1), int(total.n2), int(total.n3)
+        rate = (cancelled_n / appointments_n * 100) if appointments_n > 0 else 0.0
+
+        def ranked(kind: str) -> list:
+            return sorted((r for r in rows if r.kind == kind), key=lambda r: r.n1, reverse=True)
+
+        return {
+            "success": True,
+            "data": {
+                "from": from_date.isoformat(),
+                "to": to_date.isoformat(),
+                "branch_id": str(branch_id) if branch_id else None,
+                "total_revenue": float(total.revenue),
+                "appointments": appointments_n,
+                "confirmed": confirmed_n,
+                "cancelled": cancelled_n,
+                "cancellation_rate_percent": round(rate, 2),
+                "top_services": [
+                    {"service_id": str(r.key), "bookings": int(r.n1), "revenue": float(r.revenue)}
+                    for r in ranked("service")
+                ],
+                "staff_performance": [
+                    {"staff_user_id": str(r.key), "appointments": int(r.n1), "revenue": float(r.revenue)}
+                    for r in ranked("staff")
+                ],
+            },
+        }
+
+    return _cached_report(
+        request,
+        tenant_id,
+        "summary",
+        {"from": from_date, "to": to_date, "top": top, "branch_id": branch_id},
+        compute,
+    )
+
+
+@router.get(
+    "/cache-stats",
+    dependencies=[Depends(require_roles(UserRole.OWNER, UserRole.MANAGER))],
+)
+def report_cache_stats():
+    """Hit / miss counters of this worker's report cache."""
+    return {"success": True, "data": report_cache.stats()}
@@ -4,7 +4,7 @@ from fastapi import APIRouter
 
 from app.api.v1 import (
     auth, branches, services, customers,
-    appointment, staff, payments, reports,
+    appointment, staff, payments, reports, exports,
 )
 from app.ai_models.router import router as ai_router
 
@@ -18,4 +18,5 @@ api_router.include_router(appointment.router,  prefix="/appointments", tags=["ap
 api_router.include_router(staff.router,        prefix="/staff",        tags=["staff"])
 api_router.include_router(payments.router,     prefix="/payments",     tags=["payments"])
 api_router.include_router(reports.router,      prefix="/reports",      tags=["reports"])
+api_router.include_router(exports.router,      prefix="/exports",      tags=["exports"])
 api_router.include_router(ai_router,           prefix="/ai",           tags=["ai"])
\ No newline at end of file
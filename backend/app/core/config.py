@@ -79,6 +79,58 @@ class Settings(BaseSettings):
     RAZORPAY_KEY_ID: str = ""
     RAZORPAY_KEY_SECRET: str = ""
     RAZORPAY_WEBHOOK_SECRET: str = ""
+    # Keep-alive pool; size it to the API threadpool / Celery concurrency
+    RAZORPAY_POOL_MAXSIZE: int = 20
+    RAZORPAY_CONNECT_TIMEOUT_SEC: float = 3.0
+    RAZORPAY_READ_TIMEOUT_SEC: float = 10.0
+    RAZORPAY_MAX_RETRIES: int = 2
+    RAZORPAY_RETRY_BACKOFF_SEC: float = 0.2
+    RAZORPAY_BREAKER_FAILURES: int = 5
+    RAZORPAY_BREAKER_RESET_SEC: float = 30.0
+    # A refund claim older than this is treated as abandoned and can be retaken
+    RAZORPAY_REFUND_CLAIM_TIMEOUT_SEC: int = 300
+    # A PENDING payment intent older than this never got its order; it is failed
+    RAZORPAY_PENDING_INTENT_TIMEOUT_SEC: int = 900
+    # Inbox events failing this many times are left to an operator
+    RAZORPAY_WEBHOOK_MAX_ATTEMPTS: int = 20
+
+    AVAILABILITY_CACHE_MAX_ENTRIES: int = 4096
+    AVAILABILITY_CACHE_LOCAL_TTL_SEC: float = 10.0
+    AVAILABILITY_CACHE_REDIS_TTL_SEC: int = 300
+    # Cache versions live in Redis: false disables the availability cache
+    AVAILABILITY_CACHE_USE_REDIS: bool = True
+
+    SLOT_HOLD_TTL_SEC: int = 300
+
+    # /reports/* response cache (see app/services/report_cache.py)
+    REPORT_CACHE_TTL_SEC: int = 600
+    REPORT_CACHE_MAX_ENTRIES: int = 1024
+    REPORT_CACHE_LOCK_TIMEOUT_SEC: float = 10.0
+    # Cache versions live in Redis: false disables the report cache
+    REPORT_CACHE_USE_REDIS: bool = True
+
+    # Process pool size for bulk receipt export (0 = render in-process),
+    # created once at API startup
+    RECEIPT_EXPORT_WORKERS: int = 2
+    # TrueType fonts embedded in receipts with non-WinAnsi text: the first
+    # is required, the others (Indic scripts) cover what it lacks and are
+    # skipped when not installed.  Comma-separated or JSON list.
+    RECEIPT_UNICODE_FONTS: str = ",".join([
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        *(
+            f"/usr/share/fonts/truetype/noto/NotoSans{script}-Regular.ttf"
+            for script in (
+                "Devanagari", "Bengali", "Gujarati", "Gurmukhi", "Kannada",
+                "Malayalam", "Oriya", "Tamil", "Telugu",
+            )
+        ),
+    ])
+
+    # payment_events partitions / retention (see app/services/payment_event_storage.py)
+    PAYMENT_EVENT_PARTITIONS_AHEAD: int = 3
+    PAYMENT_EVENT_COMPACT_AFTER_DAYS: int = 90
+    PAYMENT_EVENT_ARCHIVE_AFTER_MONTHS: int = 24
+    PAYMENT_EVENT_ARCHIVE_DIR: str = "archive/payment_events"
 
     # ----------------------------
     # Helper computed property
@@ -87,5 +139,9 @@ class Settings(BaseSettings):
     def cors_origins(self) -> List[str]:
         return parse_cors_list(self.CORS_ALLOWED_ORIGINS)
 
+    @property
+    def receipt_unicode_fonts(self) -> List[str]:
+        return parse_cors_list(self.RECEIPT_UNICODE_FONTS)
+
 
 settings = Settings()
\ No newline at end of file
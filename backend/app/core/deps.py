@@ -72,3 +72,14 @@ def get_branch_id(
         raise HTTPException(status_code=403, detail="Branch not found for tenant")
 
     return branch_id
+
+
+def get_optional_branch_id(
+    x_branch_id: str | None = Header(None, alias="X-Branch-Id"),
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_token_payload),
+) -> uuid.UUID | None:
+    """Like ``get_branch_id`` for tenant-wide routes: ``None`` without the header."""
+    if x_branch_id is None:
+        return None
+    return get_branch_id(x_branch_id=x_branch_id, db=db, payload=payload)
@@ -0,0 +1,27 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the ``(timestamp, id)`` sort key of the last row of a page,
+base64-encoded so clients treat it as opaque.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode_cursor(ts: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{ts.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Return the ``(timestamp, id)`` key encoded in *cursor*."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), uuid.UUID(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
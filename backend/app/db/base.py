@@ -16,3 +16,7 @@ from app.models.appointment import Appointment  # noqa: F401
 from app.models.appointment_service import AppointmentService  # noqa: F401
 from app.models.payment import Payment  # noqa: F401
 from app.models.payment_event import PaymentEvent  # noqa: F401
+from app.models.payment_event_key import PaymentEventKey  # noqa: F401
+from app.models.slot_hold import SlotHold  # noqa: F401
+from app.models.payment_webhook_inbox import PaymentWebhookInbox  # noqa: F401
+from app.models.report_rollup import ReportDailyBranch, ReportDailyService, ReportDailyStaff  # noqa: F401
@@ -1,9 +1,234 @@
-"""Singleton Razorpay client initialised from application settings."""
+"""
+Singleton Razorpay client initialised from application settings.
+
+The SDK issues every call through ``client.session``; we hand it a
+``ProviderSession`` that adds what the default ``requests.Session`` lacks:
+
+* a keep-alive connection pool sized by ``RAZORPAY_POOL_MAXSIZE``
+* connect / read timeouts on every call
+* bounded retries with full-jitter backoff: GETs retry on any connection
+  error, timeout or 5xx / 429 response; other methods only when the
+  connection could not be opened, so an order or refund is never sent twice
+* a circuit breaker that fails fast while Razorpay is degraded
+* per-endpoint latency and error counters (``provider_stats()``)
+"""
+
+import random
+import re
+import threading
+import time
 
 import razorpay
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 from app.core.config import settings
 
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_ID_SEGMENT = re.compile(r"/[a-z]+_[A-Za-z0-9]+")
+
+
+class ProviderUnavailableError(requests.ConnectionError):
+    """Raised without calling the provider while the circuit is open."""
+
+
+def _not_sent(exc: requests.ConnectionError) -> bool:
+    """True when the request never left the client (no connection was opened)."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    # Also covers DNS failures (urllib3's NameResolutionError)
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitBreaker:
+    """Opens after N consecutive failures; lets one trial call through after the reset period."""
+
+    def __init__(self, *, failure_threshold: int, reset_after_sec: float):
+        self.failure_threshold = failure_threshold
+        self.reset_after_sec = reset_after_sec
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_after_sec:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_after_sec:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot if the call ended without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class ProviderMetrics:
+    """Per-endpoint call / error / retry counters and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, dict] = {}
+
+    def record(self, endpoint: str, *, latency_sec: float, error: bool, retries: int) -> None:
+        with self._lock:
+            m = self._endpoints.setdefault(
+                endpoint,
+                {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            ms = latency_sec * 1000
+            m["calls"] += 1
+            m["errors"] += int(error)
+            m["retries"] += retries
+            m["total_ms"] += ms
+            m["max_ms"] = max(m["max_ms"], ms)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                endpoint: {
+                    "calls": m["calls"],
+                    "errors": m["errors"],
+                    "retries": m["retries"],
+                    "avg_ms": round(m["total_ms"] / m["calls"], 2) if m["calls"] else 0.0,
+                    "max_ms": round(m["max_ms"], 2),
+                }
+                for endpoint, m in self._endpoints.items()
+            }
+
+
+class ProviderSession(requests.Session):
+    def __init__(
+        self,
+        *,
+        pool_maxsize: int,
+        connect_timeout_sec: float,
+        read_timeout_sec: float,
+        max_retries: int,
+        retry_backoff_sec: float,
+        breaker: CircuitBreaker,
+        metrics: ProviderMetrics,
+    ):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.timeout = (connect_timeout_sec, read_timeout_sec)
+        self.max_retries = max_retries
+        self.retry_backoff_sec = retry_backoff_sec
+        self.breaker = breaker
+        self.metrics = metrics
+
+    def _sleep_before_retry(self, attempt: int) -> None:
+        time.sleep(random.uniform(0, self.retry_backoff_sec * (2 ** attempt)))
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        method = method.upper()
+        endpoint = f"{method} {_ID_SEGMENT.sub('/{id}', requests.utils.urlparse(url).path)}"
+
+        if not self.breaker.allow():
+            self.metrics.record(endpoint, latency_sec=0.0, error=True, retries=0)
+            raise ProviderUnavailableError(f"Razorpay circuit open ({endpoint})")
+
+        try:
+            return self._request_with_retries(method, url, endpoint, *args, **kwargs)
+        finally:
+            # Outcomes are recorded in _finish; this only matters when the
+            # call died with something other than a requests exception
+            self.breaker.release_trial()
+
+    def _request_with_retries(self, method, url, endpoint, *args, **kwargs):
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.ConnectionError as exc:
+                # Only a request that never left the client is safe to resend
+                # for any method; a dropped POST may already have been applied
+                if (method == "GET" or _not_sent(exc)) and attempt < self.max_retries:
+                    self._sleep_before_retry(attempt)
+                    attempt += 1
+                    continue
+                self._finish(endpoint, started, attempt, failed=True)
+                raise
+            except requests.RequestException:
+                if method == "GET" and attempt < self.max_retries:
+                    self._sleep_before_retry(attempt)
+                    attempt += 1
+                    continue
+                self._finish(endpoint, started, attempt, failed=True)
+                raise
+
+            if response.status_code in _RETRYABLE_STATUS and method == "GET" and attempt < self.max_retries:
+                self._sleep_before_retry(attempt)
+                attempt += 1
+                continue
+
+            self._finish(endpoint, started, attempt, failed=response.status_code >= 500)
+            return response
+
+    def _finish(self, endpoint: str, started: float, retries: int, *, failed: bool) -> None:
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self.metrics.record(
+            endpoint, latency_sec=time.monotonic() - started, error=failed, retries=retries,
+        )
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.RAZORPAY_BREAKER_FAILURES,
+    reset_after_sec=settings.RAZORPAY_BREAKER_RESET_SEC,
+)
+metrics = ProviderMetrics()
+
+session = ProviderSession(
+    pool_maxsize=settings.RAZORPAY_POOL_MAXSIZE,
+    connect_timeout_sec=settings.RAZORPAY_CONNECT_TIMEOUT_SEC,
+    read_timeout_sec=settings.RAZORPAY_READ_TIMEOUT_SEC,
+    max_retries=settings.RAZORPAY_MAX_RETRIES,
+    retry_backoff_sec=settings.RAZORPAY_RETRY_BACKOFF_SEC,
+    breaker=breaker,
+    metrics=metrics,
+)
+
 client = razorpay.Client(
+    session=session,
     auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
 )
+
+
+def provider_stats() -> dict:
+    return {"circuit": breaker.state, "endpoints": metrics.snapshot()}
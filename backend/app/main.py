@@ -15,6 +15,7 @@ from app.api.v1.router import api_router
 from app.middlewares.rate_limit import RateLimitMiddleware, RateLimitRule
 from app.middlewares.security_headers import SecurityHeadersMiddleware
 from app.middlewares.request_context import RequestContextMiddleware
+from app.services.receipt_service import shutdown_export_pool, start_export_pool
 
 origins = [
     "http://localhost:3000",
@@ -33,10 +34,16 @@ async def lifespan(app: FastAPI):
     """
     In development, auto-create tables for convenience.
     In staging / production, prefer Alembic migrations (``alembic upgrade head``).
+
+    Also owns the receipt export process pool.
     """
     if settings.ENV.lower() in {"dev", "development", "local"}:
         Base.metadata.create_all(bind=engine)
-    yield
+    start_export_pool(settings.RECEIPT_EXPORT_WORKERS)
+    try:
+        yield
+    finally:
+        shutdown_export_pool()
 
 
 # ---------------------------------------------------------------------------
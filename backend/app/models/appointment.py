@@ -4,8 +4,11 @@ import uuid
 from datetime import datetime
 from enum import StrEnum
 
-from sqlalchemy import DateTime, String, Numeric, func, ForeignKey, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    DDL, DateTime, String, Numeric, func, ForeignKey, Index,
+    column, event, literal_column, text,
+)
+from sqlalchemy.dialects.postgresql import UUID, ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base_class import Base
@@ -26,6 +29,9 @@ class ApptPayStatus(StrEnum):
     REFUNDED = "REFUNDED"
 
 
+APPT_NO_OVERLAP_CONSTRAINT = "ex_appt_staff_no_overlap"
+
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -35,6 +41,21 @@ class Appointment(Base):
             "ix_appt_tenant_branch_staff_start",
             "tenant_id", "branch_id", "staff_user_id", "start_at",
         ),
+        # No double-booking: a staff member's non-cancelled appointments in
+        # a branch may not overlap.  Postgres only (needs btree_gist);
+        # other dialects fall back to the check-then-insert path.
+        ExcludeConstraint(
+            ("tenant_id", "="),
+            ("branch_id", "="),
+            ("staff_user_id", "="),
+            (
+                func.tstzrange(column("start_at"), column("end_at"), literal_column("'[)'")),
+                "&&",
+            ),
+            name=APPT_NO_OVERLAP_CONSTRAINT,
+            using="gist",
+            where=text("status <> 'CANCELLED'"),
+        ).ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -84,3 +105,10 @@ class Appointment(Base):
     )
     amount_due: Mapped[float] = mapped_column(Numeric(10, 2), default=0, nullable=False)
     currency: Mapped[str] = mapped_column(String(10), default="INR", nullable=False)
+
+
+event.listen(
+    Appointment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
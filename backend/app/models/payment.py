@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, DateTime, Numeric, Index, ForeignKey, func
+from sqlalchemy import String, DateTime, Numeric, Index, ForeignKey, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,6 +9,7 @@ from app.db.base_class import Base
 
 
 class PaymentStatus:
+    PENDING = "PENDING"  # intent recorded, provider order not created yet
     CREATED = "CREATED"
     AUTHORIZED = "AUTHORIZED"
     CAPTURED = "CAPTURED"
@@ -26,6 +27,14 @@ class Payment(Base):
 
     __table_args__ = (
         Index("ix_payments_tenant_appt", "tenant_id", "appointment_id", "branch_id"),
+        Index("ix_payments_tenant_branch_created", "tenant_id", "branch_id", "created_at", "id"),
+        Index("ix_payments_provider_order_id", "provider_order_id", unique=True),
+        Index("ix_payments_provider_payment_id", "provider_payment_id", unique=True),
+        Index(
+            "ix_payments_pending_created",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -55,7 +64,7 @@ class Payment(Base):
         String(50), default=PaymentProvider.RAZORPAY,
     )
 
-    provider_order_id: Mapped[str] = mapped_column(String(255))
+    provider_order_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     provider_payment_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     amount: Mapped[float] = mapped_column(Numeric(10, 2))
@@ -72,4 +81,8 @@ class Payment(Base):
         DateTime(timezone=True), nullable=True,
     )
     refund_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
-    refund_status: Mapped[str | None] = mapped_column(String(50), nullable=True)
\ No newline at end of file
+    refund_status: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    # When the current ``requested`` refund claim was taken
+    refund_requested_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True,
+    )
\ No newline at end of file
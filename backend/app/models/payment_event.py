@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, DateTime, Index, func
+from sqlalchemy import String, DateTime, Index, event, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,11 +9,23 @@ from app.db.base_class import Base
 
 
 class PaymentEvent(Base):
+    """
+    Audit log of provider payloads, range-partitioned by month on
+    ``created_at`` in PostgreSQL (see ``app.services.payment_event_storage``).
+    Deduplication is enforced by ``payment_event_keys``.
+    """
+
     __tablename__ = "payment_events"
 
     __table_args__ = (
-        Index("ix_payment_events_tenant_event", "tenant_id", "provider_event_id"),
         Index("ix_payment_events_tenant_order", "tenant_id", "provider_order_id"),
+        # Compaction walks the uncompacted rows in (created_at, id) order
+        Index(
+            "ix_payment_events_uncompacted",
+            "created_at", "id",
+            postgresql_where=text("compacted_at IS NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -31,6 +43,21 @@ class PaymentEvent(Base):
 
     payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
 
+    # Partition key, hence part of the primary key
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False,
+        DateTime(timezone=True), server_default=func.now(), primary_key=True,
+    )
+    compacted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True,
     )
+
+
+def _create_initial_partitions(target, connection, **kw):
+    if connection.dialect.name != "postgresql":
+        return
+    from app.services.payment_event_storage import ensure_payment_event_partitions
+
+    ensure_payment_event_partitions(connection)
+
+
+event.listen(PaymentEvent.__table__, "after_create", _create_initial_partitions)
@@ -0,0 +1,30 @@
+"""Idempotency keys of recorded provider events."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class PaymentEventKey(Base):
+    """
+    One row per provider event ever recorded.  ``payment_events`` is
+    partitioned by month and cannot carry a unique constraint without the
+    partition key, so the dedupe key lives in this small, unpartitioned
+    table and survives compaction and archiving of the events themselves.
+    """
+
+    __tablename__ = "payment_event_keys"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(50), primary_key=True)
+    provider_event_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
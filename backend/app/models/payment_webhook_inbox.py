@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, Integer, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class PaymentWebhookInbox(Base):
+    """Raw, signature-verified provider webhooks awaiting processing."""
+
+    __tablename__ = "payment_webhook_inbox"
+
+    __table_args__ = (
+        Index(
+            "ix_payment_webhook_inbox_pending",
+            "provider_order_id", "received_at",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+
+    provider: Mapped[str] = mapped_column(String(50), nullable=False)
+    event_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    provider_order_id: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+    processed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(String(1000), nullable=True)
@@ -0,0 +1,58 @@
+"""
+Daily report rollups, maintained incrementally by
+``app.services.report_rollups`` and rebuilt from ``appointments`` on demand.
+
+Days are UTC dates of ``Appointment.start_at``.
+"""
+
+import uuid
+from datetime import date
+
+from sqlalchemy import Date, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class ReportDailyBranch(Base):
+    """Appointment counts and confirmed revenue per branch per day."""
+
+    __tablename__ = "report_daily_branch"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    appointments: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    confirmed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    cancelled: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+
+
+class ReportDailyService(Base):
+    """Confirmed bookings and revenue per service per branch per day."""
+
+    __tablename__ = "report_daily_service"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    service_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    bookings: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+
+
+class ReportDailyStaff(Base):
+    """Confirmed appointments and revenue per staff member per branch per day."""
+
+    __tablename__ = "report_daily_staff"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    staff_user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+
+    appointments: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
@@ -0,0 +1,60 @@
+"""Short-lived reservation of a staff interval during checkout."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DDL, DateTime, Index, func, column, event, literal_column
+from sqlalchemy.dialects.postgresql import UUID, ExcludeConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+SLOT_HOLD_NO_OVERLAP_CONSTRAINT = "ex_slot_holds_no_overlap"
+
+
+class SlotHold(Base):
+    __tablename__ = "slot_holds"
+
+    __table_args__ = (
+        Index(
+            "ix_slot_holds_tenant_branch_staff_start",
+            "tenant_id", "branch_id", "staff_user_id", "start_at",
+        ),
+        Index("ix_slot_holds_expires_at", "expires_at"),
+        # Expired holds for the staff member are purged before each insert,
+        # so only live holds can trip this.  Postgres only.
+        ExcludeConstraint(
+            ("tenant_id", "="),
+            ("branch_id", "="),
+            ("staff_user_id", "="),
+            (
+                func.tstzrange(column("start_at"), column("end_at"), literal_column("'[)'")),
+                "&&",
+            ),
+            name=SLOT_HOLD_NO_OVERLAP_CONSTRAINT,
+            using="gist",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    branch_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    staff_user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    customer_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    start_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    end_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False,
+    )
+
+
+event.listen(
+    SlotHold.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 from typing import List, Optional
+from uuid import UUID
 
 class AppointmentCreateIn(BaseModel):
     customer_id: str
@@ -8,15 +9,52 @@ class AppointmentCreateIn(BaseModel):
     service_ids: List[str]
     start_at: datetime
     notes: str = Field(default="", max_length=500)
+    hold_id: Optional[str] = None  # slot hold being converted into this booking
+
+class AppointmentRecurringIn(BaseModel):
+    customer_id: str
+    staff_user_id: str
+    service_ids: List[str]
+    start_at: datetime  # first occurrence
+    interval_days: int = Field(default=7, ge=1, le=365)
+    occurrences: int = Field(default=4, ge=1, le=52)
+    notes: str = Field(default="", max_length=500)
 
 class AppointmentPatchIn(BaseModel):
     status: Optional[str] = None  # CANCELLED/CONFIRMED
     start_at: Optional[datetime] = None  # reschedule
     notes: Optional[str] = Field(default=None, max_length=500)
 
+class SlotHoldIn(BaseModel):
+    staff_user_id: str
+    service_ids: List[str]
+    start_at: datetime
+    customer_id: Optional[str] = None
+    ttl_sec: Optional[int] = Field(default=None, ge=30, le=1800)
+
 class AvailabilityQuery(BaseModel):
     branch_id: str | None = None
     staff_user_id: str
     service_ids: List[str]
     day: date
     slot_step_min: int = 15
+
+class AppointmentListItemOut(BaseModel):
+    id: UUID
+    customer_id: UUID
+    staff_user_id: UUID
+    start_at: datetime
+    end_at: datetime
+    status: str
+    payment_status: str
+    amount_due: float
+    currency: str
+    notes: str
+
+class AppointmentListDataOut(BaseModel):
+    items: List[AppointmentListItemOut]
+    next_cursor: Optional[str] = None
+
+class AppointmentListOut(BaseModel):
+    success: bool = True
+    data: AppointmentListDataOut
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pydantic import BaseModel, Field
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 
 # ---------- Common ----------
@@ -58,3 +59,25 @@ class RefundOut(BaseModel):
     payment_status: str
     refund_status: Optional[str] = None
     refund: dict
+
+
+# ---------- List ----------
+class PaymentListItemOut(BaseModel):
+    id: UUID
+    appointment_id: UUID
+    customer_id: UUID
+    amount: float
+    currency: str
+    status: str
+    refund_status: Optional[str] = None
+    created_at: datetime
+
+
+class PaymentListDataOut(BaseModel):
+    items: List[PaymentListItemOut]
+    next_cursor: Optional[str] = None
+
+
+class PaymentListOut(BaseModel):
+    success: bool = True
+    data: PaymentListDataOut
@@ -0,0 +1,316 @@
+"""
+Two-tier cache for computed availability slots.
+
+Entries are grouped per staff-day (tenant / branch / staff / day) and hold
+one slot list per ``duration_min:step_min`` variant.  Every entry key
+carries the staff-day's version, read from Redis *before* the slots are
+computed:
+
+* Bookings bump the staff-day version (``invalidate``) after they commit.
+* Working-hours edits bump the staff version (``invalidate_staff``),
+  which covers every day and branch of that staff member.
+
+A computation that raced with a booking therefore stores its result under
+the old version, where it is never read again, and every worker sees a
+bump as soon as it is made.
+
+* Local tier — per-process LRU with a short TTL, keyed by version too.
+* Redis tier — shared between API workers (one hash per staff-day version).
+
+The versions live in Redis, so with ``AVAILABILITY_CACHE_USE_REDIS=false``
+(or Redis unreachable) nothing is cached.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.staff import Staff
+
+StaffDay = tuple[uuid.UUID, uuid.UUID, uuid.UUID, date]
+# Staff-day -> "<staff version>.<staff-day version>"
+Versions = dict[StaffDay, str]
+
+
+def _staff_version_key(tenant_id: uuid.UUID, staff_id: uuid.UUID) -> str:
+    return f"availver:{tenant_id}:{staff_id}"
+
+
+def _day_version_key(staff_day: StaffDay) -> str:
+    tenant_id, branch_id, staff_id, day = staff_day
+    return f"availver:{tenant_id}:{branch_id}:{staff_id}:{day.isoformat()}"
+
+
+def _key(staff_day: StaffDay, version: str) -> str:
+    tenant_id, branch_id, staff_id, day = staff_day
+    return f"avail:{tenant_id}:{branch_id}:{staff_id}:{day.isoformat()}:{version}"
+
+
+def _variant(duration_min: int, step_min: int) -> str:
+    return f"{duration_min}:{step_min}"
+
+
+class AvailabilityCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        local_ttl_sec: float,
+        redis_ttl_sec: int,
+        redis_url: str | None = None,
+    ):
+        self.max_entries = max_entries
+        self.local_ttl_sec = local_ttl_sec
+        self.redis_ttl_sec = redis_ttl_sec
+        self.redis_url = redis_url
+        # Version counters must outlive every entry written under them
+        self.version_ttl_sec = 2 * max(redis_ttl_sec, int(local_ttl_sec) + 1)
+
+        self._local: OrderedDict[str, tuple[float, dict[str, list[str]]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "redis_errors": 0,
+        }
+
+    # -- internals ---------------------------------------------------------
+    def _incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _get_redis(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5,
+            )
+        return self._redis
+
+    def _local_get(self, key: str, variant: str) -> list[str] | None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, variants = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return variants.get(variant)
+
+    def _local_set(self, key: str, variant: str, slots: list[str]) -> None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                entry = (time.monotonic() + self.local_ttl_sec, {})
+            entry[1][variant] = slots
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _versions(self, staff_days: list[StaffDay]) -> Versions | None:
+        r = self._get_redis()
+        if r is None:
+            return None
+        keys = []
+        for tenant_id, branch_id, staff_id, day in staff_days:
+            keys.append(_staff_version_key(tenant_id, staff_id))
+            keys.append(_day_version_key((tenant_id, branch_id, staff_id, day)))
+        try:
+            raw = r.mget(keys)
+        except Exception:
+            self._incr("redis_errors")
+            return None
+        return {
+            sd: f"{int(raw[2 * i] or 0)}.{int(raw[2 * i + 1] or 0)}"
+            for i, sd in enumerate(staff_days)
+        }
+
+    def _bump(self, version_keys: set[str]) -> None:
+        r = self._get_redis()
+        if not version_keys or r is None:
+            return
+        try:
+            pipe = r.pipeline(transaction=False)
+            for key in version_keys:
+                pipe.incr(key)
+                pipe.expire(key, self.version_ttl_sec)
+            pipe.execute()
+        except Exception:
+            self._incr("redis_errors")
+
+    # -- public API --------------------------------------------------------
+    def get_many(
+        self, staff_days: Iterable[StaffDay], *, duration_min: int, step_min: int,
+    ) -> tuple[dict[StaffDay, list[str]], Versions | None]:
+        """
+        Cached slot lists for the staff-days that are present, plus the
+        versions they were looked up under.  Pass the versions back to
+        ``set_many`` when storing slots computed after this call.
+        """
+        staff_days = list(dict.fromkeys(staff_days))
+        versions = self._versions(staff_days)
+        if versions is None:
+            self._incr("misses", len(staff_days))
+            return {}, None
+
+        variant = _variant(duration_min, step_min)
+        found: dict[StaffDay, list[str]] = {}
+        remote: list[StaffDay] = []
+
+        for sd in staff_days:
+            slots = self._local_get(_key(sd, versions[sd]), variant)
+            if slots is not None:
+                found[sd] = slots
+            else:
+                remote.append(sd)
+        self._incr("local_hits", len(found))
+
+        r = self._get_redis()
+        if remote:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for sd in remote:
+                    pipe.hget(_key(sd, versions[sd]), variant)
+                raw = pipe.execute()
+            except Exception:
+                self._incr("redis_errors")
+                raw = [None] * len(remote)
+
+            still_missing = []
+            for sd, value in zip(remote, raw):
+                if value is None:
+                    still_missing.append(sd)
+                    continue
+                slots = json.loads(value)
+                found[sd] = slots
+                self._local_set(_key(sd, versions[sd]), variant, slots)
+            self._incr("redis_hits", len(remote) - len(still_missing))
+            remote = still_missing
+
+        self._incr("misses", len(remote))
+        return found, versions
+
+    def get(
+        self, staff_day: StaffDay, *, duration_min: int, step_min: int,
+    ) -> tuple[list[str] | None, Versions | None]:
+        found, versions = self.get_many(
+            [staff_day], duration_min=duration_min, step_min=step_min,
+        )
+        return found.get(staff_day), versions
+
+    def set_many(
+        self,
+        entries: dict[StaffDay, list[str]],
+        versions: Versions | None,
+        *,
+        duration_min: int,
+        step_min: int,
+    ) -> None:
+        """Store *entries* under the *versions* returned by ``get_many``."""
+        r = self._get_redis()
+        if not entries or versions is None or r is None:
+            return
+        variant = _variant(duration_min, step_min)
+        for sd, slots in entries.items():
+            self._local_set(_key(sd, versions[sd]), variant, slots)
+
+        try:
+            pipe = r.pipeline(transaction=False)
+            for sd, slots in entries.items():
+                key = _key(sd, versions[sd])
+                pipe.hset(key, variant, json.dumps(slots))
+                pipe.expire(key, self.redis_ttl_sec)
+            pipe.execute()
+        except Exception:
+            self._incr("redis_errors")
+
+    def set(
+        self,
+        staff_day: StaffDay,
+        slots: list[str],
+        versions: Versions | None,
+        *,
+        duration_min: int,
+        step_min: int,
+    ) -> None:
+        self.set_many(
+            {staff_day: slots}, versions, duration_min=duration_min, step_min=step_min,
+        )
+
+    def invalidate(self, staff_days: Iterable[StaffDay]) -> None:
+        """Move the given staff-days to a new version (call after commit)."""
+        keys = {_day_version_key(sd) for sd in staff_days}
+        self._incr("invalidations", len(keys))
+        self._bump(keys)
+
+    def invalidate_staff(self, staff: Iterable[tuple[uuid.UUID, uuid.UUID]]) -> None:
+        """Invalidate every day of the given ``(tenant_id, staff_id)`` pairs."""
+        keys = {_staff_version_key(tenant_id, staff_id) for tenant_id, staff_id in staff}
+        self._incr("invalidations", len(keys))
+        self._bump(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["local_entries"] = len(self._local)
+        lookups = counters["local_hits"] + counters["redis_hits"] + counters["misses"]
+        counters["hit_rate"] = (
+            round((lookups - counters["misses"]) / lookups, 4) if lookups else 0.0
+        )
+        counters["redis_enabled"] = bool(self.redis_url)
+        return counters
+
+
+availability_cache = AvailabilityCache(
+    max_entries=settings.AVAILABILITY_CACHE_MAX_ENTRIES,
+    local_ttl_sec=settings.AVAILABILITY_CACHE_LOCAL_TTL_SEC,
+    redis_ttl_sec=settings.AVAILABILITY_CACHE_REDIS_TTL_SEC,
+    redis_url=settings.REDIS_URL if settings.AVAILABILITY_CACHE_USE_REDIS else None,
+)
+
+
+# ---------------------------------------------------------------------------
+# Working-hours edits
+# ---------------------------------------------------------------------------
+_HOURS_FIELDS = ("work_start_time", "work_end_time")
+_PENDING = "availability_cache.staff_hours"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_staff_hours_changes(session: Session, flush_context) -> None:
+    for obj in session.dirty:
+        if not isinstance(obj, Staff):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[f].history.has_changes() for f in _HOURS_FIELDS):
+            session.info.setdefault(_PENDING, set()).add((obj.tenant_id, obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_staff_hours(session: Session) -> None:
+    changed = session.info.pop(_PENDING, None)
+    if changed:
+        availability_cache.invalidate_staff(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staff_hours(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,233 @@
+"""
+Streaming data exports (appointments, appointment line items, payments).
+
+Rows are read with a server-side cursor (``yield_per``) and serialized one
+batch at a time, so memory does not depend on the number of rows:
+
+* ``csv`` / ``ndjson`` — text, encoded and yielded per batch.
+* ``parquet`` — one row group per batch (needs ``pyarrow``).
+"""
+
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterator
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment
+from app.models.appointment_service import AppointmentService
+from app.models.payment import Payment
+
+EXPORT_DATASETS = ("appointments", "appointment_services", "payments")
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+BATCH_SIZE = 5000
+
+# Column kinds: uuid, str, int, decimal, datetime
+Columns = list[tuple[str, str]]
+
+
+def export_query(
+    dataset: str,
+    *,
+    tenant_id: uuid.UUID,
+    branch_id: uuid.UUID | None,
+    range_start: datetime,
+    range_end: datetime,
+) -> tuple[Columns, Select]:
+    """Columns and statement of *dataset* for ``[range_start, range_end)``."""
+    if dataset == "appointments":
+        columns = [
+            ("id", "uuid"), ("branch_id", "uuid"), ("customer_id", "uuid"),
+            ("staff_user_id", "uuid"), ("start_at", "datetime"), ("end_at", "datetime"),
+            ("status", "str"), ("payment_status", "str"), ("amount_due", "decimal"),
+            ("currency", "str"), ("created_at", "datetime"),
+        ]
+        stmt = (
+            select(*(getattr(Appointment, name) for name, _ in columns))
+            .where(
+                Appointment.tenant_id == tenant_id,
+                Appointment.start_at >= range_start,
+                Appointment.start_at < range_end,
+            )
+            .order_by(Appointment.start_at, Appointment.id)
+        )
+        if branch_id is not None:
+            stmt = stmt.where(Appointment.branch_id == branch_id)
+        return columns, stmt
+
+    if dataset == "appointment_services":
+        columns = [
+            ("id", "uuid"), ("appointment_id", "uuid"), ("service_id", "uuid"),
+            ("price_snapshot", "decimal"), ("duration_snapshot_min", "int"),
+            ("branch_id", "uuid"), ("start_at", "datetime"), ("status", "str"),
+        ]
+        stmt = (
+            select(
+                AppointmentService.id,
+                AppointmentService.appointment_id,
+                AppointmentService.service_id,
+                AppointmentService.price_snapshot,
+                AppointmentService.duration_snapshot_min,
+                Appointment.branch_id,
+                Appointment.start_at,
+                Appointment.status,
+            )
+            .join(Appointment, Appointment.id == AppointmentService.appointment_id)
+            .where(
+                Appointment.tenant_id == tenant_id,
+                Appointment.start_at >= range_start,
+                Appointment.start_at < range_end,
+            )
+            .order_by(Appointment.start_at, AppointmentService.appointment_id, AppointmentService.id)
+        )
+        if branch_id is not None:
+            stmt = stmt.where(Appointment.branch_id == branch_id)
+        return columns, stmt
+
+    if dataset == "payments":
+        columns = [
+            ("id", "uuid"), ("branch_id", "uuid"), ("appointment_id", "uuid"),
+            ("customer_id", "uuid"), ("provider", "str"), ("provider_order_id", "str"),
+            ("provider_payment_id", "str"), ("status", "str"), ("amount", "decimal"),
+            ("currency", "str"), ("refund_id", "str"), ("refund_status", "str"),
+            ("created_at", "datetime"),
+        ]
+        stmt = (
+            select(*(getattr(Payment, name) for name, _ in columns))
+            .where(
+                Payment.tenant_id == tenant_id,
+                Payment.created_at >= range_start,
+                Payment.created_at < range_end,
+            )
+            .order_by(Payment.created_at, Payment.id)
+        )
+        if branch_id is not None:
+            stmt = stmt.where(Payment.branch_id == branch_id)
+        return columns, stmt
+
+    raise ValueError(f"Unknown export dataset: {dataset}")
+
+
+def iter_batches(db: Session, stmt: Select, batch_size: int = BATCH_SIZE) -> Iterator[list[tuple]]:
+    """Rows of *stmt* in lists of at most *batch_size*, via a server-side cursor."""
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+def _text_value(value, kind: str):
+    if value is None:
+        return None
+    if kind in ("uuid", "decimal"):
+        return str(value)
+    if kind == "datetime":
+        return value.isoformat()
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+def iter_csv(columns: Columns, batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([name for name, _ in columns])
+    kinds = [kind for _, kind in columns]
+    for batch in batches:
+        writer.writerows(
+            ["" if v is None else v for v in map(_text_value, row, kinds)]
+            for row in batch
+        )
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def iter_ndjson(columns: Columns, batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    names = [name for name, _ in columns]
+    kinds = [kind for _, kind in columns]
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, map(_text_value, row, kinds))), separators=(",", ":")) + "\n"
+            for row in batch
+        ).encode()
+
+
+class _ParquetSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(columns: Columns, batches: Iterator[list[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "uuid": pa.string(),
+        "str": pa.string(),
+        "int": pa.int64(),
+        "decimal": pa.decimal128(12, 2),
+        "datetime": pa.timestamp("us", tz="UTC"),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+
+    def convert(values, kind):
+        if kind == "uuid":
+            return [None if v is None else str(v) for v in values]
+        if kind == "decimal":
+            return [None if v is None else Decimal(v) for v in values]
+        return list(values)
+
+    sink = _ParquetSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            arrays = [
+                pa.array(convert(values, kind), type=types[kind])
+                for values, (_, kind) in zip(zip(*batch), columns)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema), row_group_size=len(batch))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+WRITERS = {"csv": iter_csv, "ndjson": iter_ndjson, "parquet": iter_parquet}
+
+
+def iter_export(
+    db: Session, dataset: str, fmt: str, *, batch_size: int = BATCH_SIZE, **query,
+) -> Iterator[bytes]:
+    """Serialized chunks of an export.  Keeps *db* busy until exhausted."""
+    columns, stmt = export_query(dataset, **query)
+    return WRITERS[fmt](columns, iter_batches(db, stmt, batch_size))
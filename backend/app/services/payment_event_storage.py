@@ -0,0 +1,289 @@
+"""
+Storage maintenance for ``payment_events`` (PostgreSQL only).
+
+* Partitions — one ``payment_events_yYYYYmMM`` range partition per month,
+  created a few months ahead, plus ``payment_events_default`` so an insert
+  outside them (clock skew, a missed maintenance run) never fails.  Rows
+  found in the default partition are logged and moved into their monthly
+  partition by the next maintenance run.
+* Compaction — after ``PAYMENT_EVENT_COMPACT_AFTER_DAYS`` the full provider
+  payload is replaced by the handful of fields we ever read back.
+* Archive — partitions older than ``PAYMENT_EVENT_ARCHIVE_AFTER_MONTHS`` are
+  detached, exported to ``<archive dir>/<partition>.ndjson.gz`` and dropped.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, select, text, tuple_, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.payment_event import PaymentEvent
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "payment_events_y"
+DEFAULT_PARTITION = "payment_events_default"
+_PARTITION_NAME = re.compile(r"^payment_events_y(\d{4})m(\d{2})$")
+
+# Entity fields kept by compaction
+COMPACT_FIELDS = (
+    "id", "entity", "status", "amount", "amount_refunded", "currency",
+    "order_id", "payment_id", "method", "error_code", "error_reason", "created_at",
+)
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}m{month.month:02d}"
+
+
+def _partition_month(name: str) -> date | None:
+    m = _PARTITION_NAME.match(name)
+    return date(int(m.group(1)), int(m.group(2)), 1) if m else None
+
+
+# ---------------------------------------------------------------------------
+# Partitions
+# ---------------------------------------------------------------------------
+def ensure_payment_event_partitions(
+    conn: Connection | Session, *, months_ahead: int | None = None, today: date | None = None,
+) -> list[str]:
+    """
+    Create the DEFAULT partition, the current month's partition and the next
+    *months_ahead* ones.  Run ``split_default_partition`` first: a monthly
+    partition cannot be created while the default one holds its rows.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PAYMENT_EVENT_PARTITIONS_AHEAD
+    first = _month_start(today or datetime.now(timezone.utc).date())
+
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF payment_events DEFAULT"
+    ))
+    created = []
+    for i in range(months_ahead + 1):
+        month = _add_months(first, i)
+        name = partition_name(month)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF payment_events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def _partitions(conn: Connection | Session) -> tuple[set[str], set[str]]:
+    """``(attached, all)`` monthly partition table names."""
+    attached = set(conn.scalars(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'payment_events'::regclass"
+    )))
+    existing = set(conn.scalars(
+        text("SELECT tablename FROM pg_tables WHERE tablename LIKE :prefix"),
+        {"prefix": PARTITION_PREFIX + "%"},
+    ))
+    return attached, existing
+
+
+def split_default_partition(conn: Connection | Session) -> dict[str, int]:
+    """
+    Move rows out of the DEFAULT partition into their monthly partitions,
+    one month per transaction: the rows are moved into a standalone table
+    that is then attached.  Returns moved row counts per partition.
+    """
+    exists = conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION})
+    if not exists:
+        return {}
+    months = conn.scalars(text(
+        f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {DEFAULT_PARTITION}"
+    )).all()
+    conn.commit()
+
+    moved = {}
+    for month in sorted(months):
+        name = partition_name(month)
+        lower, upper = month.isoformat(), _add_months(month, 1).isoformat()
+        attached, _ = _partitions(conn)
+        if name in attached:
+            continue
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"(LIKE payment_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        moved[name] = conn.execute(
+            text(
+                f"WITH moved AS ("
+                f"  DELETE FROM {DEFAULT_PARTITION}"
+                f"  WHERE created_at >= :lower AND created_at < :upper RETURNING *"
+                f") INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"lower": lower, "upper": upper},
+        ).rowcount
+        conn.execute(text(
+            f"ALTER TABLE payment_events ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+        conn.commit()
+        logger.warning(
+            "Moved %d payment_events rows from %s into %s; partitions are not "
+            "being created far enough ahead", moved[name], DEFAULT_PARTITION, name,
+        )
+    return moved
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+def _entity(payload: dict) -> dict:
+    nested = payload.get("payload")
+    if isinstance(nested, dict):
+        for kind in ("payment", "refund", "order"):
+            entity = (nested.get(kind) or {}).get("entity")
+            if entity:
+                return entity
+    if isinstance(payload.get("razorpay_payment"), dict):
+        return payload["razorpay_payment"]
+    return payload
+
+
+def compact_payload(payload: dict) -> dict:
+    entity = _entity(payload)
+    compacted = {"entity": {k: entity[k] for k in COMPACT_FIELDS if k in entity}}
+    for key in ("event", "previous_status"):
+        if key in payload:
+            compacted[key] = payload[key]
+    return compacted
+
+
+def compact_payment_events(db: Session, *, older_than: datetime, batch_size: int = 1000) -> int:
+    """
+    Compact payloads of events created before *older_than*, one batch per
+    transaction.  Batches follow a ``(created_at, id)`` keyset over the
+    ``ix_payment_events_uncompacted`` partial index, so each one starts
+    where the previous one stopped.
+    """
+    events = PaymentEvent.__table__
+    stmt = (
+        update(events)
+        .where(events.c.id == bindparam("b_id"), events.c.created_at == bindparam("b_created_at"))
+        .values(payload=bindparam("b_payload"), compacted_at=bindparam("b_now"))
+    )
+
+    total = 0
+    last = None
+    while True:
+        query = (
+            select(PaymentEvent.id, PaymentEvent.created_at, PaymentEvent.payload)
+            .where(
+                PaymentEvent.created_at < older_than,
+                PaymentEvent.compacted_at.is_(None),
+            )
+            .order_by(PaymentEvent.created_at, PaymentEvent.id)
+            .limit(batch_size)
+        )
+        if last is not None:
+            query = query.where(tuple_(PaymentEvent.created_at, PaymentEvent.id) > tuple_(*last))
+        rows = db.execute(query).all()
+        if not rows:
+            return total
+        last = (rows[-1].created_at, rows[-1].id)
+
+        now = datetime.now(timezone.utc)
+        db.execute(
+            stmt,
+            [
+                {"b_id": r.id, "b_created_at": r.created_at, "b_payload": compact_payload(r.payload), "b_now": now}
+                for r in rows
+            ],
+        )
+        db.commit()
+        total += len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Archive
+# ---------------------------------------------------------------------------
+def _export_partition(conn: Connection | Session, name: str, archive_dir: str) -> str:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+    tmp_path = path + ".tmp"
+
+    result = conn.execute(
+        text(f"SELECT * FROM {name} ORDER BY created_at, id")
+        .execution_options(stream_results=True, yield_per=1000)
+    )
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as fh:
+        for row in result.mappings():
+            fh.write(json.dumps(dict(row), default=str, separators=(",", ":")))
+            fh.write("\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def archive_payment_event_partitions(
+    conn: Connection | Session,
+    *,
+    before_month: date,
+    archive_dir: str | None = None,
+) -> list[str]:
+    """
+    Detach every monthly partition older than *before_month*, export it to a
+    gzip-compressed NDJSON file and drop it.  Partitions left detached by an
+    earlier failed run are picked up again.  Returns the written paths.
+    """
+    archive_dir = archive_dir or settings.PAYMENT_EVENT_ARCHIVE_DIR
+    attached, existing = _partitions(conn)
+
+    paths = []
+    for name in sorted(existing):
+        month = _partition_month(name)
+        if month is None or month >= before_month:
+            continue
+        if name in attached:
+            conn.execute(text(f"ALTER TABLE payment_events DETACH PARTITION {name}"))
+            conn.commit()
+        paths.append(_export_partition(conn, name, archive_dir))
+        conn.execute(text(f"DROP TABLE {name}"))
+        conn.commit()
+    return paths
+
+
+def maintain_payment_events(db: Session) -> dict:
+    """
+    Daily job: empty the default partition, pre-create partitions, compact
+    old payloads, archive old months.
+    """
+    now = datetime.now(timezone.utc)
+    split = split_default_partition(db)
+    partitions = ensure_payment_event_partitions(db)
+    db.commit()
+
+    compacted = compact_payment_events(
+        db, older_than=now - timedelta(days=settings.PAYMENT_EVENT_COMPACT_AFTER_DAYS),
+    )
+    archived = archive_payment_event_partitions(
+        db,
+        before_month=_add_months(_month_start(now.date()), -settings.PAYMENT_EVENT_ARCHIVE_AFTER_MONTHS),
+    )
+    return {
+        "partitions": partitions,
+        "split_from_default": split,
+        "compacted": compacted,
+        "archived": archived,
+    }
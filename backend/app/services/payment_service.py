@@ -0,0 +1,463 @@
+"""
+Payment state transitions shared by the payment routes and the Celery
+workers: provider status mapping, appointment sync, webhook processing and
+reconciliation against the provider.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, ApptPayStatus
+from app.models.payment import Payment, PaymentProvider, PaymentStatus
+from app.models.payment_event import PaymentEvent
+from app.models.payment_event_key import PaymentEventKey
+from app.models.payment_webhook_inbox import PaymentWebhookInbox
+from app.services.report_cache import report_cache
+
+STATUS_MAP = {
+    "authorized": PaymentStatus.AUTHORIZED,
+    "captured": PaymentStatus.CAPTURED,
+    "failed": PaymentStatus.FAILED,
+    "refunded": PaymentStatus.REFUNDED,
+}
+
+# refund_status while a refund call to the provider is in flight
+REFUND_REQUESTED = "requested"
+
+APPT_STATUS_MAP = {
+    PaymentStatus.CAPTURED: ApptPayStatus.PAID,
+    PaymentStatus.FAILED: ApptPayStatus.FAILED,
+    PaymentStatus.REFUNDED: ApptPayStatus.REFUNDED,
+}
+
+
+def sync_appointment_payment_status(
+    db: Session,
+    tenant_id: uuid.UUID,
+    appointment_id: uuid.UUID,
+    pay_status: str,
+    *,
+    branch_id: uuid.UUID | None = None,
+) -> None:
+    """Update the appointment's payment_status to match the payment."""
+    filters = [
+        Appointment.tenant_id == tenant_id,
+        Appointment.id == appointment_id,
+    ]
+    if branch_id is not None:
+        filters.append(Appointment.branch_id == branch_id)
+
+    appt = db.scalar(select(Appointment).where(*filters))
+    _set_appointment_payment_status(appt, pay_status)
+
+
+def _set_appointment_payment_status(appt: Appointment | None, pay_status: str) -> None:
+    if appt and pay_status in APPT_STATUS_MAP:
+        appt.payment_status = APPT_STATUS_MAP[pay_status]
+
+
+def _claim_event_keys(db: Session, events: list[dict]) -> set[tuple]:
+    """
+    Insert the dedupe keys of *events* into ``payment_event_keys`` and return
+    the ``(tenant_id, provider, provider_event_id, event_type)`` tuples that
+    were new.  Events without a provider event id are not deduplicated.
+    """
+    keys = {
+        (e["tenant_id"], e["provider"], e["provider_event_id"], e["event_type"])
+        for e in events
+        if e["provider_event_id"] is not None
+    }
+    if not keys:
+        return set()
+    rows = db.execute(
+        pg_insert(PaymentEventKey)
+        .values([
+            {"tenant_id": t, "provider": p, "provider_event_id": ev, "event_type": et}
+            for t, p, ev, et in keys
+        ])
+        .on_conflict_do_nothing()
+        .returning(
+            PaymentEventKey.tenant_id, PaymentEventKey.provider,
+            PaymentEventKey.provider_event_id, PaymentEventKey.event_type,
+        )
+    ).all()
+    return {tuple(r) for r in rows}
+
+
+def record_payment_events(db: Session, events: list[dict]) -> list[uuid.UUID]:
+    """
+    Insert payment events, skipping provider events that were already
+    recorded.  Each dict carries the ``PaymentEvent`` column values except
+    ``id``.  Returns the ids of the inserted rows.
+    """
+    claimed = _claim_event_keys(db, events)
+    rows = [
+        {"id": uuid.uuid4(), **e}
+        for e in events
+        if e["provider_event_id"] is None
+        or (e["tenant_id"], e["provider"], e["provider_event_id"], e["event_type"]) in claimed
+    ]
+    if rows:
+        db.execute(insert(PaymentEvent), rows)
+    return [r["id"] for r in rows]
+
+
+def record_payment_event(
+    db: Session,
+    *,
+    tenant_id: uuid.UUID,
+    event_type: str,
+    provider_event_id: str | None,
+    provider_order_id: str | None,
+    provider_payment_id: str | None,
+    payload: dict,
+    provider: str = PaymentProvider.RAZORPAY,
+) -> uuid.UUID | None:
+    """
+    Insert a payment event unless the same provider event is already
+    recorded.  Returns the new row id, or ``None`` for a duplicate.
+    """
+    ids = record_payment_events(
+        db,
+        [{
+            "tenant_id": tenant_id,
+            "provider": provider,
+            "event_type": event_type,
+            "provider_event_id": provider_event_id,
+            "provider_order_id": provider_order_id,
+            "provider_payment_id": provider_payment_id,
+            "payload": payload,
+        }],
+    )
+    return ids[0] if ids else None
+
+
+# ---------------------------------------------------------------------------
+# Razorpay webhooks
+# ---------------------------------------------------------------------------
+def webhook_order_id(payload_json: dict) -> str:
+    """The Razorpay order id a webhook refers to ("" when absent)."""
+    nested = payload_json.get("payload") or {}
+    payment_entity = (nested.get("payment") or {}).get("entity") or {}
+    order_entity = (nested.get("order") or {}).get("entity") or {}
+    refund_entity = (nested.get("refund") or {}).get("entity") or {}
+    return (
+        payment_entity.get("order_id")
+        or order_entity.get("id")
+        or refund_entity.get("order_id")
+        or ""
+    )
+
+
+def apply_razorpay_webhook(db: Session, payload_json: dict) -> None:
+    """
+    Apply one verified webhook payload: record it idempotently and move the
+    payment / appointment status.  Does not commit.
+    """
+    event_type = payload_json.get("event", "")
+
+    nested = payload_json.get("payload") or {}
+    payment_entity = (nested.get("payment") or {}).get("entity") or {}
+    order_entity = (nested.get("order") or {}).get("entity") or {}
+    refund_entity = (nested.get("refund") or {}).get("entity") or {}
+
+    event_id = (
+        payment_entity.get("id")
+        or order_entity.get("id")
+        or refund_entity.get("id")
+    )
+    provider_order_id = webhook_order_id(payload_json)
+    provider_payment_id = payment_entity.get("id") or refund_entity.get("payment_id") or ""
+    status = (
+        payment_entity.get("status")
+        or order_entity.get("status")
+        or refund_entity.get("status")
+        or ""
+    )
+
+    if not provider_order_id:
+        return
+
+    # One indexed lookup (ix_payments_provider_order_id is unique) that also
+    # brings the linked appointment along
+    row = db.execute(
+        select(Payment, Appointment)
+        .outerjoin(
+            Appointment,
+            (Appointment.tenant_id == Payment.tenant_id)
+            & (Appointment.id == Payment.appointment_id),
+        )
+        .where(Payment.provider_order_id == provider_order_id)
+    ).first()
+    if not row:
+        return
+    pay, appt = row
+
+    # Idempotency: a key already in payment_event_keys turns this into a no-op
+    recorded = record_payment_event(
+        db,
+        tenant_id=pay.tenant_id,
+        event_type=event_type or "unknown",
+        provider_event_id=event_id,
+        provider_order_id=provider_order_id or None,
+        provider_payment_id=provider_payment_id or None,
+        payload=payload_json,
+    )
+    if recorded is None:
+        return
+
+    if status in STATUS_MAP:
+        pay.status = STATUS_MAP[status]
+
+    if provider_payment_id:
+        pay.provider_payment_id = provider_payment_id
+
+    _set_appointment_payment_status(appt, pay.status)
+    # Make the next event of this order see the changes above
+    db.flush()
+
+
+def process_pending_webhooks(db: Session, provider_order_id: str) -> int:
+    """
+    Apply every unprocessed inbox event of one order, oldest first, in a
+    single transaction.  The inbox rows are locked so concurrent consumers
+    of the same order run one after the other.  Returns the number applied.
+    """
+    rows = db.scalars(
+        select(PaymentWebhookInbox)
+        .where(
+            PaymentWebhookInbox.provider_order_id == provider_order_id,
+            PaymentWebhookInbox.processed_at.is_(None),
+        )
+        .order_by(PaymentWebhookInbox.received_at, PaymentWebhookInbox.id)
+        .with_for_update()
+    ).all()
+
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        apply_razorpay_webhook(db, row.payload)
+        row.processed_at = now
+        row.attempts += 1
+
+    tenant_id = None
+    if rows:
+        tenant_id = db.scalar(
+            select(Payment.tenant_id).where(Payment.provider_order_id == provider_order_id)
+        )
+    db.commit()
+    if tenant_id is not None:
+        report_cache.bump([tenant_id])
+    return len(rows)
+
+
+def record_webhook_failure(db: Session, provider_order_id: str, error: Exception) -> None:
+    """Count a failed processing attempt on the order's pending events."""
+    db.execute(
+        update(PaymentWebhookInbox)
+        .where(
+            PaymentWebhookInbox.provider_order_id == provider_order_id,
+            PaymentWebhookInbox.processed_at.is_(None),
+        )
+        .values(
+            attempts=PaymentWebhookInbox.attempts + 1,
+            last_error=repr(error)[:1000],
+        )
+    )
+    db.commit()
+
+
+def stale_pending_webhook_orders(
+    db: Session, older_than: datetime, *, max_attempts: int, limit: int = 500,
+) -> list[str]:
+    """
+    Order ids with inbox events still unprocessed since before *older_than*
+    and retried fewer than *max_attempts* times.
+    """
+    return list(
+        db.scalars(
+            select(PaymentWebhookInbox.provider_order_id)
+            .where(
+                PaymentWebhookInbox.processed_at.is_(None),
+                PaymentWebhookInbox.received_at < older_than,
+                PaymentWebhookInbox.attempts < max_attempts,
+            )
+            .group_by(PaymentWebhookInbox.provider_order_id)
+            .limit(limit)
+        )
+    )
+
+
+def exhausted_webhook_events(db: Session, *, max_attempts: int, limit: int = 100) -> list:
+    """Unprocessed inbox events that used up their *max_attempts* (dead letters)."""
+    return db.execute(
+        select(
+            PaymentWebhookInbox.id,
+            PaymentWebhookInbox.provider_order_id,
+            PaymentWebhookInbox.event_type,
+            PaymentWebhookInbox.attempts,
+            PaymentWebhookInbox.last_error,
+        )
+        .where(
+            PaymentWebhookInbox.processed_at.is_(None),
+            PaymentWebhookInbox.attempts >= max_attempts,
+        )
+        .order_by(PaymentWebhookInbox.received_at)
+        .limit(limit)
+    ).all()
+
+
+# ---------------------------------------------------------------------------
+# Reconciliation
+# ---------------------------------------------------------------------------
+# Local states a missed webhook / verify can leave a payment stuck in
+RECONCILABLE_STATUSES = (PaymentStatus.CREATED, PaymentStatus.AUTHORIZED)
+
+# When an order has several payment attempts, the most final one wins
+_PROVIDER_STATUS_RANK = {"failed": 0, "authorized": 1, "captured": 2, "refunded": 3}
+
+_IN_CHUNK = 500
+
+
+def expire_pending_payments(db: Session, older_than: datetime) -> int:
+    """
+    Mark PENDING intents recorded before *older_than* as FAILED.  They are
+    left behind when the process creating the Razorpay order died between
+    its two transactions; with no order id there is nothing to reconcile.
+    """
+    result = db.execute(
+        update(Payment)
+        .where(Payment.status == PaymentStatus.PENDING, Payment.created_at < older_than)
+        .values(status=PaymentStatus.FAILED)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def iter_provider_payments(
+    client, *, from_ts: int, to_ts: int, page_size: int = 100, max_pages: int | None = None,
+) -> Iterator[dict]:
+    """
+    Page through Razorpay payments created in ``[from_ts, to_ts]`` (unix
+    seconds) until a short page.  With *max_pages*, raises instead of
+    silently stopping when the window holds more than that.
+    """
+    page = 0
+    while True:
+        if max_pages is not None and page >= max_pages:
+            raise RuntimeError(
+                f"More than {max_pages * page_size} Razorpay payments between "
+                f"{from_ts} and {to_ts}; narrow the reconciliation window"
+            )
+        batch = client.payment.all(
+            {"from": from_ts, "to": to_ts, "count": page_size, "skip": page * page_size}
+        )
+        items = batch.get("items") or []
+        yield from items
+        if len(items) < page_size:
+            return
+        page += 1
+
+
+def latest_provider_payment_by_order(provider_payments: Iterable[dict]) -> dict[str, dict]:
+    """Pick, per order id, the provider payment whose status is most final."""
+    best: dict[str, dict] = {}
+    for item in provider_payments:
+        order_id = item.get("order_id")
+        if not order_id or item.get("status") not in _PROVIDER_STATUS_RANK:
+            continue
+        current = best.get(order_id)
+        if current is None or (
+            _PROVIDER_STATUS_RANK[item["status"]] > _PROVIDER_STATUS_RANK[current["status"]]
+        ):
+            best[order_id] = item
+    return best
+
+
+def reconcile_razorpay_payments(db: Session, provider_payments: Iterable[dict]) -> dict:
+    """
+    Diff provider payments against local ``CREATED`` / ``AUTHORIZED`` rows
+    and apply the corrections plus one audit ``PaymentEvent`` per corrected
+    payment.  Corrections are batched per (observed, new) status pair; each
+    batch is a compare-and-set on the observed status, so a payment a
+    webhook moved in the meantime is left alone.  Commits.
+    """
+    by_order = latest_provider_payment_by_order(provider_payments)
+
+    order_ids = list(by_order)
+    local_rows = []
+    for i in range(0, len(order_ids), _IN_CHUNK):
+        local_rows += db.execute(
+            select(
+                Payment.id, Payment.tenant_id, Payment.appointment_id,
+                Payment.provider_order_id, Payment.status,
+            ).where(
+                Payment.provider_order_id.in_(order_ids[i:i + _IN_CHUNK]),
+                Payment.status.in_(RECONCILABLE_STATUSES),
+            )
+        ).all()
+
+    # (observed status, new status) -> [(local row, provider payment)]
+    groups: dict[tuple[str, str], list[tuple]] = {}
+    for row in local_rows:
+        item = by_order[row.provider_order_id]
+        new_status = STATUS_MAP[item["status"]]
+        if new_status != row.status:
+            groups.setdefault((row.status, new_status), []).append((row, item))
+
+    events = []
+    appt_updates: dict[str, list[uuid.UUID]] = {}
+    for (local_status, new_status), pairs in groups.items():
+        for i in range(0, len(pairs), _IN_CHUNK):
+            chunk = dict((row.id, (row, item)) for row, item in pairs[i:i + _IN_CHUNK])
+            # Compare-and-set on the observed status so a concurrent webhook wins
+            updated = db.scalars(
+                update(Payment)
+                .where(Payment.id.in_(list(chunk)), Payment.status == local_status)
+                .values(
+                    status=new_status,
+                    provider_payment_id=case(
+                        {pay_id: item["id"] for pay_id, (_, item) in chunk.items()},
+                        value=Payment.id,
+                    ),
+                )
+                .returning(Payment.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            for pay_id in updated:
+                row, item = chunk[pay_id]
+                events.append(
+                    {
+                        "tenant_id": row.tenant_id,
+                        "provider": PaymentProvider.RAZORPAY,
+                        "event_type": f"reconcile.{item['status']}",
+                        "provider_event_id": item["id"],
+                        "provider_order_id": row.provider_order_id,
+                        "provider_payment_id": item["id"],
+                        "payload": {"razorpay_payment": item, "previous_status": local_status},
+                    }
+                )
+                if new_status in APPT_STATUS_MAP:
+                    appt_updates.setdefault(APPT_STATUS_MAP[new_status], []).append(row.appointment_id)
+
+    for appt_status, appt_ids in appt_updates.items():
+        db.execute(
+            update(Appointment)
+            .where(Appointment.id.in_(appt_ids))
+            .values(payment_status=appt_status)
+        )
+    if events:
+        record_payment_events(db, events)
+    db.commit()
+    report_cache.bump(event["tenant_id"] for event in events)
+
+    return {
+        "provider_orders": len(by_order),
+        "checked": len(local_rows),
+        "corrected": len(events),
+    }
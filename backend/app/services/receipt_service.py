@@ -1,19 +1,273 @@
+"""
+Payment receipt PDFs.
+
+The page layout (fonts, page tree, title line) never changes, so it is
+serialized once per process by ``ReceiptTemplate``; each receipt only
+writes its own content stream and cross-reference table.  The output is
+the same single A4 page ReportLab used to draw for us.
+
+The template uses the standard Helvetica font, which only covers WinAnsi
+(cp1252).  Receipts with other characters (e.g. Devanagari or Tamil
+customer names) are drawn by ReportLab with the TrueType fonts listed in
+``RECEIPT_UNICODE_FONTS`` embedded instead.
+
+``iter_receipts_zip`` renders many receipts on the process pool created at
+startup (``start_export_pool``) and yields a ZIP archive chunk by chunk for
+streaming responses.
+"""
+
+import multiprocessing
+import os
+import unicodedata
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
 from io import BytesIO
-from reportlab.pdfgen import canvas
+from typing import Iterable, Iterator
 
-def generate_receipt_pdf(receipt_no: str, customer_name: str, amount: float, currency: str) -> bytes:
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer)
+from app.core.config import settings
+
+_PAGE_SIZE = (595.2756, 841.8898)  # A4 in points
+
+ReceiptRow = tuple[str, str, float, str]  # receipt_no, customer_name, amount, currency
+
+
+def _fits_winansi(*values: str) -> bool:
+    try:
+        for value in values:
+            value.encode("cp1252")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _pdf_text(value: str) -> bytes:
+    """Encode *value* (WinAnsi-only, see ``_fits_winansi``) as a PDF literal string."""
+    raw = value.encode("cp1252")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class ReceiptTemplate:
+    """Pre-serialized static part of the receipt PDF."""
+
+    def __init__(self):
+        width, height = _PAGE_SIZE
+        static_objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [ 3 0 R ] /Count 1 >>",
+            (
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [ 0 0 %.4f %.4f ] "
+                b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>"
+                % (width, height)
+            ),
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        ]
+
+        header = bytearray(b"%PDF-1.3\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(static_objects, start=1):
+            offsets.append(len(header))
+            header += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+        self.header = bytes(header)
+        self.offsets = offsets
+        self.content_prefix = b"BT /F2 16 Tf 50 800 Td " + _pdf_text("SmartServe Payment Receipt") + b" Tj ET\n"
+
+    def render(self, receipt_no: str, customer_name: str, amount: float, currency: str) -> bytes:
+        content = self.content_prefix + b"BT /F1 12 Tf 50 760 Td %s Tj 0 -20 Td %s Tj 0 -20 Td %s Tj ET\n" % (
+            _pdf_text(f"Receipt No: {receipt_no}"),
+            _pdf_text(f"Customer: {customer_name}"),
+            _pdf_text(f"Amount: {amount:.2f} {currency}"),
+        )
+
+        out = bytearray(self.header)
+        content_offset = len(out)
+        out += b"6 0 obj\n<< /Length %d >>\nstream\n" % len(content)
+        out += content + b"endstream\nendobj\n"
+
+        xref_offset = len(out)
+        out += b"xref\n0 7\n0000000000 65535 f \n"
+        for offset in (*self.offsets, content_offset):
+            out += b"%010d 00000 n \n" % offset
+        out += b"trailer\n<< /Size 7 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+        return bytes(out)
+
+
+_template: ReceiptTemplate | None = None
+
+
+def _get_template() -> ReceiptTemplate:
+    global _template
+    if _template is None:
+        _template = ReceiptTemplate()
+    return _template
+
+
+class UnicodeFonts:
+    """
+    TrueType fonts for receipts the template cannot encode.  Text is split
+    into runs by which font has the glyphs: the first font unless only a
+    fallback covers the character.  Complex scripts are shaped by ReportLab
+    when ``uharfbuzz`` is installed.
+    """
+
+    def __init__(self, paths: list[str]):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        self.fonts: list[tuple[str, dict]] = []
+        for index, path in enumerate(paths):
+            if index and not os.path.exists(path):
+                continue
+            try:
+                font = TTFont(f"ReceiptUnicode{index}", path)
+            except Exception as exc:
+                if index:
+                    continue
+                raise RuntimeError(
+                    f"Receipt font {path!r} could not be loaded (RECEIPT_UNICODE_FONTS)"
+                ) from exc
+            pdfmetrics.registerFont(font)
+            self.fonts.append((font.fontName, font.face.charToGlyph))
+
+    def runs(self, text: str) -> list[tuple[str, str]]:
+        """``(font name, text)`` runs covering *text*."""
+        runs: list[tuple[str, list[str]]] = []
+        for ch in text:
+            if runs and (ch.isspace() or unicodedata.category(ch).startswith("M")):
+                # Keep spaces and combining marks with the preceding letter
+                font = runs[-1][0]
+            else:
+                font = next(
+                    (name for name, cmap in self.fonts if ord(ch) in cmap), self.fonts[0][0],
+                )
+            if runs and runs[-1][0] == font:
+                runs[-1][1].append(ch)
+            else:
+                runs.append((font, [ch]))
+        return [(font, "".join(chars)) for font, chars in runs]
 
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, 800, "SmartServe Payment Receipt")
 
-    c.setFont("Helvetica", 12)
-    c.drawString(50, 760, f"Receipt No: {receipt_no}")
-    c.drawString(50, 740, f"Customer: {customer_name}")
-    c.drawString(50, 720, f"Amount: {amount:.2f} {currency}")
+_unicode_fonts: UnicodeFonts | None = None
 
+
+def _get_unicode_fonts() -> UnicodeFonts:
+    global _unicode_fonts
+    if _unicode_fonts is None:
+        _unicode_fonts = UnicodeFonts(settings.receipt_unicode_fonts)
+    return _unicode_fonts
+
+
+def _render_unicode(receipt_no: str, customer_name: str, amount: float, currency: str) -> bytes:
+    """Same layout as ``ReceiptTemplate``, drawn by ReportLab with embedded TrueType fonts."""
+    from reportlab.pdfgen import canvas
+
+    fonts = _get_unicode_fonts()
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=_PAGE_SIZE)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, 800, "SmartServe Payment Receipt")
+    lines = (
+        f"Receipt No: {receipt_no}",
+        f"Customer: {customer_name}",
+        f"Amount: {amount:.2f} {currency}",
+    )
+    for y, line in zip((760, 740, 720), lines):
+        text = c.beginText(50, y)
+        for font, run in fonts.runs(line):
+            text.setFont(font, 12)
+            text.textOut(run)
+        c.drawText(text)
     c.showPage()
     c.save()
-
     return buffer.getvalue()
+
+
+def generate_receipt_pdf(receipt_no: str, customer_name: str, amount: float, currency: str) -> bytes:
+    if _fits_winansi(receipt_no, customer_name, currency):
+        return _get_template().render(receipt_no, customer_name, amount, currency)
+    return _render_unicode(receipt_no, customer_name, amount, currency)
+
+
+# ---------------------------------------------------------------------------
+# Bulk export
+# ---------------------------------------------------------------------------
+def _render_chunk(rows: list[ReceiptRow]) -> list[tuple[str, bytes]]:
+    return [
+        (f"receipt_{receipt_no}.pdf", generate_receipt_pdf(receipt_no, name, amount, currency))
+        for receipt_no, name, amount, currency in rows
+    ]
+
+
+class _ZipSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._pos = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def start_export_pool(workers: int) -> None:
+    """
+    Create the bulk-export process pool (application startup).  Workers are
+    spawned, not forked, so they never inherit the API's threads or locks.
+    ``workers=0`` keeps rendering in the request thread.
+    """
+    global _pool
+    if workers > 0 and _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        )
+
+
+def shutdown_export_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def export_pool() -> ProcessPoolExecutor | None:
+    return _pool
+
+
+def iter_receipts_zip(
+    rows: Iterable[ReceiptRow], *, executor: Executor | None = None, chunk_size: int = 200,
+) -> Iterator[bytes]:
+    """
+    Render *rows* on *executor* (in the calling thread when ``None``) and
+    yield a ZIP archive of the PDFs as it is produced.
+    """
+    rows = list(rows)
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    if executor is not None and len(chunks) > 1:
+        rendered = executor.map(_render_chunk, chunks)
+    else:
+        rendered = map(_render_chunk, chunks)
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for chunk in rendered:
+            for name, pdf_bytes in chunk:
+                archive.writestr(name, pdf_bytes)
+            yield sink.drain()
+    yield sink.drain()
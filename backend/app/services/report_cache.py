@@ -0,0 +1,241 @@
+"""
+Cache for ``/reports/*`` responses.
+
+Entries are keyed by tenant, report name, normalized query parameters and
+the tenant's data version.  Appointment and payment writes call ``bump``
+after they commit, which moves the tenant to a new version: older entries
+are never read again and simply expire.
+
+* Version counter — ``INCR report:ver:<tenant>`` in Redis.  Bumps come from
+  API processes and Celery workers alike, so the counter cannot live in one
+  process: with ``REPORT_CACHE_USE_REDIS=false`` (or Redis unreachable)
+  nothing is cached.
+* Entries — per-process LRU in front of Redis (``SET ... EX``).
+* Single-flight — concurrent misses of one key run the query once: other
+  threads wait on the leader's event, other processes on a ``SET NX`` lock.
+* ETag — derived from the versioned key, so ``If-None-Match`` is answered
+  with one version lookup and no query.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from app.core.config import settings
+
+_POLL_SEC = 0.05
+
+
+def _version_key(tenant_id: uuid.UUID) -> str:
+    return f"report:ver:{tenant_id}"
+
+
+class ReportCache:
+    def __init__(
+        self,
+        *,
+        ttl_sec: int,
+        max_local_entries: int,
+        lock_timeout_sec: float,
+        redis_url: str | None = None,
+    ):
+        self.ttl_sec = ttl_sec
+        self.max_local_entries = max_local_entries
+        self.lock_timeout_sec = lock_timeout_sec
+        self.redis_url = redis_url
+
+        self._local: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._inflight: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._counters = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "coalesced": 0,
+            "misses": 0,
+            "bumps": 0,
+            "redis_errors": 0,
+        }
+
+    # -- internals ---------------------------------------------------------
+    def _incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _get_redis(self):
+        if not self.redis_url:
+            return None
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(
+                self.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5,
+            )
+        return self._redis
+
+    def _local_get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return body
+
+    def _local_set(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl_sec, body)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def _redis_get(self, r, key: str) -> bytes | None:
+        try:
+            body = r.get(key)
+        except Exception:
+            self._incr("redis_errors")
+            return None
+        if body is not None:
+            self._local_set(key, body)
+        return body
+
+    def _compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        """Run *compute* once across processes (best effort) and store the result."""
+        r = self._get_redis()
+        lock_key = key + ":lock"
+        locked = False
+        if r is not None:
+            try:
+                locked = bool(r.set(lock_key, 1, nx=True, px=int(self.lock_timeout_sec * 1000)))
+            except Exception:
+                self._incr("redis_errors")
+                r = None
+        if r is not None and not locked:
+            # Another process is computing this entry: wait for it
+            deadline = time.monotonic() + self.lock_timeout_sec
+            while time.monotonic() < deadline:
+                time.sleep(_POLL_SEC)
+                body = self._redis_get(r, key)
+                if body is not None:
+                    self._incr("coalesced")
+                    return body
+
+        self._incr("misses")
+        body = compute()
+        self._local_set(key, body)
+        if r is not None:
+            try:
+                pipe = r.pipeline(transaction=False)
+                pipe.set(key, body, ex=self.ttl_sec)
+                if locked:
+                    pipe.delete(lock_key)
+                pipe.execute()
+            except Exception:
+                self._incr("redis_errors")
+        return body
+
+    # -- public API --------------------------------------------------------
+    def version(self, tenant_id: uuid.UUID) -> int | None:
+        """Current data version of the tenant, ``None`` if it cannot be read."""
+        r = self._get_redis()
+        if r is None:
+            return None
+        try:
+            return int(r.get(_version_key(tenant_id)) or 0)
+        except Exception:
+            self._incr("redis_errors")
+            return None
+
+    def bump(self, tenant_ids: Iterable[uuid.UUID]) -> None:
+        """Invalidate every cached report of the given tenants."""
+        tenant_ids = set(tenant_ids)
+        r = self._get_redis()
+        if not tenant_ids or r is None:
+            return
+        self._incr("bumps", len(tenant_ids))
+        try:
+            pipe = r.pipeline(transaction=False)
+            for tenant_id in tenant_ids:
+                pipe.incr(_version_key(tenant_id))
+            pipe.execute()
+        except Exception:
+            self._incr("redis_errors")
+
+    def key(self, tenant_id: uuid.UUID, name: str, params: dict) -> str | None:
+        """Versioned entry key, ``None`` when the version store is unavailable."""
+        version = self.version(tenant_id)
+        if version is None:
+            return None
+        normalized = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+        return f"report:{tenant_id}:{version}:{name}:{digest}"
+
+    @staticmethod
+    def etag(key: str) -> str:
+        return '"' + hashlib.sha1(key.encode()).hexdigest()[:32] + '"'
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> bytes:
+        body = self._local_get(key)
+        if body is not None:
+            self._incr("local_hits")
+            return body
+
+        r = self._get_redis()
+        if r is not None:
+            body = self._redis_get(r, key)
+            if body is not None:
+                self._incr("redis_hits")
+                return body
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.lock_timeout_sec)
+            body = self._local_get(key)
+            if body is not None:
+                self._incr("coalesced")
+                return body
+            # The leader failed or is too slow: run the query here
+            self._incr("misses")
+            return compute()
+
+        try:
+            return self._compute(key, compute)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["local_entries"] = len(self._local)
+        lookups = (
+            counters["local_hits"] + counters["redis_hits"]
+            + counters["coalesced"] + counters["misses"]
+        )
+        counters["hit_rate"] = (
+            round((lookups - counters["misses"]) / lookups, 4) if lookups else 0.0
+        )
+        counters["redis_enabled"] = bool(self.redis_url)
+        return counters
+
+
+report_cache = ReportCache(
+    ttl_sec=settings.REPORT_CACHE_TTL_SEC,
+    max_local_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+    lock_timeout_sec=settings.REPORT_CACHE_LOCK_TIMEOUT_SEC,
+    redis_url=settings.REDIS_URL if settings.REPORT_CACHE_USE_REDIS else None,
+)
@@ -0,0 +1,235 @@
+"""
+Incremental maintenance of the daily report rollups.
+
+Every appointment contributes to three rollup rows (branch-day, and per
+service / per staff member for confirmed bookings).  Writes call
+``RollupDelta.add_appointment`` with ``sign=+1`` for the new state and
+``sign=-1`` for the state being replaced, then ``apply`` upserts the
+accumulated deltas in the same transaction as the appointment change.
+
+``rebuild_report_rollups`` recomputes the rollups from ``appointments``
+(``python -m app.services.report_rollups [--tenant-id ID]``).
+"""
+
+import argparse
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import Date, case, cast, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.appointment_service import AppointmentService
+from app.models.report_rollup import ReportDailyBranch, ReportDailyService, ReportDailyStaff
+from app.services.report_cache import report_cache
+
+ServiceLine = tuple[uuid.UUID, Decimal | float]  # service_id, price_snapshot
+
+
+def rollup_day(start_at: datetime) -> date:
+    """UTC day an appointment is reported under (naive values are UTC)."""
+    if start_at.tzinfo is not None:
+        start_at = start_at.astimezone(timezone.utc)
+    return start_at.date()
+
+
+class RollupDelta:
+    def __init__(self):
+        self.branch: dict[tuple, list] = defaultdict(lambda: [0, 0, 0, Decimal(0)])
+        self.service: dict[tuple, list] = defaultdict(lambda: [0, Decimal(0)])
+        self.staff: dict[tuple, list] = defaultdict(lambda: [0, Decimal(0)])
+
+    def add_appointment(
+        self,
+        *,
+        tenant_id: uuid.UUID,
+        branch_id: uuid.UUID,
+        staff_user_id: uuid.UUID,
+        start_at: datetime,
+        status: str,
+        lines: Iterable[ServiceLine],
+        sign: int = 1,
+    ) -> None:
+        day = rollup_day(start_at)
+        confirmed = status == AppointmentStatus.CONFIRMED
+
+        branch = self.branch[(tenant_id, branch_id, day)]
+        branch[0] += sign
+        if status == AppointmentStatus.CANCELLED:
+            branch[2] += sign
+        if not confirmed:
+            return
+
+        branch[1] += sign
+        staff = self.staff[(tenant_id, branch_id, day, staff_user_id)]
+        staff[0] += sign
+        for service_id, price in lines:
+            price = Decimal(str(price))
+            branch[3] += sign * price
+            staff[1] += sign * price
+            svc = self.service[(tenant_id, branch_id, day, service_id)]
+            svc[0] += sign
+            svc[1] += sign * price
+
+    def apply(self, db: Session) -> None:
+        """Upsert the accumulated deltas (does not commit)."""
+        branch_rows = [
+            {
+                "tenant_id": t, "branch_id": b, "day": d,
+                "appointments": n, "confirmed": c, "cancelled": x, "revenue": r,
+            }
+            for (t, b, d), (n, c, x, r) in self.branch.items()
+            if n or c or x or r
+        ]
+        service_rows = [
+            {"tenant_id": t, "branch_id": b, "day": d, "service_id": s, "bookings": n, "revenue": r}
+            for (t, b, d, s), (n, r) in self.service.items()
+            if n or r
+        ]
+        staff_rows = [
+            {"tenant_id": t, "branch_id": b, "day": d, "staff_user_id": s, "appointments": n, "revenue": r}
+            for (t, b, d, s), (n, r) in self.staff.items()
+            if n or r
+        ]
+        _upsert_add(db, ReportDailyBranch, branch_rows,
+                    ["tenant_id", "branch_id", "day"],
+                    ["appointments", "confirmed", "cancelled", "revenue"])
+        _upsert_add(db, ReportDailyService, service_rows,
+                    ["tenant_id", "branch_id", "day", "service_id"],
+                    ["bookings", "revenue"])
+        _upsert_add(db, ReportDailyStaff, staff_rows,
+                    ["tenant_id", "branch_id", "day", "staff_user_id"],
+                    ["appointments", "revenue"])
+
+
+def _upsert_add(db: Session, model, rows: list[dict], keys: list[str], counters: list[str]) -> None:
+    if not rows:
+        return
+    stmt = pg_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters},
+    )
+    db.execute(stmt, rows)
+
+
+def appointment_lines(db: Session, appointment_id: uuid.UUID) -> list[ServiceLine]:
+    return [
+        (r.service_id, r.price_snapshot)
+        for r in db.execute(
+            select(AppointmentService.service_id, AppointmentService.price_snapshot)
+            .where(AppointmentService.appointment_id == appointment_id)
+        )
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Rebuild
+# ---------------------------------------------------------------------------
+def _day_expr(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", Appointment.start_at), Date)
+    return func.date(Appointment.start_at)
+
+
+def rebuild_report_rollups(db: Session, tenant_id: uuid.UUID | None = None) -> dict:
+    """Recompute all rollups (of one tenant, or every tenant) from scratch and commit."""
+    day = _day_expr(db).label("day")
+    confirmed = Appointment.status == AppointmentStatus.CONFIRMED
+
+    def scoped(q, model=Appointment):
+        return q.where(model.tenant_id == tenant_id) if tenant_id is not None else q
+
+    for model in (ReportDailyBranch, ReportDailyService, ReportDailyStaff):
+        db.execute(scoped(delete(model), model))
+
+    revenue = (
+        select(
+            AppointmentService.appointment_id,
+            func.sum(AppointmentService.price_snapshot).label("revenue"),
+        )
+        .group_by(AppointmentService.appointment_id)
+        .subquery()
+    )
+    db.execute(
+        insert(ReportDailyBranch).from_select(
+            ["tenant_id", "branch_id", "day", "appointments", "confirmed", "cancelled", "revenue"],
+            scoped(
+                select(
+                    Appointment.tenant_id,
+                    Appointment.branch_id,
+                    day,
+                    func.count(),
+                    func.count().filter(confirmed),
+                    func.count().filter(Appointment.status == AppointmentStatus.CANCELLED),
+                    func.coalesce(
+                        func.sum(case((confirmed, revenue.c.revenue), else_=0)), 0,
+                    ),
+                )
+                .outerjoin(revenue, revenue.c.appointment_id == Appointment.id)
+                .group_by(Appointment.tenant_id, Appointment.branch_id, day)
+            ),
+        )
+    )
+    db.execute(
+        insert(ReportDailyService).from_select(
+            ["tenant_id", "branch_id", "day", "service_id", "bookings", "revenue"],
+            scoped(
+                select(
+                    Appointment.tenant_id,
+                    Appointment.branch_id,
+                    day,
+                    AppointmentService.service_id,
+                    func.count(),
+                    func.sum(AppointmentService.price_snapshot),
+                )
+                .join(AppointmentService, AppointmentService.appointment_id == Appointment.id)
+                .where(confirmed)
+                .group_by(Appointment.tenant_id, Appointment.branch_id, day, AppointmentService.service_id)
+            ),
+        )
+    )
+    db.execute(
+        insert(ReportDailyStaff).from_select(
+            ["tenant_id", "branch_id", "day", "staff_user_id", "appointments", "revenue"],
+            scoped(
+                select(
+                    Appointment.tenant_id,
+                    Appointment.branch_id,
+                    day,
+                    Appointment.staff_user_id,
+                    func.count(),
+                    func.coalesce(func.sum(revenue.c.revenue), 0),
+                )
+                .outerjoin(revenue, revenue.c.appointment_id == Appointment.id)
+                .where(confirmed)
+                .group_by(Appointment.tenant_id, Appointment.branch_id, day, Appointment.staff_user_id)
+            ),
+        )
+    )
+    db.commit()
+    report_cache.bump(
+        [tenant_id] if tenant_id is not None
+        else db.scalars(select(ReportDailyBranch.tenant_id).distinct())
+    )
+
+    return {
+        "branch_days": db.scalar(scoped(select(func.count()).select_from(ReportDailyBranch), ReportDailyBranch)),
+        "service_days": db.scalar(scoped(select(func.count()).select_from(ReportDailyService), ReportDailyService)),
+        "staff_days": db.scalar(scoped(select(func.count()).select_from(ReportDailyStaff), ReportDailyStaff)),
+    }
+
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily report rollups.")
+    parser.add_argument("--tenant-id", type=uuid.UUID, default=None)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        print(rebuild_report_rollups(session, args.tenant_id))
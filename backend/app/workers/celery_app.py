@@ -11,5 +11,25 @@ celery_app = Celery(
 celery_app.conf.timezone = "Asia/Kolkata"
 celery_app.conf.enable_utc = False
 
+# Periodic jobs (run `celery -A app.workers.celery_app beat`)
+celery_app.conf.beat_schedule = {
+    "purge-expired-slot-holds": {
+        "task": "app.workers.tasks.purge_expired_slot_holds",
+        "schedule": 60.0,
+    },
+    "sweep-razorpay-webhooks": {
+        "task": "app.workers.tasks.sweep_razorpay_webhooks",
+        "schedule": 60.0,
+    },
+    "reconcile-razorpay-payments": {
+        "task": "app.workers.tasks.reconcile_razorpay_payments",
+        "schedule": 900.0,
+    },
+    "maintain-payment-events": {
+        "task": "app.workers.tasks.maintain_payment_events",
+        "schedule": 86400.0,
+    },
+}
+
 # ✅ IMPORTANT: autodiscover tasks inside app.workers
 celery_app.autodiscover_tasks(["app.workers"])
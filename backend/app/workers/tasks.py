@@ -1,13 +1,33 @@
 from __future__ import annotations
 
 import hashlib
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from celery.utils.log import get_task_logger
+from sqlalchemy import delete, select
+
 from app.core.config import settings
+from app.db.session import SessionLocal
 from app.integration.email import send_email_smtp
+from app.models.customer import Customer
+from app.models.payment import Payment
+from app.models.slot_hold import SlotHold
+from app.services.payment_service import (
+    expire_pending_payments,
+    iter_provider_payments,
+    process_pending_webhooks,
+    reconcile_razorpay_payments as reconcile_payments,
+    exhausted_webhook_events,
+    record_webhook_failure,
+    stale_pending_webhook_orders,
+)
+from app.services.receipt_service import generate_receipt_pdf
 from app.workers.celery_app import celery_app
 
+logger = get_task_logger(__name__)
+
 
 @celery_app.task(name="app.workers.tasks.ping_task")
 def ping_task():
@@ -63,3 +83,130 @@ def send_booking_email(self, to_email: str, subject: str, body: str, attachment_
         attachment_name=attachment_name,
     )
     return {"ok": True, "attachment_sha256": _hash_bytes(attachment_bytes) if attachment_bytes else None}
+
+
+@celery_app.task(
+    name="app.workers.tasks.send_payment_receipt",
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 5},
+)
+def send_payment_receipt(self, payment_id: str):
+    """Load a captured payment, render its PDF receipt and email it."""
+    with SessionLocal() as db:
+        row = db.execute(
+            select(Payment.id, Payment.amount, Payment.currency, Customer.full_name, Customer.email)
+            .outerjoin(
+                Customer,
+                (Customer.tenant_id == Payment.tenant_id) & (Customer.id == Payment.customer_id),
+            )
+            .where(Payment.id == uuid.UUID(payment_id))
+        ).first()
+    if row is None:
+        return {"ok": False, "reason": "payment not found"}
+
+    pay_id, amount, currency, customer_name, customer_email = row
+    pdf_bytes = generate_receipt_pdf(
+        receipt_no=str(pay_id),
+        customer_name=customer_name or "Customer",
+        amount=float(amount),
+        currency=currency,
+    )
+    send_email_smtp(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASS,
+        to_email=customer_email or "fallback@email.com",
+        subject="Payment Receipt",
+        body="Your payment was successful. Receipt attached.",
+        attachment_bytes=pdf_bytes,
+        attachment_name=f"receipt_{pay_id}.pdf",
+    )
+    return {"ok": True, "attachment_sha256": _hash_bytes(pdf_bytes)}
+
+
+@celery_app.task(name="app.workers.tasks.purge_expired_slot_holds")
+def purge_expired_slot_holds():
+    """
+    Delete every expired slot hold in one statement, and fail payment
+    intents whose Razorpay order was never created.
+    """
+    now = datetime.now(timezone.utc)
+    pending_before = now - timedelta(seconds=settings.RAZORPAY_PENDING_INTENT_TIMEOUT_SEC)
+    with SessionLocal() as db:
+        result = db.execute(delete(SlotHold).where(SlotHold.expires_at <= now))
+        expired = expire_pending_payments(db, pending_before)
+        db.commit()
+    return {"ok": True, "deleted": result.rowcount, "expired_payments": expired}
+
+
+@celery_app.task(
+    name="app.workers.tasks.process_razorpay_webhooks",
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 8},
+)
+def process_razorpay_webhooks(self, provider_order_id: str):
+    """Apply the pending inbox events of one Razorpay order, in order."""
+    with SessionLocal() as db:
+        try:
+            processed = process_pending_webhooks(db, provider_order_id)
+        except Exception as exc:
+            db.rollback()
+            record_webhook_failure(db, provider_order_id, exc)
+            raise
+    return {"ok": True, "processed": processed}
+
+
+@celery_app.task(name="app.workers.tasks.sweep_razorpay_webhooks")
+def sweep_razorpay_webhooks():
+    """
+    Re-enqueue orders whose events were stored but never processed.  Events
+    that already failed ``RAZORPAY_WEBHOOK_MAX_ATTEMPTS`` times are not
+    retried again; they are logged as dead letters for an operator.
+    """
+    max_attempts = settings.RAZORPAY_WEBHOOK_MAX_ATTEMPTS
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=30)
+    with SessionLocal() as db:
+        order_ids = stale_pending_webhook_orders(db, cutoff, max_attempts=max_attempts)
+        dead = exhausted_webhook_events(db, max_attempts=max_attempts)
+    for order_id in order_ids:
+        process_razorpay_webhooks.delay(order_id)
+    for row in dead:
+        logger.error(
+            "Razorpay webhook %s (%s, order %s) gave up after %d attempts: %s",
+            row.id, row.event_type, row.provider_order_id, row.attempts, row.last_error,
+        )
+    return {"ok": True, "enqueued": len(order_ids), "dead_letters": len(dead)}
+
+
+@celery_app.task(name="app.workers.tasks.reconcile_razorpay_payments")
+def reconcile_razorpay_payments(window_hours: int = 24):
+    """
+    Catch payments stuck in CREATED / AUTHORIZED because a webhook or the
+    checkout verify never arrived: page through Razorpay payments of the
+    window in bulk and apply the differences.
+    """
+    from app.integration.razorpay_client import client
+
+    to_ts = int(datetime.now(timezone.utc).timestamp())
+    from_ts = to_ts - window_hours * 3600
+    provider_payments = list(iter_provider_payments(client, from_ts=from_ts, to_ts=to_ts))
+    with SessionLocal() as db:
+        result = reconcile_payments(db, provider_payments)
+    return {"ok": True, **result}
+
+
+@celery_app.task(name="app.workers.tasks.maintain_payment_events")
+def maintain_payment_events():
+    """Pre-create payment_events partitions, compact old payloads, archive old months."""
+    from app.services.payment_event_storage import maintain_payment_events as maintain
+
+    with SessionLocal() as db:
+        result = maintain(db)
+    return {"ok": True, **result}
@@ -0,0 +1,78 @@
+"""
+Receipt rendering benchmark (not collected by pytest).
+
+    python -m tests.bench_receipts [--count 2000] [--workers 0 2 4]
+
+Compares the plain ReportLab canvas the renderer replaced, the template
+path, the embedded-font path for non-WinAnsi names and the ZIP export
+with different process pool sizes.
+"""
+
+import argparse
+import time
+from io import BytesIO
+
+from app.services.receipt_service import (
+    _render_unicode,
+    export_pool,
+    generate_receipt_pdf,
+    iter_receipts_zip,
+    shutdown_export_pool,
+    start_export_pool,
+)
+
+
+def _reportlab_canvas(receipt_no: str, customer_name: str, amount: float, currency: str) -> bytes:
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, 800, "SmartServe Payment Receipt")
+    c.setFont("Helvetica", 12)
+    c.drawString(50, 760, f"Receipt No: {receipt_no}")
+    c.drawString(50, 740, f"Customer: {customer_name}")
+    c.drawString(50, 720, f"Amount: {amount:.2f} {currency}")
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _rate(label: str, count: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {count / elapsed:>12,.0f} receipts/s  ({elapsed:.2f} s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    rows = [(f"pay_{i:08d}", f"Customer {i}", 100.0 + i, "INR") for i in range(args.count)]
+    unicode_rows = [(no, f"Иван {i}", amount, cur) for i, (no, _, amount, cur) in enumerate(rows)]
+
+    _render_unicode(*unicode_rows[0])  # font loading is a one-off cost
+    _rate("reportlab canvas (before)", args.count, lambda: [_reportlab_canvas(*r) for r in rows])
+    _rate("template", args.count, lambda: [generate_receipt_pdf(*r) for r in rows])
+    _rate("embedded font (non-WinAnsi)", args.count, lambda: [generate_receipt_pdf(*r) for r in unicode_rows])
+
+    for workers in args.workers:
+        start_export_pool(workers)
+        try:
+            executor = export_pool()
+            if executor is not None:
+                list(iter_receipts_zip(rows[:workers], executor=executor, chunk_size=1))  # warm up
+            _rate(
+                f"zip export, {workers} workers",
+                args.count,
+                lambda: sum(len(c) for c in iter_receipts_zip(rows, executor=executor)),
+            )
+        finally:
+            shutdown_export_pool()
+
+
+if __name__ == "__main__":
+    main()
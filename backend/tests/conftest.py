@@ -0,0 +1,157 @@
+"""
+Shared fixtures.  Tests run against a throwaway SQLite database; the
+settings are pointed at it before any ``app`` module is imported.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+_DB_DIR = tempfile.mkdtemp(prefix="smartserve-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_DB_DIR, 'test.sqlite')}",
+    JWT_SECRET="test-secret-" + "x" * 32,
+    ENV="test",
+    AVAILABILITY_CACHE_USE_REDIS="false",
+    REPORT_CACHE_USE_REDIS="false",
+    RECEIPT_EXPORT_WORKERS="0",
+)
+
+import pytest  # noqa: E402
+from fastapi import APIRouter, FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.security import create_access_token  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.branch import Branch  # noqa: E402
+from app.models.customer import Customer  # noqa: E402
+from app.models.service import Service  # noqa: E402
+from app.models.staff import Staff  # noqa: E402
+from app.models.tenant import Tenant  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def tenant(db):
+    """One tenant with a branch, a service, a staff member and a customer."""
+    t = Tenant(id=uuid.uuid4(), name="Salon")
+    db.add(t)
+    db.flush()
+    branch = Branch(id=uuid.uuid4(), tenant_id=t.id, name="Main")
+    service = Service(id=uuid.uuid4(), tenant_id=t.id, name="Cut", duration_min=30, price=100)
+    staff = Staff(id=uuid.uuid4(), tenant_id=t.id, full_name="Ann")
+    customer = Customer(id=uuid.uuid4(), tenant_id=t.id, full_name="Cus", phone="1234567")
+    db.add_all([branch, service, staff, customer])
+    db.commit()
+
+    token = create_access_token(sub=str(uuid.uuid4()), tenant_id=str(t.id), role=UserRole.OWNER)
+    return {
+        "tenant_id": t.id,
+        "branch_id": branch.id,
+        "service_id": service.id,
+        "staff_id": staff.id,
+        "customer_id": customer.id,
+        "headers": {"Authorization": f"Bearer {token}", "X-Branch-Id": str(branch.id)},
+    }
+
+
+@pytest.fixture
+def make_client():
+    """Factory: client for an app mounting only *router* under ``/api/v1<prefix>``."""
+    def _make(router: APIRouter, prefix: str) -> TestClient:
+        app = FastAPI()
+        app.include_router(router, prefix="/api/v1" + prefix)
+        return TestClient(app)
+    return _make
+
+
+class FakeRazorpay:
+    """
+    Minimal stand-in for the Razorpay REST API on a local port.  Tests queue
+    responses per ``"<METHOD> <path>"`` (status, JSON body, or ``"drop"`` to
+    close the connection without answering) and inspect ``requests``.
+    """
+
+    def __init__(self):
+        self.routes: dict[str, list] = {}
+        self.handlers: dict[str, object] = {}
+        self.requests: list[tuple[str, str, dict]] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path, _, query = self.path.partition("?")
+                fake.requests.append((self.command, path, parse_qs(query)))
+                route = f"{self.command} {path}"
+                if route in fake.handlers:
+                    status, payload = fake.handlers[route](parse_qs(query), body)
+                else:
+                    queued = fake.routes.get(route) or [(404, {"error": {"description": "not found"}})]
+                    status, payload = queued.pop(0) if len(queued) > 1 else queued[0]
+                if status == "drop":
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True,
+        )
+        self._thread.start()
+
+    def respond(self, route: str, *responses) -> None:
+        """Answer *route* with *responses* in turn; the last one repeats."""
+        self.routes[route] = list(responses)
+
+    def handle(self, route: str, handler) -> None:
+        """Answer *route* with ``handler(query, body) -> (status, payload)``."""
+        self.handlers[route] = handler
+
+    def calls(self, route: str) -> int:
+        method, path = route.split(" ", 1)
+        return sum(1 for m, p, _ in self.requests if m == method and p == path)
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_razorpay():
+    fake = FakeRazorpay()
+    yield fake
+    fake.close()
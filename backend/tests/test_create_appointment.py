@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.api.v1 import appointment
+from app.db.session import engine
+from app.models.appointment import Appointment
+from app.models.appointment_service import AppointmentService
+from app.models.customer import Customer
+
+
+@contextmanager
+def recorded_statements():
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(appointment.router, "/appointments")
+
+
+def _booking(tenant, **overrides):
+    body = {
+        "customer_id": str(tenant["customer_id"]),
+        "staff_user_id": str(tenant["staff_id"]),
+        "service_ids": [str(tenant["service_id"])],
+        "start_at": "2030-01-01T11:00:00",
+    }
+    body.update(overrides)
+    return body
+
+
+def test_booking_statement_count(client, tenant):
+    with recorded_statements() as statements:
+        r = client.post("/api/v1/appointments", json=_booking(tenant), headers=tenant["headers"])
+    assert r.status_code == 200, r.text
+
+    # X-Branch-Id check, services + customer, overlap check (SQLite has no
+    # exclusion constraint), hold check, appointment INSERT ... RETURNING,
+    # line items (one executemany), three rollup upserts
+    assert len(statements) == 9, "\n\n".join(statements)
+
+
+def test_booking_writes_appointment_and_lines(client, tenant, db):
+    r = client.post("/api/v1/appointments", json=_booking(tenant), headers=tenant["headers"])
+    assert r.status_code == 200, r.text
+    assert db.scalar(select(func.count()).select_from(Appointment)) == 1
+    assert db.scalar(select(func.count()).select_from(AppointmentService)) == 1
+
+
+def test_booking_without_services(client, tenant):
+    r = client.post("/api/v1/appointments", json=_booking(tenant, service_ids=[]), headers=tenant["headers"])
+    assert r.status_code == 200, r.text
+
+
+def test_booking_unknown_customer(client, tenant):
+    body = _booking(tenant, customer_id="00000000-0000-0000-0000-000000000000")
+    r = client.post("/api/v1/appointments", json=body, headers=tenant["headers"])
+    assert r.status_code == 404
+
+
+def test_booking_unknown_service(client, tenant):
+    body = _booking(tenant, service_ids=["00000000-0000-0000-0000-000000000000"])
+    r = client.post("/api/v1/appointments", json=body, headers=tenant["headers"])
+    assert r.status_code == 400
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        appointment.send_booking_email, "delay", lambda *args: sent.append((args, None)),
+    )
+    monkeypatch.setattr(
+        appointment.send_booking_email, "apply_async",
+        lambda args, eta: sent.append((tuple(args), eta)),
+    )
+    return sent
+
+
+def test_recurring_booking_schedules_reminders(client, tenant, db, sent_emails):
+    customer = db.get(Customer, tenant["customer_id"])
+    customer.email = "cus@example.com"
+    db.commit()
+
+    body = _booking(tenant, interval_days=7, occurrences=3)
+    r = client.post("/api/v1/appointments/recurring", json=body, headers=tenant["headers"])
+    assert r.status_code == 200, r.text
+    assert db.scalar(select(func.count()).select_from(Appointment)) == 3
+
+    confirmation, *reminders = sent_emails
+    assert confirmation[1] is None
+    assert [eta for _, eta in reminders] == [
+        datetime(2029, 12, 31, 11, tzinfo=timezone.utc),
+        datetime(2030, 1, 7, 11, tzinfo=timezone.utc),
+        datetime(2030, 1, 14, 11, tzinfo=timezone.utc),
+    ]
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import select
+
+from app.api.v1 import appointment
+from app.models.report_rollup import ReportDailyBranch
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(appointment.router, "/appointments")
+
+
+@pytest.fixture
+def booked(client, tenant):
+    r = client.post(
+        "/api/v1/appointments",
+        json={
+            "customer_id": str(tenant["customer_id"]),
+            "staff_user_id": str(tenant["staff_id"]),
+            "service_ids": [str(tenant["service_id"])],
+            "start_at": "2030-01-01T11:00:00",
+        },
+        headers=tenant["headers"],
+    )
+    assert r.status_code == 200, r.text
+    return r.json()["data"]["id"]
+
+
+def _branch_day(db, tenant):
+    db.expire_all()
+    return db.scalar(select(ReportDailyBranch).where(ReportDailyBranch.branch_id == tenant["branch_id"]))
+
+
+def test_cancel_moves_rollup_once(client, tenant, booked, db):
+    day = _branch_day(db, tenant)
+    assert (day.appointments, day.confirmed, day.cancelled, float(day.revenue)) == (1, 1, 0, 100.0)
+
+    for _ in range(2):
+        r = client.patch(
+            f"/api/v1/appointments/{booked}", json={"status": "CANCELLED"}, headers=tenant["headers"],
+        )
+        assert r.status_code == 200, r.text
+
+    day = _branch_day(db, tenant)
+    assert (day.appointments, day.confirmed, day.cancelled, float(day.revenue)) == (1, 0, 1, 0.0)
+
+
+def test_patch_unknown_appointment(client, tenant):
+    r = client.patch(
+        "/api/v1/appointments/00000000-0000-0000-0000-000000000000",
+        json={"notes": "x"},
+        headers=tenant["headers"],
+    )
+    assert r.status_code == 404
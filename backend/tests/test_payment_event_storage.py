@@ -0,0 +1,121 @@
+"""
+Partition maintenance needs PostgreSQL: set TEST_POSTGRES_URL (a scratch
+database; ``payment_events`` is dropped and recreated) to run those tests.
+Compaction also runs against the SQLite test database.
+"""
+
+import os
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.models.payment_event import PaymentEvent
+from app.services.payment_event_storage import (
+    DEFAULT_PARTITION,
+    compact_payment_events,
+    ensure_payment_event_partitions,
+    split_default_partition,
+)
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def pg():
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    engine = create_engine(POSTGRES_URL)
+    table = PaymentEvent.__table__
+    with engine.begin() as conn:
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+    with Session(engine) as session:
+        yield session
+    with engine.begin() as conn:
+        table.drop(conn, checkfirst=True)
+    engine.dispose()
+
+
+def _insert_event(db: Session, created_at: datetime, payload: dict | None = None) -> None:
+    db.execute(insert(PaymentEvent).values(
+        id=uuid.uuid4(),
+        tenant_id=uuid.uuid4(),
+        provider="RAZORPAY",
+        event_type="payment.captured",
+        payload=payload or {},
+        created_at=created_at,
+    ))
+    db.commit()
+
+
+def _count(db: Session, table: str) -> int:
+    return db.scalar(text(f"SELECT count(*) FROM {table}"))
+
+
+def test_default_partition_catches_rows_outside_monthly_partitions(pg):
+    _insert_event(pg, datetime(2099, 5, 17, tzinfo=timezone.utc))
+    assert _count(pg, DEFAULT_PARTITION) == 1
+
+
+def test_split_moves_default_rows_into_their_month(pg):
+    _insert_event(pg, datetime(2099, 5, 17, tzinfo=timezone.utc))
+    _insert_event(pg, datetime(2099, 5, 20, tzinfo=timezone.utc))
+    _insert_event(pg, datetime(2099, 7, 1, tzinfo=timezone.utc))
+
+    moved = split_default_partition(pg)
+
+    assert moved == {"payment_events_y2099m05": 2, "payment_events_y2099m07": 1}
+    assert _count(pg, DEFAULT_PARTITION) == 0
+    assert _count(pg, "payment_events_y2099m05") == 2
+    assert _count(pg, "payment_events") == 3
+
+    # New rows for that month now go to the attached partition
+    _insert_event(pg, datetime(2099, 5, 30, tzinfo=timezone.utc))
+    assert _count(pg, "payment_events_y2099m05") == 3
+    assert _count(pg, DEFAULT_PARTITION) == 0
+
+
+def test_partitions_can_be_created_after_a_split(pg):
+    _insert_event(pg, datetime(2099, 5, 17, tzinfo=timezone.utc))
+    split_default_partition(pg)
+    created = ensure_payment_event_partitions(pg, months_ahead=1, today=date(2099, 5, 1))
+    pg.commit()
+    assert created == ["payment_events_y2099m05", "payment_events_y2099m06"]
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def any_db(request):
+    return request.getfixturevalue("db" if request.param == "sqlite" else "pg")
+
+
+def test_compaction_walks_every_batch(any_db):
+    db = any_db
+    for day in range(1, 8):
+        _insert_event(db, datetime(2099, 5, day, tzinfo=timezone.utc), payload={
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {"id": f"pay_{day}", "status": "captured", "notes": "x" * 100}}},
+        })
+    # Already compacted rows and rows that are too new are left alone
+    already = datetime(2099, 5, 3, tzinfo=timezone.utc)
+    db.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.created_at == already)
+        .values(compacted_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+
+    compacted = compact_payment_events(
+        db, older_than=datetime(2099, 5, 7, tzinfo=timezone.utc), batch_size=2,
+    )
+
+    assert compacted == 5
+    db.expire_all()
+    rows = db.execute(
+        select(PaymentEvent.payload, PaymentEvent.compacted_at).order_by(PaymentEvent.created_at)
+    ).all()
+    assert [r.compacted_at is not None for r in rows] == [True] * 6 + [False]
+    full = [r.payload.get("payload") is not None for r in rows]
+    assert full == [False, False, True, False, False, False, True]
@@ -0,0 +1,179 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, select, update
+
+from app.api.v1 import payments
+from app.db.session import SessionLocal, engine
+from app.models.payment import Payment, PaymentStatus
+from app.models.payment_event import PaymentEvent
+from app.services.payment_service import REFUND_REQUESTED
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(payments.router, "/payments")
+
+
+@pytest.fixture
+def captured(db, tenant):
+    """Factory for CAPTURED Razorpay payments of the tenant's branch."""
+    def _make(**values) -> uuid.UUID:
+        pay = Payment(
+            id=uuid.uuid4(),
+            tenant_id=tenant["tenant_id"],
+            branch_id=tenant["branch_id"],
+            appointment_id=uuid.uuid4(),
+            customer_id=tenant["customer_id"],
+            provider_order_id=f"order_{uuid.uuid4().hex[:8]}",
+            provider_payment_id=f"pay_{uuid.uuid4().hex[:8]}",
+            amount=100,
+            status=PaymentStatus.CAPTURED,
+            **values,
+        )
+        db.add(pay)
+        db.commit()
+        return pay.id
+    return _make
+
+
+@pytest.fixture
+def connection_owners():
+    """Pool connection record -> ident of the thread that checked it out."""
+    owners: dict = {}
+
+    def _checkout(dbapi_conn, record, proxy):
+        owners[record] = threading.get_ident()
+
+    def _checkin(dbapi_conn, record):
+        owners.pop(record, None)
+
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+    yield owners
+    event.remove(engine, "checkout", _checkout)
+    event.remove(engine, "checkin", _checkin)
+
+
+class SlowProvider:
+    """``client.payment`` stand-in that takes *delay* seconds per refund."""
+
+    def __init__(self, delay: float, connection_owners: dict | None = None):
+        self.delay = delay
+        self.connection_owners = connection_owners
+        self.held: list[int] = []
+        self._lock = threading.Lock()
+
+    def refund(self, payment_id, data):
+        if self.connection_owners is not None:
+            me = threading.get_ident()
+            with self._lock:
+                self.held.append(list(self.connection_owners.values()).count(me))
+        time.sleep(self.delay)
+        return {"id": "rfnd_" + payment_id, "status": "processed"}
+
+
+def test_slow_provider_does_not_hold_connections(
+    client, tenant, captured, connection_owners, monkeypatch,
+):
+    delay = 0.5
+    provider = SlowProvider(delay, connection_owners)
+    monkeypatch.setattr(payments.client, "payment", provider)
+    # More concurrent refunds than the pool has connections
+    n = engine.pool.size() + engine.pool._max_overflow + 5
+    pay_ids = [captured() for _ in range(n)]
+
+    def refund(pay_id):
+        return client.post(
+            "/api/v1/payments/razorpay/refund",
+            json={"payment_id": str(pay_id)},
+            headers=tenant["headers"],
+        )
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        responses = list(pool.map(refund, pay_ids))
+    elapsed = time.monotonic() - started
+
+    assert [r.status_code for r in responses] == [200] * n, responses[0].text
+    # No request kept a connection checked out across the provider call ...
+    assert provider.held == [0] * n
+    # ... so the provider calls overlapped instead of queueing on the pool
+    assert elapsed < 3 * delay
+
+
+def test_refund_in_progress_is_rejected(client, tenant, captured, monkeypatch):
+    monkeypatch.setattr(payments.client, "payment", SlowProvider(0))
+    pay_id = captured(
+        refund_status=REFUND_REQUESTED,
+        refund_requested_at=datetime.now(timezone.utc),
+    )
+    r = client.post(
+        "/api/v1/payments/razorpay/refund",
+        json={"payment_id": str(pay_id)},
+        headers=tenant["headers"],
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Refund already in progress"
+
+
+def test_stale_refund_claim_is_retaken(client, tenant, captured, db, monkeypatch):
+    monkeypatch.setattr(payments.client, "payment", SlowProvider(0))
+    pay_id = captured(
+        refund_status=REFUND_REQUESTED,
+        refund_requested_at=datetime.now(timezone.utc) - timedelta(hours=1),
+    )
+    r = client.post(
+        "/api/v1/payments/razorpay/refund",
+        json={"payment_id": str(pay_id)},
+        headers=tenant["headers"],
+    )
+    assert r.status_code == 200, r.text
+
+    pay = db.scalar(select(Payment).where(Payment.id == pay_id))
+    assert pay.status == PaymentStatus.REFUNDED
+    assert pay.refund_status == "processed"
+    assert pay.refund_requested_at is None
+
+
+def test_refund_after_claim_was_retaken(client, tenant, captured, db, monkeypatch):
+    pay_id = captured()
+    retaken_at = datetime.now(timezone.utc) + timedelta(minutes=10)
+
+    class RetakingProvider:
+        """Our claim goes stale mid-call and another request retakes it."""
+
+        def refund(self, payment_id, data):
+            with SessionLocal() as other:
+                other.execute(
+                    update(Payment)
+                    .where(Payment.id == pay_id)
+                    .values(refund_requested_at=retaken_at)
+                )
+                other.commit()
+            return {"id": "rfnd_" + payment_id, "status": "processed"}
+
+    monkeypatch.setattr(payments.client, "payment", RetakingProvider())
+    r = client.post(
+        "/api/v1/payments/razorpay/refund",
+        json={"payment_id": str(pay_id)},
+        headers=tenant["headers"],
+    )
+    assert r.status_code == 409, r.text
+
+    db.expire_all()
+    pay = db.scalar(select(Payment).where(Payment.id == pay_id))
+    # The newer claim is left alone, but the provider refund is not lost
+    assert pay.status == PaymentStatus.CAPTURED
+    assert pay.refund_status == REFUND_REQUESTED
+    assert pay.refund_id == "rfnd_" + pay.provider_payment_id
+    assert db.scalar(
+        select(PaymentEvent.id).where(
+            PaymentEvent.event_type == "refund.created",
+            PaymentEvent.provider_event_id == pay.refund_id,
+        )
+    )
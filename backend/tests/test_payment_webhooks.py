@@ -0,0 +1,77 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.api.v1 import payments
+from app.core.config import settings
+from app.models.payment_webhook_inbox import PaymentWebhookInbox
+from app.services.payment_service import (
+    exhausted_webhook_events,
+    stale_pending_webhook_orders,
+)
+
+
+@pytest.fixture
+def client(make_client, monkeypatch):
+    monkeypatch.setattr(settings, "RAZORPAY_WEBHOOK_SECRET", "whsec")
+    enqueued = []
+    monkeypatch.setattr(payments.process_razorpay_webhooks, "delay", enqueued.append)
+    c = make_client(payments.router, "/payments")
+    c.enqueued = enqueued
+    return c
+
+
+def _inbox_row(db, order_id, *, attempts=0, age_sec=120):
+    db.execute(
+        insert(PaymentWebhookInbox).values(
+            provider="razorpay",
+            event_type="payment.captured",
+            provider_order_id=order_id,
+            payload={},
+            received_at=datetime.now(timezone.utc) - timedelta(seconds=age_sec),
+            attempts=attempts,
+        )
+    )
+    db.commit()
+
+
+def test_webhook_is_stored_and_enqueued(client, db):
+    raw = json.dumps({
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {"order_id": "order_1"}}},
+    }).encode()
+    sig = hmac.new(b"whsec", raw, hashlib.sha256).hexdigest()
+
+    r = client.post(
+        "/api/v1/payments/razorpay/webhook",
+        content=raw,
+        headers={"X-Razorpay-Signature": sig},
+    )
+    assert r.status_code == 200, r.text
+    assert db.scalars(select(PaymentWebhookInbox.provider_order_id)).all() == ["order_1"]
+    assert client.enqueued == ["order_1"]
+
+
+def test_webhook_rejects_bad_signature(client, db):
+    r = client.post(
+        "/api/v1/payments/razorpay/webhook",
+        content=b"{}",
+        headers={"X-Razorpay-Signature": "nope"},
+    )
+    assert r.status_code == 400
+    assert db.scalars(select(PaymentWebhookInbox.id)).all() == []
+
+
+def test_sweep_skips_exhausted_events(db):
+    _inbox_row(db, "order_ok", attempts=2)
+    _inbox_row(db, "order_dead", attempts=5)
+    _inbox_row(db, "order_new", age_sec=0)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert stale_pending_webhook_orders(db, cutoff, max_attempts=5) == ["order_ok"]
+    dead = exhausted_webhook_events(db, max_attempts=5)
+    assert [row.provider_order_id for row in dead] == ["order_dead"]
@@ -0,0 +1,107 @@
+import socket
+
+import pytest
+import razorpay
+import requests
+from razorpay.errors import ServerError
+
+from app.integration.razorpay_client import (
+    CircuitBreaker,
+    ProviderMetrics,
+    ProviderSession,
+    ProviderUnavailableError,
+)
+
+ORDER = {"id": "order_1", "status": "created"}
+
+
+def _client(base_url: str, *, failure_threshold: int = 10, reset_after_sec: float = 60.0):
+    session = ProviderSession(
+        pool_maxsize=4,
+        connect_timeout_sec=1.0,
+        read_timeout_sec=1.0,
+        max_retries=2,
+        retry_backoff_sec=0.0,
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_after_sec=reset_after_sec),
+        metrics=ProviderMetrics(),
+    )
+    return razorpay.Client(session=session, auth=("key", "secret"), base_url=base_url)
+
+
+@pytest.fixture
+def client(fake_razorpay):
+    return _client(fake_razorpay.base_url)
+
+
+def test_get_retries_server_errors(client, fake_razorpay):
+    fake_razorpay.respond("GET /v1/orders/order_1", (503, {}), (200, ORDER))
+    assert client.order.fetch("order_1") == ORDER
+    assert fake_razorpay.calls("GET /v1/orders/order_1") == 2
+
+
+def test_get_retries_dropped_connections(client, fake_razorpay):
+    fake_razorpay.respond("GET /v1/orders/order_1", ("drop", None), (200, ORDER))
+    assert client.order.fetch("order_1") == ORDER
+    assert fake_razorpay.calls("GET /v1/orders/order_1") == 2
+
+
+def test_post_is_not_retried_on_server_error(client, fake_razorpay):
+    fake_razorpay.respond("POST /v1/orders", (503, {"error": {"description": "busy"}}))
+    with pytest.raises(ServerError):
+        client.order.create({"amount": 100, "currency": "INR"})
+    assert fake_razorpay.calls("POST /v1/orders") == 1
+
+
+def test_post_is_not_retried_once_sent(client, fake_razorpay):
+    # The provider may have created the refund before the connection dropped
+    fake_razorpay.respond("POST /v1/payments/pay_1/refund", ("drop", None), (200, {"id": "rfnd_1"}))
+    with pytest.raises(requests.ConnectionError):
+        client.payment.refund("pay_1", {})
+    assert fake_razorpay.calls("POST /v1/payments/pay_1/refund") == 1
+
+
+def test_post_is_retried_when_no_connection_was_made():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = _client(f"http://127.0.0.1:{port}")
+
+    with pytest.raises(requests.ConnectionError):
+        client.order.create({"amount": 100, "currency": "INR"})
+    stats = client.session.metrics.snapshot()["POST /v1/orders"]
+    assert stats["retries"] == 2
+    assert stats["errors"] == 1
+
+
+def test_breaker_opens_and_fails_fast(fake_razorpay):
+    client = _client(fake_razorpay.base_url, failure_threshold=2)
+    fake_razorpay.respond("GET /v1/orders/order_1", (500, {"error": {"description": "down"}}))
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            client.order.fetch("order_1")
+    calls = fake_razorpay.calls("GET /v1/orders/order_1")
+
+    with pytest.raises(ProviderUnavailableError):
+        client.order.fetch("order_1")
+    assert fake_razorpay.calls("GET /v1/orders/order_1") == calls
+    assert client.session.breaker.state == "open"
+
+
+def test_trial_slot_is_released_after_unexpected_error(fake_razorpay, monkeypatch):
+    client = _client(fake_razorpay.base_url, failure_threshold=1, reset_after_sec=0.0)
+    breaker = client.session.breaker
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+
+    def boom(self, *args, **kwargs):
+        raise RuntimeError("bug in a hook")
+
+    with monkeypatch.context() as m:
+        m.setattr(requests.Session, "request", boom)
+        with pytest.raises(RuntimeError):
+            client.order.fetch("order_1")
+
+    # The failed trial must not block every later call
+    fake_razorpay.respond("GET /v1/orders/order_1", (200, ORDER))
+    assert client.order.fetch("order_1") == ORDER
+    assert breaker.state == "closed"
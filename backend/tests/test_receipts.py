@@ -0,0 +1,102 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from app.services import receipt_service
+from app.services.receipt_service import (
+    UnicodeFonts,
+    generate_receipt_pdf,
+    iter_receipts_zip,
+    shutdown_export_pool,
+    start_export_pool,
+)
+
+DEJAVU = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+DEJAVU_MONO = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+NOTO = "/usr/share/fonts/truetype/noto/NotoSans{}-Regular.ttf"
+
+
+def _installed(*paths):
+    missing = [p for p in paths if not os.path.exists(p)]
+    return pytest.mark.skipif(bool(missing), reason=f"font not installed: {missing}")
+
+
+def _text(pdf: bytes) -> str:
+    pypdf = pytest.importorskip("pypdf")
+    return pypdf.PdfReader(io.BytesIO(pdf)).pages[0].extract_text()
+
+
+def test_latin_receipt_uses_template():
+    pdf = generate_receipt_pdf("r1", "Zoë Müller", 499.5, "INR")
+    assert pdf.startswith(b"%PDF-1.3")
+    assert b"/FontFile2" not in pdf
+    text = _text(pdf)
+    assert "Customer: Zoë Müller" in text
+    assert "Amount: 499.50 INR" in text
+
+
+@_installed(DEJAVU)
+def test_cyrillic_name_is_embedded_not_replaced():
+    pdf = generate_receipt_pdf("r2", "Иван Петров", 100, "INR")
+    assert b"/FontFile2" in pdf
+    text = _text(pdf)
+    assert "Customer: Иван Петров" in text
+    assert "?" not in text
+
+
+@_installed(DEJAVU, NOTO.format("Devanagari"), NOTO.format("Tamil"))
+@pytest.mark.parametrize("name", ["प्रिया शर्मा", "அருண் குமார்"])
+def test_indic_names_use_fallback_fonts(name):
+    pdf = generate_receipt_pdf("r3", name, 100, "INR")
+    assert b"NotoSans" in pdf
+    assert "?" not in _text(pdf)
+
+
+@_installed(DEJAVU, DEJAVU_MONO)
+def test_runs_switch_to_a_fallback_font_only_where_needed():
+    fonts = UnicodeFonts([DEJAVU_MONO, DEJAVU])
+    (mono, mono_cmap), (sans, sans_cmap) = fonts.fonts
+    only_sans = next(chr(cp) for cp in sorted(sans_cmap) if cp > 0x370 and cp not in mono_cmap)
+
+    assert fonts.runs(f"Name: {only_sans}{only_sans} x") == [
+        (mono, "Name: "),
+        (sans, f"{only_sans}{only_sans} "),
+        (mono, "x"),
+    ]
+
+
+def test_missing_fallback_fonts_are_skipped_but_primary_is_required():
+    if os.path.exists(DEJAVU):
+        fonts = UnicodeFonts([DEJAVU, "/nonexistent/fallback.ttf"])
+        assert len(fonts.fonts) == 1
+    with pytest.raises(RuntimeError, match="RECEIPT_UNICODE_FONTS"):
+        UnicodeFonts(["/nonexistent/font.ttf"])
+
+
+def _archive_names(chunks) -> list[str]:
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks))).namelist()
+
+
+def test_zip_export_in_process():
+    rows = [(f"r{i}", "Customer", 10.0, "INR") for i in range(25)]
+    names = _archive_names(iter_receipts_zip(rows, chunk_size=10))
+    assert names == [f"receipt_r{i}.pdf" for i in range(25)]
+
+
+def test_zip_export_on_startup_pool():
+    start_export_pool(2)
+    try:
+        pool = receipt_service.export_pool()
+        assert pool is not None
+        # Starting again (another lifespan) keeps the existing pool
+        start_export_pool(4)
+        assert receipt_service.export_pool() is pool
+
+        rows = [(f"r{i}", "Customer", 10.0, "INR") for i in range(25)]
+        names = _archive_names(iter_receipts_zip(rows, executor=pool, chunk_size=10))
+        assert names == [f"receipt_r{i}.pdf" for i in range(25)]
+    finally:
+        shutdown_export_pool()
+    assert receipt_service.export_pool() is None
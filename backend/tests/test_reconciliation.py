@@ -0,0 +1,171 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import razorpay
+from sqlalchemy import event, select, text
+
+from app.db.session import engine
+from app.models.appointment import Appointment, ApptPayStatus
+from app.models.payment import Payment, PaymentStatus
+from app.models.payment_event import PaymentEvent
+from app.services.payment_service import iter_provider_payments, reconcile_razorpay_payments
+
+
+@pytest.fixture
+def provider(fake_razorpay):
+    """Razorpay client against the fake server, listing ``fake_razorpay.payments``."""
+    fake_razorpay.payments = []
+
+    def list_payments(query, body):
+        skip = int(query.get("skip", ["0"])[0])
+        count = int(query.get("count", ["10"])[0])
+        items = fake_razorpay.payments[skip:skip + count]
+        return 200, {"entity": "collection", "count": len(items), "items": items}
+
+    fake_razorpay.handle("GET /v1/payments", list_payments)
+    return razorpay.Client(auth=("key", "secret"), base_url=fake_razorpay.base_url)
+
+
+@pytest.fixture
+def pending_payment(db, tenant):
+    """Factory: a CREATED payment (and its UNPAID appointment) for *order_id*."""
+    def _make(order_id: str) -> tuple[uuid.UUID, uuid.UUID]:
+        appt = Appointment(
+            id=uuid.uuid4(),
+            tenant_id=tenant["tenant_id"],
+            branch_id=tenant["branch_id"],
+            customer_id=tenant["customer_id"],
+            staff_user_id=tenant["staff_id"],
+            start_at=datetime(2030, 1, 1, 10),
+            end_at=datetime(2030, 1, 1, 10, 30),
+            status="CONFIRMED",
+            payment_status=ApptPayStatus.UNPAID,
+        )
+        pay = Payment(
+            id=uuid.uuid4(),
+            tenant_id=tenant["tenant_id"],
+            branch_id=tenant["branch_id"],
+            appointment_id=appt.id,
+            customer_id=tenant["customer_id"],
+            provider_order_id=order_id,
+            amount=100,
+            status=PaymentStatus.CREATED,
+        )
+        db.add_all([appt, pay])
+        db.commit()
+        return pay.id, appt.id
+    return _make
+
+
+def _provider_payment(i: int, status: str = "captured") -> dict:
+    return {"id": f"pay_{i}", "order_id": f"order_{i}", "status": status}
+
+
+def test_pages_until_a_short_page(provider, fake_razorpay):
+    fake_razorpay.payments = [_provider_payment(i) for i in range(250)]
+    items = list(iter_provider_payments(provider, from_ts=0, to_ts=1, page_size=100))
+    assert [p["id"] for p in items] == [f"pay_{i}" for i in range(250)]
+    assert fake_razorpay.calls("GET /v1/payments") == 3
+
+
+def test_page_cap_raises_instead_of_truncating(provider, fake_razorpay):
+    fake_razorpay.payments = [_provider_payment(i) for i in range(250)]
+    with pytest.raises(RuntimeError, match="narrow the reconciliation window"):
+        list(iter_provider_payments(provider, from_ts=0, to_ts=1, page_size=100, max_pages=2))
+
+
+def test_reconcile_applies_provider_status(provider, fake_razorpay, pending_payment, db):
+    pay_id, appt_id = pending_payment("order_1")
+    fake_razorpay.payments = [_provider_payment(1)]
+
+    result = reconcile_razorpay_payments(
+        db, iter_provider_payments(provider, from_ts=0, to_ts=1),
+    )
+
+    assert result == {"provider_orders": 1, "checked": 1, "corrected": 1}
+    assert db.scalar(select(Payment.status).where(Payment.id == pay_id)) == PaymentStatus.CAPTURED
+    assert db.scalar(select(Appointment.payment_status).where(Appointment.id == appt_id)) == ApptPayStatus.PAID
+    assert db.scalars(select(PaymentEvent.event_type)).all() == ["reconcile.captured"]
+
+
+def test_reconcile_skips_payments_a_webhook_changed(provider, fake_razorpay, pending_payment, db):
+    won_id, won_appt = pending_payment("order_1")
+    raced_id, raced_appt = pending_payment("order_2")
+    fake_razorpay.payments = [_provider_payment(1), _provider_payment(2)]
+
+    # A webhook fails order_2 between reconciliation's read and its update
+    def webhook_lands_first(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE payments") and not getattr(webhook_lands_first, "done", False):
+            webhook_lands_first.done = True
+            with engine.begin() as other:
+                other.execute(
+                    text("UPDATE payments SET status = 'FAILED' WHERE id = :id"),
+                    {"id": raced_id.hex},
+                )
+
+    event.listen(engine, "before_cursor_execute", webhook_lands_first)
+    try:
+        result = reconcile_razorpay_payments(
+            db, iter_provider_payments(provider, from_ts=0, to_ts=1),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", webhook_lands_first)
+
+    assert result["corrected"] == 1
+    assert db.scalar(select(Payment.status).where(Payment.id == won_id)) == PaymentStatus.CAPTURED
+    assert db.scalar(select(Payment.status).where(Payment.id == raced_id)) == PaymentStatus.FAILED
+    assert db.scalar(select(Appointment.payment_status).where(Appointment.id == raced_appt)) == ApptPayStatus.UNPAID
+    assert db.scalars(select(PaymentEvent.provider_order_id)).all() == ["order_1"]
+
+
+def test_reconcile_batches_updates_per_transition(provider, fake_razorpay, pending_payment, db):
+    ids = [pending_payment(f"order_{i}")[0] for i in range(5)]
+    fake_razorpay.payments = [_provider_payment(i) for i in range(3)] + [
+        _provider_payment(i, "failed") for i in range(3, 5)
+    ]
+
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE payments"):
+            updates.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = reconcile_razorpay_payments(
+            db, iter_provider_payments(provider, from_ts=0, to_ts=1),
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert result["corrected"] == 5
+    # CREATED -> CAPTURED and CREATED -> FAILED
+    assert len(updates) == 2
+    rows = dict(db.execute(select(Payment.id, Payment.provider_payment_id)).all())
+    assert [rows[pay_id] for pay_id in ids] == [f"pay_{i}" for i in range(5)]
+
+
+def test_slot_hold_sweep_fails_stale_pending_intents(db, tenant):
+    from app.workers.tasks import purge_expired_slot_holds
+
+    now = datetime.now(timezone.utc)
+    stale, fresh = uuid.uuid4(), uuid.uuid4()
+    for pay_id, created_at in ((stale, now - timedelta(hours=1)), (fresh, now)):
+        db.add(Payment(
+            id=pay_id,
+            tenant_id=tenant["tenant_id"],
+            branch_id=tenant["branch_id"],
+            appointment_id=uuid.uuid4(),
+            customer_id=tenant["customer_id"],
+            amount=100,
+            status=PaymentStatus.PENDING,
+            created_at=created_at,
+        ))
+    db.commit()
+
+    assert purge_expired_slot_holds()["expired_payments"] == 1
+
+    db.expire_all()
+    assert db.get(Payment, stale).status == PaymentStatus.FAILED
+    assert db.get(Payment, fresh).status == PaymentStatus.PENDING
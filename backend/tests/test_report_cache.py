@@ -0,0 +1,49 @@
+import uuid
+
+import pytest
+
+from app.services.report_cache import ReportCache
+
+
+def _cache(redis_client=None) -> ReportCache:
+    cache = ReportCache(
+        ttl_sec=60,
+        max_local_entries=16,
+        lock_timeout_sec=1.0,
+        redis_url="redis://test" if redis_client is not None else None,
+    )
+    cache._redis = redis_client
+    return cache
+
+
+def test_without_redis_nothing_is_cached():
+    cache = _cache()
+    tenant_id = uuid.uuid4()
+    assert cache.key(tenant_id, "summary", {}) is None
+    cache.bump([tenant_id])
+    assert cache.stats()["bumps"] == 0
+
+
+def test_bump_from_another_process_invalidates():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    api = _cache(fakeredis.FakeRedis(server=server))
+    worker = _cache(fakeredis.FakeRedis(server=server))
+    tenant_id = uuid.uuid4()
+
+    calls = []
+
+    def render() -> bytes:
+        calls.append(1)
+        return b'{"n": %d}' % len(calls)
+
+    key = api.key(tenant_id, "summary", {"days": 7})
+    assert api.get_or_compute(key, render) == b'{"n": 1}'
+    assert api.get_or_compute(api.key(tenant_id, "summary", {"days": 7}), render) == b'{"n": 1}'
+
+    # e.g. a Celery task committing a payment
+    worker.bump([tenant_id])
+
+    new_key = api.key(tenant_id, "summary", {"days": 7})
+    assert new_key != key
+    assert api.get_or_compute(new_key, render) == b'{"n": 2}'